@@ -0,0 +1,99 @@
+"""Import-time benchmark guarding the cold-start latency of the serving app.
+
+Usage (from backend/algo):
+    python -m benchmarks.import_time --output import_results.json
+    python -m benchmarks.import_time --baseline import_results.json --output import_new.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, Any, List, Tuple
+
+from benchmarks.run_benchmarks import compare
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# Modules that must only be imported once training or prediction is used
+DEFERRED_MODULES = ('sklearn', 'scipy', 'joblib')
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = sorted({{m.split('.')[0] for m in sys.modules if m.split('.')[0] in {deferred!r}}})
+print(json.dumps({{'seconds': elapsed, 'deferred_loaded': loaded}}))
+"""
+
+
+def measure_import(module: str = 'app') -> Tuple[float, List[str]]:
+    """Import `module` in a fresh interpreter; return seconds and any deferred modules loaded."""
+    env = dict(os.environ, TRAFFIC_LOAD_MODE='lazy')
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module, deferred=DEFERRED_MODULES)],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return result['seconds'], result['deferred_loaded']
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', default='app,model,data_loader', help="Comma-separated modules to import")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default='import_results.json')
+    parser.add_argument('--baseline', help="Compare against a stored results file")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Allowed slowdown ratio vs baseline")
+    args = parser.parse_args(argv)
+
+    # Read the baseline up front; writing the output over it would compare the run with itself
+    baseline = None
+    if args.baseline:
+        if os.path.abspath(args.baseline) == os.path.abspath(args.output):
+            parser.error("--output must differ from --baseline")
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    stages: Dict[str, Any] = {}
+    failed = False
+    for module in args.modules.split(','):
+        timings, loaded = [], []
+        for _ in range(args.repeat):
+            seconds, loaded = measure_import(module)
+            timings.append(seconds)
+        stages[f'import {module}'] = {
+            'median_s': statistics.median(timings),
+            'min_s': min(timings),
+            'runs': args.repeat,
+            'deferred_loaded': loaded
+        }
+        print(f"  import {module:<20} {statistics.median(timings) * 1000:8.1f} ms"
+              + (f"  loaded {', '.join(loaded)}" if loaded else ''))
+        if loaded:
+            failed = True
+
+    results = {
+        'meta': {'timestamp': datetime.now().isoformat(timespec='seconds'), 'python': sys.version.split()[0]},
+        'runs': {'import': {'stages': stages, 'routes': {}}}
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['name']}: {r['baseline_s'] * 1000:.1f} ms -> {r['current_s'] * 1000:.1f} ms "
+                  f"({r['ratio']:.2f}x)")
+        failed = failed or bool(regressions)
+    if failed:
+        print(f"Import-time guard failed (deferred modules: {', '.join(DEFERRED_MODULES)})")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
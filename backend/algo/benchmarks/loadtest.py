@@ -0,0 +1,463 @@
+"""Load test replaying the dashboard's request mix against gunicorn on synthetic data.
+
+Starts the app with gunicorn once per configuration (sync workers, threaded
+gthread workers), drives it with concurrent simulated dashboard sessions and
+reports throughput, p50/p95/p99 latency per endpoint and the RSS of every
+worker. Results use the run_benchmarks layout, so --baseline compares builds.
+
+Usage (from backend/algo):
+    python -m benchmarks.loadtest --rows 200k --configs sync:4,gthread:2x8 --output load_results.json
+    python -m benchmarks.loadtest --baseline load_results.json --output load_new.json
+    python -m benchmarks.loadtest --url http://127.0.0.1:5000 --duration 60
+
+A session repeats one scenario after another, chosen by --mix weights:
+  filter   statistics, analysis and data in parallel with random filters
+           (the MLTrafficAnalysis.tsx page load and "apply filters")
+  predict  one POST /api/predict for a random detector, hour and weekday
+  train    POST /api/train followed by GET /api/correlation
+The client runs in this process; on small machines it competes with the
+workers for CPU, so compare results taken on the same host only.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.run_benchmarks import compare
+from benchmarks.synthetic import generate_torino_like, generate_detectors, parse_size
+
+ALGO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ALGO_DIR, 'src')
+
+DEFAULT_MIX = 'filter=70,predict=28,train=2'
+FILTER_ENDPOINTS = ('/api/statistics', '/api/analysis', '/api/data')
+
+
+def parse_config(value: str) -> Dict[str, Any]:
+    """Parse 'sync:4' or 'gthread:2x8' (workers x threads) into a gunicorn configuration."""
+    worker_class, _, size = value.partition(':')
+    if worker_class not in ('sync', 'gthread'):
+        raise ValueError(f"Unknown worker class '{worker_class}'")
+    workers, _, threads = (size or '1').partition('x')
+    config = {'worker_class': worker_class, 'workers': int(workers), 'threads': int(threads or 1)}
+    if worker_class == 'sync' and config['threads'] != 1:
+        raise ValueError("sync workers serve one request at a time; use gthread for threads")
+    config['name'] = f"{worker_class}-w{config['workers']}"
+    if worker_class == 'gthread':
+        config['name'] += f"-t{config['threads']}"
+    return config
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse 'filter=70,predict=28,train=2' into normalized scenario weights."""
+    weights = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}'")
+        weights[name] = float(weight)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Scenario weights must sum to a positive number")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    """Latency percentiles and throughput of one endpoint or scenario."""
+    if not latencies:
+        return {'requests': 0, 'errors': errors, 'median_s': 0.0, 'p95_s': None, 'p99_s': None,
+                'max_s': None, 'throughput_rps': 0.0}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'median_s': float(p50),
+        'p95_s': float(p95),
+        'p99_s': float(p99),
+        'max_s': float(max(latencies)),
+        'throughput_rps': len(latencies) / elapsed if elapsed > 0 else 0.0
+    }
+
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process from /proc (Linux); None when unavailable."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process from /proc (the gunicorn workers of a master)."""
+    children = []
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return children
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name may contain spaces; the parent pid follows its closing parenthesis
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+class MemorySampler:
+    """Samples the RSS of a gunicorn master and its workers in a background thread."""
+
+    def __init__(self, master_pid: int, interval: float = 0.5):
+        self.master_pid = master_pid
+        self.interval = interval
+        self.peak: Dict[int, float] = {}
+        self.last: Dict[int, float] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def sample(self):
+        for pid in child_pids(self.master_pid):
+            rss = read_rss_mb(pid)
+            if rss is not None:
+                self.last[pid] = rss
+                self.peak[pid] = max(rss, self.peak.get(pid, 0.0))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self.sample()
+        self._thread.start()
+
+    def stop(self) -> Dict[str, Any]:
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+        return {
+            'master_mb': read_rss_mb(self.master_pid),
+            'workers': [{'pid': pid, 'rss_mb': self.last[pid], 'peak_rss_mb': self.peak[pid]}
+                        for pid in sorted(self.peak)],
+            'peak_worker_mb': max(self.peak.values()) if self.peak else None,
+            'total_mb': sum(self.last.values()) if self.last else None
+        }
+
+
+class Session:
+    """One simulated dashboard user issuing scenarios against a base URL."""
+
+    def __init__(self, base_url: str, days: List[str], n_detectors: int, rng: random.Random,
+                 timeout: float = 120.0):
+        self.base_url = base_url.rstrip('/')
+        self.days = days
+        self.n_detectors = n_detectors
+        self.rng = rng
+        self.timeout = timeout
+        # The dashboard fires its three filter requests with Promise.all
+        self.pool = ThreadPoolExecutor(max_workers=len(FILTER_ENDPOINTS))
+
+    def request(self, method: str, path: str, payload: Optional[dict] = None) -> Tuple[str, float, bool]:
+        """Return (endpoint, seconds, ok) of one HTTP request."""
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method.upper(),
+                                     headers={'Content-Type': 'application/json'} if data else {})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                response.read()
+                ok = response.status < 400
+        except (urllib.error.URLError, OSError):
+            ok = False
+        return f"{method.upper()} {path.split('?')[0]}", time.perf_counter() - start, ok
+
+    def filter_query(self) -> str:
+        """Random dashboard filters; a third of the calls are the unfiltered page load."""
+        rng = self.rng
+        if rng.random() < 1 / 3:
+            return ''
+        params = {}
+        if rng.random() < 0.5:
+            start = rng.randrange(len(self.days))
+            params['start_date'] = self.days[start]
+            params['end_date'] = self.days[rng.randrange(start, len(self.days))]
+        if rng.random() < 0.5:
+            params['detid'] = rng.randint(1, self.n_detectors)
+        if rng.random() < 0.5:
+            hour_start = rng.randrange(24)
+            params['hour_start'] = hour_start
+            params['hour_end'] = rng.randrange(hour_start, 24)
+        return '?' + '&'.join(f'{k}={v}' for k, v in params.items()) if params else ''
+
+    def filter(self) -> List[Tuple[str, float, bool]]:
+        query = self.filter_query()
+        futures = [self.pool.submit(self.request, 'get', path + query) for path in FILTER_ENDPOINTS]
+        return [future.result() for future in futures]
+
+    def predict(self) -> List[Tuple[str, float, bool]]:
+        payload = {'hour': self.rng.randrange(24), 'weekday': self.rng.randrange(7),
+                   'detid': self.rng.randint(1, self.n_detectors)}
+        return [self.request('post', '/api/predict', payload)]
+
+    def train(self) -> List[Tuple[str, float, bool]]:
+        return [self.request('post', '/api/train'), self.request('get', '/api/correlation')]
+
+    def close(self):
+        self.pool.shutdown()
+
+
+SCENARIOS = {'filter': Session.filter, 'predict': Session.predict, 'train': Session.train}
+
+
+def run_load(base_url: str, days: List[str], n_detectors: int, mix: Dict[str, float],
+             concurrency: int, duration: float, seed: int = 0) -> Dict[str, Any]:
+    """Drive `concurrency` sessions for `duration` seconds; return per-endpoint and per-scenario stats."""
+    names, weights = list(mix), list(mix.values())
+    lock = threading.Lock()
+    endpoints: Dict[str, List[float]] = {}
+    scenarios: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    def user(index: int):
+        rng = random.Random(seed * 1000 + index)
+        session = Session(base_url, days, n_detectors, rng)
+        try:
+            while time.perf_counter() < deadline:
+                scenario = rng.choices(names, weights)[0]
+                start = time.perf_counter()
+                results = SCENARIOS[scenario](session)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    scenarios.setdefault(scenario, []).append(elapsed)
+                    for endpoint, seconds, ok in results:
+                        if ok:
+                            endpoints.setdefault(endpoint, []).append(seconds)
+                        else:
+                            errors[endpoint] = errors.get(endpoint, 0) + 1
+        finally:
+            session.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_latencies = [seconds for values in endpoints.values() for seconds in values]
+    return {
+        'elapsed_s': elapsed,
+        'total': summarize(all_latencies, elapsed, sum(errors.values())),
+        'routes': {name: summarize(endpoints.get(name, []), elapsed, errors.get(name, 0))
+                   for name in sorted(set(endpoints) | set(errors))},
+        'scenarios': {name: summarize(values, elapsed) for name, values in sorted(scenarios.items())}
+    }
+
+
+def prepare_data(workdir: str, n_rows: int, n_detectors: int, days: List[str]) -> Dict[str, str]:
+    """Write synthetic data, detector metadata and a trained compact model; return the app env."""
+    sys.path.insert(0, SRC_DIR)
+    from data_loader import DataLoader
+    from feature_engineering import FeatureEngineer
+    from model import TrafficModel
+
+    csv_path = os.path.join(workdir, 'torino.csv')
+    raw = generate_torino_like(n_rows, n_detectors, len(days), start_day=days[0], missing_ratio=0.01)
+    raw.to_csv(csv_path, index=False)
+    generate_detectors(n_detectors).to_csv(os.path.join(workdir, 'detectors.csv'), index=False)
+
+    # Workers load the model at start, so predictions work before the first /api/train
+    processed = FeatureEngineer().engineer_features(DataLoader().handle_missing_values(raw))
+    model = TrafficModel()
+    model.train(processed[TrafficModel.feature_columns(processed)], processed['flow'])
+    model_path = os.path.join(workdir, 'model.trfm')
+    model.save_compact(model_path)
+
+    return {'TRAFFIC_DATA_PATH': csv_path, 'TRAFFIC_MODEL_PATH': model_path}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(base_url: str, timeout: float, process: subprocess.Popen = None):
+    """Poll /healthz until the dataset is loaded in a worker."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(base_url + '/healthz', timeout=5) as response:
+                status = json.loads(response.read())
+            if status.get('error'):
+                raise RuntimeError(f"Data load failed: {status['error']}")
+            if status.get('ready'):
+                return
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{base_url} not ready after {timeout:.0f}s")
+
+
+def start_gunicorn(config: Dict[str, Any], port: int, env: Dict[str, str]) -> subprocess.Popen:
+    """Start gunicorn serving app:app with the configuration; data is loaded before forking."""
+    command = [
+        sys.executable, '-m', 'gunicorn', 'app:app',
+        '--bind', f'127.0.0.1:{port}',
+        '--worker-class', config['worker_class'],
+        '--workers', str(config['workers']),
+        '--timeout', '300',
+        # Load once in the master; forked workers share the dataset pages until written
+        '--preload'
+    ]
+    if config['worker_class'] == 'gthread':
+        command += ['--threads', str(config['threads'])]
+    return subprocess.Popen(
+        command, cwd=SRC_DIR,
+        env={**os.environ, **env, 'TRAFFIC_LOAD_MODE': 'eager'},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='100k', help="Synthetic CSV rows (the app samples 20%% at load)")
+    parser.add_argument('--detectors', type=int, default=200)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--start-day', default='2016-09-26', help="First day of the (synthetic) data")
+    parser.add_argument('--configs', default='sync:4,gthread:2x8',
+                        help="Comma-separated gunicorn configurations: sync:WORKERS or gthread:WORKERSxTHREADS")
+    parser.add_argument('--url', help="Load-test an already running server instead of starting gunicorn")
+    parser.add_argument('--concurrency', type=int, default=8, help="Simulated dashboard sessions")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds of load per configuration")
+    parser.add_argument('--warmup', type=float, default=5.0, help="Seconds of unrecorded load first")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Scenario weights, e.g. " + DEFAULT_MIX)
+    parser.add_argument('--ready-timeout', type=float, default=600.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='load_results.json')
+    parser.add_argument('--baseline', help="Compare against a stored results file")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Allowed p50 slowdown ratio vs baseline")
+    args = parser.parse_args(argv)
+
+    # Read the baseline up front; writing the output over it would compare the run with itself
+    baseline = None
+    if args.baseline:
+        if os.path.abspath(args.baseline) == os.path.abspath(args.output):
+            parser.error("--output must differ from --baseline")
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    mix = parse_mix(args.mix)
+    configs = [{'name': 'external'}] if args.url else [parse_config(c) for c in args.configs.split(',')]
+    n_rows = parse_size(args.rows)
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'rows': n_rows,
+            'detectors': args.detectors,
+            'days': args.days,
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'mix': mix
+        },
+        'runs': {}
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Days of the synthetic data, used for random date filters against --url too
+        days = list(pd.date_range(args.start_day, periods=args.days, freq='D').strftime('%Y-%m-%d'))
+        env = {}
+        if not args.url:
+            print(f"Preparing {n_rows} synthetic rows and a model...")
+            env = prepare_data(workdir, n_rows, args.detectors, days)
+
+        for config in configs:
+            process = sampler = None
+            base_url = args.url
+            try:
+                if not args.url:
+                    port = free_port()
+                    base_url = f'http://127.0.0.1:{port}'
+                    process = start_gunicorn(config, port, env)
+                wait_ready(base_url, args.ready_timeout, process)
+                if args.warmup > 0:
+                    run_load(base_url, days, args.detectors, mix, args.concurrency, args.warmup, args.seed + 1)
+                if process is not None:
+                    sampler = MemorySampler(process.pid)
+                    sampler.start()
+                print(f"Load testing {config['name']} for {args.duration:.0f}s...")
+                run = run_load(base_url, days, args.detectors, mix, args.concurrency, args.duration, args.seed)
+                run['config'] = config
+                run['stages'] = {}
+                run['memory'] = sampler.stop() if sampler is not None else None
+            finally:
+                if process is not None:
+                    stop(process)
+            results['runs'][config['name']] = run
+
+            total = run['total']
+            print(f"  {'total':<28} {total['throughput_rps']:8.1f} req/s  "
+                  f"errors {total['errors']}")
+            for name, stats in run['routes'].items():
+                if stats['requests']:
+                    print(f"  {name:<28} p50 {stats['median_s'] * 1000:8.1f} ms  p95 {stats['p95_s'] * 1000:8.1f} ms  "
+                          f"p99 {stats['p99_s'] * 1000:8.1f} ms  {stats['requests']:6d} req")
+            if run['memory']:
+                for worker in run['memory']['workers']:
+                    print(f"  worker {worker['pid']:<21} rss {worker['rss_mb']:8.1f} MB  peak {worker['peak_rss_mb']:8.1f} MB")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION [{r['size']}] {r['name']}: {r['baseline_s'] * 1000:.2f} ms -> "
+                  f"{r['current_s'] * 1000:.2f} ms ({r['ratio']:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions above {args.threshold:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
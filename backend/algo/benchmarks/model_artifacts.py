@@ -0,0 +1,97 @@
+"""Compare joblib and compact model artifacts: size, load time, prediction time and drift.
+
+Usage (from backend/algo):
+    python -m benchmarks.model_artifacts --rows 200k --output artifact_report.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+ALGO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ALGO_DIR, 'src'))
+
+import numpy as np
+
+from benchmarks.synthetic import generate_torino_like, parse_size
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def artifact_report(model, X, workdir: str) -> Dict[str, Any]:
+    """Save a trained TrafficModel both ways and compare the two artifacts on inputs X."""
+    from model import TrafficModel
+
+    joblib_path = os.path.join(workdir, 'model.joblib')
+    compact_path = os.path.join(workdir, 'model.trfm')
+    model.save_model(joblib_path)
+    model.save_compact(compact_path)
+
+    original, compact = TrafficModel(), TrafficModel()
+    _, joblib_load_s = timed(lambda: original.load_model(joblib_path))
+    _, compact_load_s = timed(lambda: compact.load_compact(compact_path))
+
+    X_array = np.asarray(X)
+    expected, joblib_predict_s = timed(
+        lambda: np.array([tree.predict(X_array) for tree in original.model.estimators_])
+    )
+    actual, compact_predict_s = timed(lambda: compact.model.tree_predictions(X_array))
+    drift = np.abs(actual.mean(axis=0) - expected.mean(axis=0))
+
+    return {
+        'trees': compact.model.n_trees,
+        'nodes': compact.model.n_nodes,
+        'rows': len(X_array),
+        'joblib_bytes': os.path.getsize(joblib_path),
+        'compact_bytes': os.path.getsize(compact_path),
+        'size_ratio': os.path.getsize(compact_path) / os.path.getsize(joblib_path),
+        'joblib_load_s': joblib_load_s,
+        'compact_load_s': compact_load_s,
+        'joblib_predict_s': joblib_predict_s,
+        'compact_predict_s': compact_predict_s,
+        'max_abs_drift': float(drift.max()),
+        'mean_abs_drift': float(drift.mean()),
+        'max_tree_abs_drift': float(np.abs(actual - expected).max())
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='100k', help="Synthetic rows used for training")
+    parser.add_argument('--detectors', type=int, default=200)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--predict-rows', type=int, default=10000)
+    parser.add_argument('--output', default='artifact_report.json')
+    args = parser.parse_args(argv)
+
+    from feature_engineering import FeatureEngineer
+    from model import TrafficModel
+
+    df = FeatureEngineer().engineer_features(
+        generate_torino_like(parse_size(args.rows), args.detectors, args.days)
+    )
+    X = df[TrafficModel.feature_columns(df)]
+    model = TrafficModel()
+    print(f"Training on {len(df)} rows...")
+    model.train(X, df['flow'])
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report = artifact_report(model, X.iloc[:args.predict_rows], workdir)
+
+    for key, value in report.items():
+        print(f"  {key:<20} {value}")
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""Benchmark suite for the load, feature, train and predict pipeline.
+
+Usage (from backend/algo):
+    python -m benchmarks.run_benchmarks --rows 10k,100k --output results.json
+    python -m benchmarks.run_benchmarks --rows 100k --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Tuple
+
+ALGO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ALGO_DIR, 'src'))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_torino_like, generate_detectors, parse_size
+
+ROUTES = [
+    ('GET /api/statistics', 'get', '/api/statistics', None),
+    ('GET /api/data', 'get', '/api/data', None),
+    ('GET /api/analysis', 'get', '/api/analysis', None),
+    ('GET /api/analysis approx', 'get', '/api/analysis?approx=1', None),
+    ('GET /api/analysis filtered', 'get', '/api/analysis?detid=1&hour_start=7&hour_end=19', None),
+    ('POST /api/predict', 'post', '/api/predict', {'hour': 8, 'weekday': 0, 'detid': 1}),
+    ('GET /api/correlation', 'get', '/api/correlation', None),
+    ('GET /api/detectors', 'get', '/api/detectors?bbox=7.65,45.05,7.70,45.09', None),
+    ('GET /api/detectors/nearest', 'get', '/api/detectors/nearest?lat=45.07&lon=7.68&k=5', None),
+    ('GET /api/detectors/top', 'get', '/api/detectors/top?k=10&weekday=0&hour=8', None),
+    ('GET /api/heatmap', 'get', '/api/heatmap?metric=traffic_index', None),
+    ('GET /api/quality', 'get', '/api/quality', None),
+    ('GET /api/routes/traveltime', 'get', '/api/routes/bench/traveltime', None),
+    ('GET /api/routes/traveltime profile', 'get', '/api/routes/bench/traveltime?mode=profile', None),
+]
+
+
+def measure(fn: Callable, repeat: int = 3, memory: bool = True) -> Tuple[Any, Dict[str, Any]]:
+    """Time `fn` over `repeat` runs, then trace one extra run for peak Python heap usage."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    stats = {
+        'median_s': statistics.median(timings),
+        'min_s': min(timings),
+        'runs': repeat
+    }
+    if memory:
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats['peak_mb'] = peak / 2 ** 20
+    return result, stats
+
+
+def run_pipeline(n_rows: int, n_detectors: int, n_days: int, repeat: int,
+                 memory: bool, workdir: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Benchmark each pipeline stage on synthetic data; return stage stats and built state."""
+    from data_loader import DataLoader
+    from feature_engineering import FeatureEngineer
+    from model import TrafficModel
+    from spatial_index import DetectorIndex
+
+    csv_path = os.path.join(workdir, f'torino_{n_rows}.csv')
+    generate_torino_like(n_rows, n_detectors, n_days, missing_ratio=0.01).to_csv(csv_path, index=False)
+    detector_index = DetectorIndex(generate_detectors(n_detectors))
+
+    loader = DataLoader()
+    engineer = FeatureEngineer()
+    stages = {}
+
+    df_raw, stages['load_csv'] = measure(lambda: loader.load_csv(csv_path), repeat, memory)
+    df_raw, stages['handle_missing_values'] = measure(lambda: loader.handle_missing_values(df_raw), repeat, memory)
+    df_processed, stages['engineer_features'] = measure(
+        lambda: engineer.engineer_features(df_raw, detector_index), repeat, memory
+    )
+
+    columns = TrafficModel.feature_columns(df_processed)
+    X, y = df_processed[columns], df_processed['flow']
+    model = TrafficModel()
+    _, stages['train'] = measure(lambda: model.train(X, y), 1, memory)
+    batch = X.iloc[:10000]
+    _, stages['predict_batch_10k'] = measure(lambda: model.predict(batch), repeat, memory)
+
+    state = {
+        'df_raw': df_raw,
+        'df_processed': df_processed,
+        'traffic_model': model,
+        'detector_index': detector_index
+    }
+    return stages, state
+
+
+def run_routes(state: Dict[str, Any], repeat: int, memory: bool) -> Dict[str, Any]:
+    """Benchmark each API route through the Flask test client against prepared state."""
+    # Keep the app from loading torino.csv; the synthetic state is installed instead
+    os.environ.setdefault('TRAFFIC_LOAD_MODE', 'lazy')
+    import app as app_module
+
+    app_module.use_data(state['df_raw'], state['df_processed'], state['detector_index'], model=state['traffic_model'])
+    app_module.route_registry.register('bench', [1, 2, 3, 4, 5], [500, 350, 800, 420, 610])
+    app_module.app.config['TESTING'] = True
+    client = app_module.app.test_client()
+
+    routes = {}
+    for name, method, path, payload in ROUTES:
+        def call():
+            response = getattr(client, method)(path, json=payload) if payload else getattr(client, method)(path)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{name} returned {response.status_code}: {response.get_data(as_text=True)}")
+            return response
+        _, routes[name] = measure(call, repeat, memory)
+    return routes
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Return entries whose median time exceeds the baseline by more than `threshold` x."""
+    regressions = []
+    for size, run in results['runs'].items():
+        base_run = baseline.get('runs', {}).get(size)
+        if base_run is None:
+            continue
+        for group in ['stages', 'routes']:
+            for name, stats in run[group].items():
+                base = base_run.get(group, {}).get(name)
+                if base is None or base['median_s'] <= 0:
+                    continue
+                ratio = stats['median_s'] / base['median_s']
+                if ratio > threshold:
+                    regressions.append({
+                        'size': size,
+                        'name': name,
+                        'baseline_s': base['median_s'],
+                        'current_s': stats['median_s'],
+                        'ratio': ratio
+                    })
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='10k', help="Comma-separated row counts, e.g. 10k,100k,1m,10m")
+    parser.add_argument('--detectors', type=int, default=200)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced peak-memory run")
+    parser.add_argument('--skip-routes', action='store_true')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help="Compare against a stored results file")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Allowed slowdown ratio vs baseline")
+    args = parser.parse_args(argv)
+
+    # Read the baseline up front; writing the output over it would compare the run with itself
+    baseline = None
+    if args.baseline:
+        if os.path.abspath(args.baseline) == os.path.abspath(args.output):
+            parser.error("--output must differ from --baseline")
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'detectors': args.detectors,
+            'days': args.days,
+            'repeat': args.repeat
+        },
+        'runs': {}
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.rows.split(','):
+            n_rows = parse_size(size)
+            print(f"Benchmarking {n_rows} rows...")
+            stages, state = run_pipeline(n_rows, args.detectors, args.days, args.repeat,
+                                         not args.no_memory, workdir)
+            run = {'stages': stages, 'routes': {}}
+            if not args.skip_routes:
+                run['routes'] = run_routes(state, args.repeat, not args.no_memory)
+            results['runs'][str(n_rows)] = run
+            for group in ['stages', 'routes']:
+                for name, stats in run[group].items():
+                    peak = f"{stats['peak_mb']:9.1f} MB" if 'peak_mb' in stats else ''
+                    print(f"  {name:<32} {stats['median_s'] * 1000:10.2f} ms {peak}")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION [{r['size']}] {r['name']}: {r['baseline_s'] * 1000:.2f} ms -> "
+                  f"{r['current_s'] * 1000:.2f} ms ({r['ratio']:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions above {args.threshold:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
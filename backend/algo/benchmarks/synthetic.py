@@ -0,0 +1,75 @@
+"""Synthetic torino-like dataset generator for benchmarks."""
+import pandas as pd
+import numpy as np
+from typing import Optional
+
+
+def parse_size(value: str) -> int:
+    """Parse a row count such as '10k', '1m' or '2500000'."""
+    value = value.strip().lower()
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    if value[-1] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+
+def generate_torino_like(n_rows: int, n_detectors: int = 200, n_days: int = 7,
+                         start_day: str = '2016-09-26', missing_ratio: float = 0.0,
+                         seed: int = 42) -> pd.DataFrame:
+    """Generate UTD19-style records (day, interval, detid, flow, occ, error, city, speed).
+
+    Rows are spread over `n_detectors` x `n_days` series with an evenly spaced interval
+    grid, so the output is sorted by (day, detid, interval) like the source export.
+    """
+    rng = np.random.RandomState(seed)
+    n_series = n_detectors * n_days
+    per_series = max(1, -(-n_rows // n_series))
+    step = max(1, 86400 // per_series)
+    per_series = min(per_series, 86400 // step)
+
+    day_idx = np.repeat(np.arange(n_days), n_detectors * per_series)[:n_rows]
+    det_idx = np.tile(np.repeat(np.arange(n_detectors), per_series), n_days)[:n_rows]
+    slot = np.tile(np.arange(per_series), n_series)[:n_rows]
+    n = len(slot)
+
+    days = pd.date_range(start_day, periods=n_days, freq='D')
+    interval = slot * step
+    hour = interval / 3600.0
+    weekend = days.weekday.to_numpy()[day_idx] >= 5
+
+    # Double-peaked daily profile, damped on weekends, scaled per detector
+    profile = np.exp(-((hour - 8) ** 2) / 4) + np.exp(-((hour - 18) ** 2) / 5) + 0.2
+    profile = np.where(weekend, 0.6 * profile, profile)
+    scale = rng.uniform(100, 400, n_detectors)[det_idx]
+    flow = np.maximum(scale * profile + rng.normal(0, 15, n), 0)
+    occ = np.clip(flow / 12 + rng.normal(0, 2, n), 0, 100)
+    speed = np.clip(90 - 0.6 * occ + rng.normal(0, 5, n), 0, 130)
+
+    df = pd.DataFrame({
+        'day': days.strftime('%Y-%m-%d').to_numpy()[day_idx],
+        'interval': interval,
+        'detid': det_idx + 1,
+        'flow': flow.round(1),
+        'occ': occ.round(3),
+        'error': np.zeros(n, dtype=int),
+        'city': 'torino',
+        'speed': speed.round(2)
+    })
+
+    if missing_ratio > 0:
+        for col in ['flow', 'occ', 'speed']:
+            mask = rng.uniform(size=n) < missing_ratio
+            df.loc[mask, col] = np.nan
+    return df
+
+
+def generate_detectors(n_detectors: int = 200, seed: int = 42,
+                       center: Optional[tuple] = (45.07, 7.68)) -> pd.DataFrame:
+    """Generate detector metadata (detid, lat, lon, bearing) scattered around Turin."""
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({
+        'detid': np.arange(1, n_detectors + 1),
+        'lat': center[0] + rng.uniform(-0.05, 0.05, n_detectors),
+        'lon': center[1] + rng.uniform(-0.07, 0.07, n_detectors),
+        'bearing': rng.choice([0.0, 90.0, 180.0, 270.0], n_detectors)
+    })
@@ -0,0 +1,304 @@
+"""Offline batch scoring of the Traffic ML model over a full history.
+
+Streams the input in chunks, builds features with FeatureEngineer, predicts in
+large batches across a process pool and writes one columnar part file per
+chunk (parquet when pyarrow is installed, npz otherwise). A checkpoint records
+finished chunks, so an interrupted run resumes where it stopped.
+
+Usage (from backend/algo):
+    python score.py --input torino.csv --model model.trfm --output scores/
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DataLoader
+from feature_engineering import FeatureEngineer
+from model import TrafficModel
+from spatial_index import DetectorIndex
+
+CHECKPOINT_NAME = '_checkpoint.json'
+AGGREGATES_NAME = '_aggregates.pkl'
+DEFAULT_CHUNKSIZE = 200000
+OUTPUT_COLUMNS = ['day', 'interval', 'detid', 'flow', 'prediction',
+                  'confidence_low', 'confidence_high', 'residual']
+
+_worker_model: Optional[TrafficModel] = None
+
+
+def default_format() -> str:
+    try:
+        import pyarrow  # noqa: F401
+        return 'parquet'
+    except ImportError:
+        return 'npz'
+
+
+def load_model(path: str) -> TrafficModel:
+    """Load a compact (.trfm) or joblib model artifact."""
+    model = TrafficModel()
+    if path.endswith('.trfm'):
+        model.load_compact(path)
+    else:
+        model.load_model(path)
+    return model
+
+
+def _init_worker(model_path: str):
+    global _worker_model
+    # Compact artifacts are memory-mapped, so workers share the node arrays
+    _worker_model = load_model(model_path)
+
+
+def _predict_batch(X: np.ndarray) -> Dict[str, np.ndarray]:
+    result = _worker_model.predict(pd.DataFrame(X, columns=_worker_model.feature_names))
+    return {name: np.asarray(values) for name, values in result.items()}
+
+
+def iter_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yield the input in chunks of at most `chunksize` rows, in a deterministic order."""
+    loader = DataLoader()
+    if os.path.isdir(path):
+        manifest = loader.read_manifest(path)
+        for key in sorted(manifest['partitions']):
+            part = loader._read_partition(path, manifest['partitions'][key]['file'])
+            for start in range(0, len(part), chunksize):
+                yield part.iloc[start:start + chunksize].reset_index(drop=True)
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            if not loader.validate_data(chunk):
+                raise ValueError("Invalid data structure: missing required columns")
+            yield chunk.reset_index(drop=True)
+
+
+def fingerprint(*paths: str) -> str:
+    """Identify input and model files by path, size and modification time."""
+    digest = hashlib.sha1()
+    for path in paths:
+        if os.path.isdir(path):
+            path = os.path.join(path, DataLoader.MANIFEST_NAME)
+        stat = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def part_path(output_dir: str, chunk_id: int, file_format: str) -> str:
+    return os.path.join(output_dir, f"part-{chunk_id:05d}.{file_format}")
+
+
+def write_part(df: pd.DataFrame, path: str, file_format: str):
+    """Write one part file atomically."""
+    tmp = path + '.tmp'
+    if file_format == 'parquet':
+        df.to_parquet(tmp, index=False)
+    else:
+        with open(tmp, 'wb') as f:
+            # Fixed-width strings instead of object arrays keep the file pickle-free
+            np.savez(f, **{col: df[col].to_numpy(dtype=str if df[col].dtype == object else None)
+                           for col in df.columns})
+    os.replace(tmp, path)
+
+
+def read_part(path: str) -> pd.DataFrame:
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    with np.load(path, allow_pickle=False) as data:
+        return pd.DataFrame({name: data[name] for name in data.files})
+
+
+def read_scores(output_dir: str) -> pd.DataFrame:
+    """Read all part files of a scoring run, in input order."""
+    parts = sorted(name for name in os.listdir(output_dir)
+                   if name.startswith('part-') and not name.endswith('.tmp'))
+    if not parts:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+    return pd.concat([read_part(os.path.join(output_dir, name)) for name in parts], ignore_index=True)
+
+
+class BatchScorer:
+    """Two-pass chunked scorer with a resumable checkpoint.
+
+    Pass 1 accumulates per (detid, hour) sums over all chunks, so detector and
+    hourly aggregates match those of the whole dataset. Pass 2 imputes, builds
+    features and predicts chunk by chunk; at most `jobs` chunks are in flight,
+    which bounds peak memory to a few chunks regardless of the input size.
+    """
+
+    def __init__(self, input_path: str, model_path: str, output_dir: str,
+                 chunksize: int = DEFAULT_CHUNKSIZE, jobs: int = 1,
+                 detectors_path: Optional[str] = None, file_format: Optional[str] = None):
+        self.input_path = input_path
+        self.model_path = model_path
+        self.output_dir = output_dir
+        self.chunksize = chunksize
+        self.jobs = max(1, jobs)
+        self.file_format = file_format or default_format()
+        self.feature_engineer = FeatureEngineer()
+        self.detector_index = None
+        if detectors_path:
+            self.detector_index = DetectorIndex(DataLoader().load_detectors(detectors_path))
+        self.checkpoint_path = os.path.join(output_dir, CHECKPOINT_NAME)
+        self.checkpoint: Dict[str, Any] = {}
+
+    # Checkpoint
+    def _new_checkpoint(self) -> Dict[str, Any]:
+        return {
+            'fingerprint': fingerprint(self.input_path, self.model_path),
+            'chunksize': self.chunksize,
+            'format': self.file_format,
+            'aggregates_done': False,
+            'completed': [],
+            'rows': 0
+        }
+
+    def _load_checkpoint(self, resume: bool):
+        os.makedirs(self.output_dir, exist_ok=True)
+        fresh = self._new_checkpoint()
+        if resume and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            for key in ['fingerprint', 'chunksize', 'format']:
+                if checkpoint.get(key) != fresh[key]:
+                    raise ValueError(
+                        f"Checkpoint in {self.output_dir} was written with a different {key}; "
+                        "rerun with --no-resume to start over"
+                    )
+            self.checkpoint = checkpoint
+            return
+        for name in os.listdir(self.output_dir):
+            if name.startswith('part-') or name in (CHECKPOINT_NAME, AGGREGATES_NAME):
+                os.remove(os.path.join(self.output_dir, name))
+        self.checkpoint = fresh
+        self._save_checkpoint()
+
+    def _save_checkpoint(self):
+        with open(self.checkpoint_path + '.tmp', 'w') as f:
+            json.dump(self.checkpoint, f, indent=2)
+        os.replace(self.checkpoint_path + '.tmp', self.checkpoint_path)
+
+    # Passes
+    def build_aggregates(self) -> Dict[str, Any]:
+        """Pass 1: dataset-wide aggregates, cached in the output directory."""
+        path = os.path.join(self.output_dir, AGGREGATES_NAME)
+        if self.checkpoint['aggregates_done'] and os.path.exists(path):
+            sums = pd.read_pickle(path)
+        else:
+            sums = None
+            for chunk in iter_chunks(self.input_path, self.chunksize):
+                partial = self.feature_engineer.aggregate_sums(chunk)
+                sums = partial if sums is None else sums.add(partial, fill_value=0)
+            sums.to_pickle(path + '.tmp')
+            os.replace(path + '.tmp', path)
+            self.checkpoint['aggregates_done'] = True
+            self._save_checkpoint()
+        return self.feature_engineer.aggregates_from_sums(sums)
+
+    def prepare(self, chunk: pd.DataFrame, aggregates: Dict[str, Any],
+                feature_names: list) -> Tuple[pd.DataFrame, np.ndarray]:
+        """Impute one chunk with the dataset means and return its keys and feature matrix."""
+        observed = chunk['flow'].replace([np.inf, -np.inf], np.nan)
+        df = chunk.copy()
+        for col in ['flow', 'occ', 'speed']:
+            mean = aggregates['overall'][col]
+            df[col] = df[col].replace([np.inf, -np.inf], np.nan).fillna(0 if pd.isna(mean) else mean)
+        df[['day', 'interval', 'detid']] = df[['day', 'interval', 'detid']].ffill().bfill()
+        features = self.feature_engineer.engineer_features(df, self.detector_index, aggregates=aggregates)
+        missing = [col for col in feature_names if col not in features.columns]
+        if missing:
+            raise ValueError(f"Input lacks model features {missing}; pass --detectors for spatial features")
+        keys = pd.DataFrame({
+            'day': features['day'].astype(str).to_numpy(),
+            'interval': features['interval'].to_numpy(),
+            'detid': features['detid'].to_numpy(),
+            'flow': observed.to_numpy(dtype=np.float64)
+        })
+        return keys, features[feature_names].to_numpy(dtype=np.float64)
+
+    def _finish(self, chunk_id: int, keys: pd.DataFrame, result: Dict[str, np.ndarray]):
+        for name in ['prediction', 'confidence_low', 'confidence_high']:
+            keys[name] = result[name]
+        keys['residual'] = keys['flow'] - keys['prediction']
+        write_part(keys, part_path(self.output_dir, chunk_id, self.file_format), self.file_format)
+        self.checkpoint['completed'].append(chunk_id)
+        self.checkpoint['rows'] += len(keys)
+        self._save_checkpoint()
+
+    def run(self, resume: bool = True) -> Dict[str, Any]:
+        """Score the whole input; return a summary of the run."""
+        start = time.perf_counter()
+        self._load_checkpoint(resume)
+        aggregates = self.build_aggregates()
+        model = load_model(self.model_path)
+        feature_names = model.feature_names
+        done = set(self.checkpoint['completed'])
+        scored = 0
+
+        pool = None
+        if self.jobs > 1:
+            pool = ProcessPoolExecutor(self.jobs, initializer=_init_worker, initargs=(self.model_path,))
+        pending = deque()
+        try:
+            for chunk_id, chunk in enumerate(iter_chunks(self.input_path, self.chunksize)):
+                if chunk_id in done:
+                    continue
+                keys, X = self.prepare(chunk, aggregates, feature_names)
+                scored += len(keys)
+                if pool is None:
+                    result = model.predict(pd.DataFrame(X, columns=feature_names))
+                    self._finish(chunk_id, keys, {k: np.asarray(v) for k, v in result.items()})
+                    continue
+                pending.append((chunk_id, keys, pool.submit(_predict_batch, X)))
+                while len(pending) >= self.jobs:
+                    chunk_id, keys, future = pending.popleft()
+                    self._finish(chunk_id, keys, future.result())
+            while pending:
+                chunk_id, keys, future = pending.popleft()
+                self._finish(chunk_id, keys, future.result())
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        return {
+            'output': self.output_dir,
+            'format': self.file_format,
+            'chunks': len(self.checkpoint['completed']),
+            'rows': self.checkpoint['rows'],
+            'scored_rows': scored,
+            'resumed_chunks': len(done),
+            'seconds': time.perf_counter() - start
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-score traffic records with a trained model")
+    parser.add_argument('--input', required=True, help="CSV file or partitioned dataset directory")
+    parser.add_argument('--model', required=True, help="Model artifact (.trfm compact or joblib)")
+    parser.add_argument('--output', required=True, help="Output directory for part files")
+    parser.add_argument('--detectors', help="Detector metadata CSV (needed for spatial features)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--jobs', type=int, default=1, help="Prediction worker processes")
+    parser.add_argument('--format', choices=['parquet', 'npz'], default=None)
+    parser.add_argument('--no-resume', action='store_true', help="Discard any previous checkpoint")
+    args = parser.parse_args(argv)
+
+    scorer = BatchScorer(args.input, args.model, args.output, args.chunksize, args.jobs,
+                         args.detectors, args.format)
+    summary = scorer.run(resume=not args.no_resume)
+    print(json.dumps(summary, indent=2))
+    return summary
+
+
+if __name__ == '__main__':
+    main()
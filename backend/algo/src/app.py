@@ -6,46 +6,486 @@ import numpy as np
 from data_loader import DataLoader
 from feature_engineering import FeatureEngineer
 from model import TrafficModel
+from spatial_index import DetectorIndex
+from forecasting import TrafficForecaster
+from congestion import CongestionCube, WEEKDAY_NAMES
+from prediction_cache import PredictionCache
+from drift import DriftMonitor
+from sampling import StratifiedSample
+from index_profiles import IndexProfiles
+from quality import QualityReport
+from snapshot import Snapshot, SnapshotStore
+from routes import (RouteRegistry, historical_travel_times, profile_travel_times,
+                    bpr_parameters, predicted_travel_times)
+from feature_engineering import category_codes, CATEGORY_LABELS
+from instrumentation import Instrumentation
+from readiness import BackgroundLoader
+from functools import wraps
+import json
 import os
+import uuid
 
 app = Flask(__name__, 
             template_folder='../static/dist',
             static_folder='../static')
 CORS(app)
+instrumentation = Instrumentation(profiling_enabled=os.environ.get('TRAFFIC_PROFILING') == '1')
+instrumentation.init_app(app)
+instrumentation.registry.describe('traffic_feature_psi', 'Population stability index of the last drift batch by feature.')
 
 # Global variables
 data_loader = DataLoader()
 feature_engineer = FeatureEngineer()
 traffic_model = TrafficModel()
+traffic_forecaster = TrafficForecaster()
+# Serving state: request handlers take store.current() once and read only that
+# snapshot; loads, training and profile switches publish a new one
+store = SnapshotStore(Snapshot(traffic_model=traffic_model, traffic_forecaster=traffic_forecaster))
+# Read-only aliases of the current snapshot's fields for scripts and notebooks,
+# refreshed by publish()
+SNAPSHOT_ALIASES = (
+    'df_raw', 'df_processed', 'detector_index', 'day_offsets', 'congestion_cube', 'prediction_lookup',
+    'approx_sample', 'approx_offsets', 'quality_report', 'dataset_version', 'traffic_model', 'traffic_forecaster',
+    'drift_monitor', 'flow_series'
+)
 df_processed = None
 df_raw = None
+detector_index = None
+day_offsets = None
+congestion_cube = None
+prediction_lookup = None
+# Per-detector health of the raw data, scanned before missing values are imputed
+quality_report = None
+flow_series = None
+prediction_cache = PredictionCache()
+# Fill the prediction cache for the whole (detid, hour, weekday) grid after training (opt-in:
+# it runs before /api/train responds)
+PRECOMPUTE_PREDICTIONS = os.environ.get('TRAFFIC_PRECOMPUTE_PREDICTIONS') == '1'
+DEFAULT_PREDICT_MONTH = 10
+drift_monitor = None
+# ?approx=1 answers from a detid x weekday x hour stratified sample unless the
+# filtered slice is estimated below APPROX_EXACT_ROWS rows
+approx_sample = None
+approx_offsets = None
+APPROX_PER_STRATUM = int(os.environ.get('TRAFFIC_APPROX_PER_STRATUM', 10))
+APPROX_EXACT_ROWS = int(os.environ.get('TRAFFIC_APPROX_EXACT_ROWS', 100000))
+# Traffic-index profiles per detector group; TRAFFIC_INDEX_PROFILES may name a
+# JSON file with the initial {"profiles", "groups", "default"} configuration
+index_profiles = IndexProfiles()
+if os.environ.get('TRAFFIC_INDEX_PROFILES'):
+    with open(os.environ['TRAFFIC_INDEX_PROFILES']) as f:
+        index_profiles.configure(**json.load(f))
 
-# Load data on startup
-DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'torino.csv')
+dataset_version = None
+route_registry = RouteRegistry()
+route_cache = PredictionCache(max_entries=256)
+
+# Load data on startup; TRAFFIC_DATA_PATH may point to a CSV file or to a
+# partitioned dataset directory (see DataLoader.write_partitions)
+DATA_PATH = os.environ.get(
+    'TRAFFIC_DATA_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'torino.csv')
+)
+# Optional detector metadata (detid, lat, lon, bearing) next to the dataset
+DETECTORS_PATH = os.path.join(
+    DATA_PATH if os.path.isdir(DATA_PATH) else os.path.dirname(DATA_PATH), 'detectors.csv'
+)
+# Optional route definitions ({"id": {"detids": [...], "lengths_m": [...]}}) next to the dataset
+ROUTES_PATH = os.environ.get('TRAFFIC_ROUTES_PATH', os.path.join(
+    DATA_PATH if os.path.isdir(DATA_PATH) else os.path.dirname(DATA_PATH), 'routes.json'
+))
+if os.path.exists(ROUTES_PATH):
+    route_registry.load(ROUTES_PATH)
+# Optional pre-trained model: a compact artifact (*.trfm, memory-mapped) or a joblib file
+MODEL_PATH = os.environ.get('TRAFFIC_MODEL_PATH')
+# Worker processes for feature engineering (1 = serial, 0 = all cores)
+FEATURE_JOBS = int(os.environ.get('TRAFFIC_FEATURE_JOBS', 1))
+
+def publish(**changes) -> Snapshot:
+    """Publish a new snapshot and refresh the module-level aliases."""
+    with store.write_lock:
+        snapshot = store.publish(**changes)
+        globals().update({name: getattr(snapshot, name) for name in SNAPSHOT_ALIASES})
+    return snapshot
+
+def publish_data(**fields) -> Snapshot:
+    """Publish a new dataset under a new dataset version, with the current index profiles applied."""
+    with store.write_lock:
+        index_profiles.bind(fields['df_processed'])
+        if index_profiles.is_default:
+            fields['index_config'] = index_profiles.resolved()
+        else:
+            fields.update(index_profile_fields(
+                fields['df_processed'], fields['congestion_cube'], fields['approx_sample']
+            )[0])
+        snapshot = publish(dataset_version=uuid.uuid4().hex, **fields)
+    # Cached predictions are keyed by dataset version; dropping them only frees memory
+    prediction_cache.invalidate()
+    return snapshot
+
+def model_fields(model: TrafficModel) -> dict:
+    """Snapshot fields serving a model: the model and a drift monitor against its training profile."""
+    return {
+        'traffic_model': model,
+        'drift_monitor': DriftMonitor(model.feature_profile) if model.feature_profile else None
+    }
+
+def use_model(model: TrafficModel) -> Snapshot:
+    """Serve an already-trained or loaded model (tests, benchmarks)."""
+    return publish(**model_fields(model))
 
 def load_data():
     """Load and process data on startup."""
-    global df_raw, df_processed
     try:
+        changes = {}
+        if MODEL_PATH:
+            with instrumentation.stage('load_model'):
+                model = TrafficModel()
+                if MODEL_PATH.endswith('.trfm'):
+                    model.load_compact(MODEL_PATH)
+                else:
+                    model.load_model(MODEL_PATH)
+                changes = model_fields(model)
+            print(f"Loaded model from {MODEL_PATH}")
+        
+        detector_index = None
+        if os.path.exists(DETECTORS_PATH):
+            with instrumentation.stage('load_detectors'):
+                detector_index = DetectorIndex(data_loader.load_detectors(DETECTORS_PATH))
+            print(f"Indexed {len(detector_index)} detectors")
+        
         print("Loading data from:", DATA_PATH)
-        df_raw = data_loader.load_csv(DATA_PATH)
+        with instrumentation.stage('read_data'):
+            if os.path.isdir(DATA_PATH):
+                # Only partitions overlapping the configured window are read
+                df_raw = data_loader.load_partitioned(
+                    DATA_PATH,
+                    start_date=os.environ.get('TRAFFIC_START_DATE'),
+                    end_date=os.environ.get('TRAFFIC_END_DATE')
+                )
+            else:
+                df_raw = data_loader.load_csv(DATA_PATH)
+        
+        # Scanned before sampling: coverage, gaps and the interval step need every row
+        with instrumentation.stage('quality_scan'):
+            quality_report = QualityReport(df_raw)
+        # Lag features need consecutive intervals, so the forecaster keeps every row too
+        with instrumentation.stage('flow_series'):
+            flow_series = TrafficForecaster.build_series(
+                data_loader.handle_missing_values(df_raw[TrafficForecaster.SERIES_COLUMNS])
+            )
         
         # Sample data for faster development (use 20% of data)
-        # Comment out the next 2 lines to use full dataset
-        sample_size = int(len(df_raw) * 0.2)
-        df_raw = df_raw.sample(n=sample_size, random_state=42).reset_index(drop=True)
+        # Comment out the next 3 lines to use full dataset
+        with instrumentation.stage('sample'):
+            sample_size = int(len(df_raw) * 0.2)
+            df_raw = df_raw.sample(n=sample_size, random_state=42).reset_index(drop=True)
         print(f"Sampled {len(df_raw)} records for faster loading")
         
-        df_raw = data_loader.handle_missing_values(df_raw)
-        df_processed = feature_engineer.engineer_features(df_raw)
+        with instrumentation.stage('handle_missing_values'):
+            df_raw = data_loader.handle_missing_values(df_raw)
+        with instrumentation.stage('engineer_features'):
+            df_processed = feature_engineer.engineer_features(df_raw, detector_index, n_jobs=FEATURE_JOBS)
+        with instrumentation.stage('index_days'):
+            df_processed, day_offsets = index_days(df_processed)
+        with instrumentation.stage('congestion_cube'):
+            congestion_cube = CongestionCube(df_processed)
+        with instrumentation.stage('prediction_lookup'):
+            prediction_lookup = feature_engineer.build_prediction_lookup(df_processed)
+            feature_aggregates = feature_engineer.feature_aggregates(df_processed)
+        with instrumentation.stage('stratified_sample'):
+            approx_sample, approx_offsets = build_sample(df_processed)
+        with instrumentation.stage('index_profiles'):
+            publish_data(
+                df_raw=df_raw, df_processed=df_processed, detector_index=detector_index,
+                day_offsets=day_offsets, congestion_cube=congestion_cube, prediction_lookup=prediction_lookup,
+                approx_sample=approx_sample, approx_offsets=approx_offsets, quality_report=quality_report,
+                feature_aggregates=feature_aggregates, flow_series=flow_series, **changes
+            )
         print(f"Data loaded successfully: {len(df_processed)} records")
+        for stage, seconds in instrumentation.load_stages.items():
+            print(f"  {stage}: {seconds:.2f}s")
         return True
     except Exception as e:
         print(f"Error loading data: {e}")
         return False
 
-# Load data on startup
-load_data()
+def index_days(df: pd.DataFrame):
+    """Sort by day and return the frame with its per-day row offsets."""
+    df = df.sort_values('day', kind='stable').reset_index(drop=True)
+    return df, data_loader.day_offsets(df)
+
+def filter_data(df: pd.DataFrame, args, offsets=None) -> pd.DataFrame:
+    """Apply date, detector and hour filters from request args with a single mask.
+    
+    With day offsets of a day-sorted frame, the date range becomes a row slice
+    so only the selected days are scanned by the remaining filters.
+    """
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    detid = args.get('detid')
+    hour_start = args.get('hour_start')
+    hour_end = args.get('hour_end')
+    
+    if offsets is not None and (start_date or end_date):
+        days, starts = offsets
+        bounds = np.r_[starts, len(df)]
+        lo = bounds[np.searchsorted(days, start_date, 'left')] if start_date else 0
+        hi = bounds[np.searchsorted(days, end_date, 'right')] if end_date else len(df)
+        df = df.iloc[lo:max(lo, hi)]
+        start_date = end_date = None
+    
+    mask = np.ones(len(df), dtype=bool)
+    if start_date:
+        mask &= (df['day'] >= start_date).to_numpy()
+    if end_date:
+        mask &= (df['day'] <= end_date).to_numpy()
+    if detid:
+        mask &= (df['detid'] == int(detid)).to_numpy()
+    if hour_start:
+        mask &= (df['hour'] >= int(hour_start)).to_numpy()
+    if hour_end:
+        mask &= (df['hour'] <= int(hour_end)).to_numpy()
+    
+    return df if mask.all() else df[mask]
+
+def predict_keys(snap: Snapshot, keys):
+    """Predict (detid, hour, weekday, month) keys with a snapshot's model, computing only those not cached."""
+    version = snap.model_version
+    # Results also depend on the dataset (feature lookup) and the index configuration
+    cache_keys = [(snap.dataset_version, snap.index_key, *key) for key in keys]
+    results = prediction_cache.get_many(version, cache_keys)
+    missing = list(dict.fromkeys(key for key, result in zip(cache_keys, results) if result is None))
+    if missing:
+        with instrumentation.stage('feature_assembly'):
+            detids, hours, weekdays, months = zip(*(key[2:] for key in missing))
+            input_data = feature_engineer.prediction_features(snap.prediction_lookup, detids, hours, weekdays, months)
+        with instrumentation.stage('predict'):
+            prediction_result = snap.traffic_model.predict(input_data)
+        
+        # Traffic index from the predicted flow and the detector's average occupancy/speed
+        index = index_profiles.index(
+            prediction_result['prediction'], input_data['occ'], input_data['speed'], input_data['detid'],
+            config=snap.index_config
+        )
+        categories = CATEGORY_LABELS[category_codes(index)]
+        computed = [
+            {
+                'prediction': float(flow),
+                'confidence_low': float(low),
+                'confidence_high': float(high),
+                'traffic_index': float(idx),
+                'category': category
+            }
+            for flow, low, high, idx, category in zip(
+                prediction_result['prediction'], prediction_result['confidence_low'],
+                prediction_result['confidence_high'], index, categories
+            )
+        ]
+        prediction_cache.put_many(version, missing, computed)
+        lookup = dict(zip(missing, computed))
+        results = [lookup[key] if result is None else result for key, result in zip(cache_keys, results)]
+    return results
+
+def precompute_predictions(snap: Snapshot, month: int = DEFAULT_PREDICT_MONTH) -> int:
+    """Fill the prediction cache for every known detector, hour and weekday."""
+    keys = [
+        (int(detid), hour, weekday, month)
+        for detid in snap.prediction_lookup['detector'].index
+        for weekday in range(7)
+        for hour in range(24)
+    ]
+    predict_keys(snap, keys)
+    return len(keys)
+
+def index_profile_fields(df: pd.DataFrame, cube: CongestionCube, sample: StratifiedSample):
+    """Return (snapshot fields, cached) with the traffic index of the current profile configuration.
+    
+    The index columns come from the IndexProfiles cache or one vectorized pass;
+    the processed frame, congestion cube and sample are replaced by updated
+    copies, so snapshots still in use keep a consistent view. Callers hold
+    store.write_lock so the configuration cannot change in between.
+    """
+    _, index, categories, cached = index_profiles.columns()
+    df = df.copy(deep=False)
+    df['traffic_index'] = index
+    df['traffic_category'] = categories
+    return {
+        'df_processed': df,
+        'congestion_cube': cube.with_metric('traffic_index', index),
+        'approx_sample': sample.with_columns({'traffic_index': index, 'traffic_category': categories}),
+        'index_config': index_profiles.resolved()
+    }, cached
+
+def apply_index_profiles() -> dict:
+    """Publish the current dataset with the traffic index of the current profile configuration."""
+    with store.write_lock:
+        snap = store.current()
+        fields, cached = index_profile_fields(snap.df_processed, snap.congestion_cube, snap.approx_sample)
+        snap = publish(**fields)
+    # Cached predictions are keyed by index configuration; dropping them only frees memory
+    prediction_cache.invalidate()
+    return {'key': snap.index_key, 'cached': cached}
+
+def route_travel_times(snap: Snapshot, route: dict, mode: str, args) -> dict:
+    """Travel times of a route in one mode, cached per route definition and dataset version."""
+    month = int(args.get('month', DEFAULT_PREDICT_MONTH))
+    key = (
+        route['id'], route['signature'], mode,
+        args.get('start_date'), args.get('end_date'),
+        (snap.model_version, month) if mode == 'predicted' else None
+    )
+    cached = route_cache.get_many(snap.dataset_version, [key])[0]
+    if cached is not None:
+        return cached
+    
+    if mode == 'history':
+        frame = filter_data(snap.df_processed, {k: args.get(k) for k in ['start_date', 'end_date']}, snap.day_offsets)
+        result = historical_travel_times(frame, route, snap.congestion_cube)
+    elif mode == 'profile':
+        result = profile_travel_times(snap.congestion_cube, route)
+    else:
+        # Predicted flows for every segment, weekday and hour (served from the prediction cache)
+        keys = [(detid, hour, weekday, month) for detid in route['detids']
+                for weekday in range(7) for hour in range(24)]
+        flows = np.array([p['prediction'] for p in predict_keys(snap, keys)]).reshape(len(route['detids']), 7, 24)
+        parameters = bpr_parameters(snap.df_processed, route)
+        result = predicted_travel_times(route, flows, parameters)
+    route_cache.put_many(snap.dataset_version, [key], [result])
+    return result
+
+def build_sample(df: pd.DataFrame):
+    """Build the stratified sample of a day-sorted frame and its per-day offsets."""
+    sample = StratifiedSample(df, per_stratum=APPROX_PER_STRATUM)
+    return sample, data_loader.day_offsets(sample.frame)
+
+def select_rows(snap: Snapshot, args):
+    """Filter rows for a request; return (frame, True) when answering from the sample."""
+    approx_sample = snap.approx_sample
+    if args.get('approx') == '1' and approx_sample is not None:
+        frame = filter_data(approx_sample.frame, args, snap.approx_offsets)
+        if approx_sample.estimate_rows(frame) >= APPROX_EXACT_ROWS:
+            return frame, True
+    return filter_data(snap.df_processed, args, snap.day_offsets), False
+
+def approximate_statistics(approx_sample: StratifiedSample, frame: pd.DataFrame) -> dict:
+    """Statistics estimated from the stratified sample; min/max and ranges are sample values."""
+    stats = data_loader.get_statistics(frame)
+    rows, row_ci = approx_sample.split(approx_sample.count(frame))
+    stats['row_count'] = int(round(rows.get(0, 0)))
+    intervals = {'row_count': row_ci.get(0)}
+    for column in ['flow', 'speed']:
+        means, ci = approx_sample.split(approx_sample.mean(frame, column))
+        stats[f'{column}_stats']['mean'] = means.get(0, 0)
+        intervals[f'{column}_mean'] = ci.get(0)
+    stats['confidence_intervals'] = intervals
+    return stats
+
+def approximate_data(approx_sample: StratifiedSample, frame: pd.DataFrame) -> dict:
+    """Chart data estimated from the stratified sample."""
+    hourly_flow, hourly_ci = approx_sample.split(approx_sample.mean(frame, 'flow', 'hour'))
+    counts, counts_ci = approx_sample.split(approx_sample.count(frame, 'traffic_category'))
+    total, total_ci = approx_sample.split(approx_sample.count(frame))
+    return {
+        'hourly_flow': hourly_flow,
+        'traffic_distribution': {k: int(round(v)) for k, v in counts.items()},
+        'total_records': int(round(total.get(0, 0))),
+        'confidence_intervals': {
+            'hourly_flow': hourly_ci,
+            'traffic_distribution': counts_ci,
+            'total_records': total_ci.get(0)
+        }
+    }
+
+def approximate_analysis(approx_sample: StratifiedSample, frame: pd.DataFrame) -> dict:
+    """Analysis estimated from the stratified sample."""
+    columns = {'avg_flow': 'flow', 'avg_speed': 'speed', 'avg_occ': 'occ', 'avg_traffic_index': 'traffic_index'}
+    weekday_vs_weekend = {'weekday': {}, 'weekend': {}}
+    comparison_ci = {'weekday': {}, 'weekend': {}}
+    for key, column in columns.items():
+        means, ci = approx_sample.split(approx_sample.mean(frame, column, 'is_weekday'))
+        for flag, name in [(1, 'weekday'), (0, 'weekend')]:
+            weekday_vs_weekend[name][key] = means.get(flag, 0)
+            comparison_ci[name][key] = ci.get(flag)
+    
+    hourly, hourly_ci = approx_sample.split(approx_sample.mean(frame, 'traffic_index', 'hour'))
+    daily, daily_ci = approx_sample.split(approx_sample.mean(frame, 'traffic_index', 'weekday'))
+    peak = sorted(hourly.items(), key=lambda item: item[1], reverse=True)[:5]
+    
+    hourly_flow, hourly_flow_ci = {}, {}
+    for flag, name in [(1, 'weekday'), (0, 'weekend')]:
+        subset = frame[frame['is_weekday'] == flag]
+        means, ci = approx_sample.split(approx_sample.mean(subset, 'flow', 'hour'))
+        hourly_flow[name] = {str(k): v for k, v in means.items()}
+        hourly_flow_ci[name] = {str(k): v for k, v in ci.items()}
+    
+    return {
+        'weekday_vs_weekend': weekday_vs_weekend,
+        'hourly_congestion': {str(k): v for k, v in hourly.items()},
+        'daily_congestion': {WEEKDAY_NAMES[k]: v for k, v in daily.items() if k < 7},
+        'peak_hours': [{'hour': int(h), 'index': float(idx)} for h, idx in peak],
+        'weekday_hourly_flow': hourly_flow['weekday'],
+        'weekend_hourly_flow': hourly_flow['weekend'],
+        'confidence_intervals': {
+            'weekday_vs_weekend': comparison_ci,
+            'hourly_congestion': {str(k): v for k, v in hourly_ci.items()},
+            'daily_congestion': {WEEKDAY_NAMES[k]: v for k, v in daily_ci.items() if k < 7},
+            'weekday_hourly_flow': hourly_flow_ci['weekday'],
+            'weekend_hourly_flow': hourly_flow_ci['weekend']
+        }
+    }
+
+def approx_marker(approx_sample: StratifiedSample, frame: pd.DataFrame, approximate: bool) -> dict:
+    """Response fields telling an ?approx=1 client which path answered."""
+    if 'approx' not in request.args:
+        return {}
+    marker = {'approximate': approximate}
+    if approximate:
+        marker['sample'] = {**approx_sample.describe(), 'rows_used': len(frame)}
+    return marker
+
+def use_data(raw: pd.DataFrame, processed: pd.DataFrame, index: DetectorIndex = None,
+             model: TrafficModel = None):
+    """Install already-loaded data (tests, benchmarks) and mark the app ready.
+    
+    `model` replaces the served model; without it the current one is kept.
+    """
+    changes = model_fields(model) if model is not None else {}
+    df_processed, day_offsets = index_days(processed)
+    approx_sample, approx_offsets = build_sample(df_processed)
+    publish_data(
+        df_raw=raw, df_processed=df_processed, detector_index=index, day_offsets=day_offsets,
+        congestion_cube=CongestionCube(df_processed),
+        prediction_lookup=feature_engineer.build_prediction_lookup(df_processed),
+        feature_aggregates=feature_engineer.feature_aggregates(df_processed),
+        approx_sample=approx_sample, approx_offsets=approx_offsets,
+        quality_report=QualityReport(raw) if raw is not None else None,
+        flow_series=TrafficForecaster.build_series(raw if raw is not None else processed),
+        **changes
+    )
+    data_state.mark_ready()
+
+# Load data in the background so /healthz and the SPA are served immediately.
+# TRAFFIC_LOAD_MODE: 'background' (default), 'lazy' (on the first data request)
+# or 'eager' (block at import, e.g. with gunicorn --preload). A gunicorn
+# --preload worker forked while the background load runs restarts it itself.
+LOAD_MODE = os.environ.get('TRAFFIC_LOAD_MODE', 'background')
+data_state = BackgroundLoader(load_data)
+if LOAD_MODE == 'eager':
+    data_state.run()
+elif LOAD_MODE == 'background':
+    data_state.start()
+
+def requires_data(view):
+    """Return 503 with Retry-After while the dataset is still loading."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        data_state.start()
+        if data_state.is_pending:
+            response = jsonify({'error': 'Data is loading, retry shortly', **data_state.status()})
+            response.headers['Retry-After'] = str(data_state.retry_after)
+            return response, 503
+        return view(*args, **kwargs)
+    return wrapper
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -56,263 +496,535 @@ def index(path):
     # Note: If path matches an API route, Flask matches that first due to specificity.
     return render_template('index.html')
 
+@app.route('/healthz')
+def healthz():
+    """Liveness and data readiness, available before the dataset is loaded."""
+    if LOAD_MODE == 'background':
+        # Restarts the load in a worker forked while the master was loading
+        data_state.start()
+    status = data_state.status()
+    snap = store.current()
+    status['records'] = len(snap.df_processed) if snap.df_processed is not None else 0
+    return jsonify(status)
+
+@app.route('/metrics')
+def get_metrics():
+    """Expose request, stage and startup timings in Prometheus text format."""
+    return instrumentation.render(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
 @app.route('/api/statistics')
+@requires_data
 def get_statistics():
     """Get basic statistics about the dataset."""
     try:
-        if df_processed is None:
+        snap = store.current()
+        if snap.df_processed is None:
             return jsonify({'error': 'Data not loaded'}), 500
         
         # Apply filters if provided
-        df_filtered = df_processed.copy()
-        
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        detid = request.args.get('detid')
-        hour_start = request.args.get('hour_start')
-        hour_end = request.args.get('hour_end')
-        
-        if start_date:
-            df_filtered = df_filtered[df_filtered['day'] >= start_date]
-        if end_date:
-            df_filtered = df_filtered[df_filtered['day'] <= end_date]
-        if detid:
-            df_filtered = df_filtered[df_filtered['detid'] == int(detid)]
-        if hour_start:
-            df_filtered = df_filtered[df_filtered['hour'] >= int(hour_start)]
-        if hour_end:
-            df_filtered = df_filtered[df_filtered['hour'] <= int(hour_end)]
-        
-        stats = data_loader.get_statistics(df_filtered)
-        return jsonify(stats)
+        with instrumentation.stage('filter'):
+            df_filtered, approximate = select_rows(snap, request.args)
+        
+        with instrumentation.stage('aggregate'):
+            if approximate:
+                stats = approximate_statistics(snap.approx_sample, df_filtered)
+            else:
+                stats = data_loader.get_statistics(df_filtered)
+        with instrumentation.stage('serialize'):
+            return jsonify({**stats, **approx_marker(snap.approx_sample, df_filtered, approximate)})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/data')
+@requires_data
 def get_data():
     """Get chart data with optional filters."""
     try:
-        if df_processed is None:
+        snap = store.current()
+        if snap.df_processed is None:
             return jsonify({'error': 'Data not loaded'}), 500
         
         # Apply filters if provided
-        df_filtered = df_processed.copy()
-        
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        detid = request.args.get('detid')
-        hour_start = request.args.get('hour_start')
-        hour_end = request.args.get('hour_end')
-        
-        if start_date:
-            df_filtered = df_filtered[df_filtered['day'] >= start_date]
-        if end_date:
-            df_filtered = df_filtered[df_filtered['day'] <= end_date]
-        if detid:
-            df_filtered = df_filtered[df_filtered['detid'] == int(detid)]
-        if hour_start:
-            df_filtered = df_filtered[df_filtered['hour'] >= int(hour_start)]
-        if hour_end:
-            df_filtered = df_filtered[df_filtered['hour'] <= int(hour_end)]
-        
-        # Calculate hourly flow
-        hourly_flow = df_filtered.groupby('hour')['flow'].mean().to_dict()
-        
-        # Calculate traffic distribution
-        traffic_dist = df_filtered['traffic_category'].value_counts().to_dict()
+        with instrumentation.stage('filter'):
+            df_filtered, approximate = select_rows(snap, request.args)
         
-        return jsonify({
-            'hourly_flow': hourly_flow,
-            'traffic_distribution': traffic_dist,
-            'total_records': len(df_filtered)
-        })
+        if approximate:
+            with instrumentation.stage('aggregate'):
+                result = approximate_data(snap.approx_sample, df_filtered)
+            with instrumentation.stage('serialize'):
+                return jsonify({**result, **approx_marker(snap.approx_sample, df_filtered, True)})
+        
+        with instrumentation.stage('aggregate'):
+            # Calculate hourly flow
+            hourly_flow = df_filtered.groupby('hour')['flow'].mean().to_dict()
+        
+            # Calculate traffic distribution
+            traffic_dist = df_filtered['traffic_category'].value_counts().to_dict()
+        
+        with instrumentation.stage('serialize'):
+            return jsonify({
+                'hourly_flow': hourly_flow,
+                'traffic_distribution': traffic_dist,
+                'total_records': len(df_filtered),
+                **approx_marker(snap.approx_sample, df_filtered, False)
+            })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/analysis')
+@requires_data
 def get_analysis():
     """Get advanced traffic analysis data."""
     try:
-        if df_processed is None:
+        snap = store.current()
+        if snap.df_processed is None:
             return jsonify({'error': 'Data not loaded'}), 500
         
         # Apply filters if provided
-        df_filtered = df_processed.copy()
-        
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        detid = request.args.get('detid')
-        hour_start = request.args.get('hour_start')
-        hour_end = request.args.get('hour_end')
-        
-        if start_date:
-            df_filtered = df_filtered[df_filtered['day'] >= start_date]
-        if end_date:
-            df_filtered = df_filtered[df_filtered['day'] <= end_date]
-        if detid:
-            df_filtered = df_filtered[df_filtered['detid'] == int(detid)]
-        if hour_start:
-            df_filtered = df_filtered[df_filtered['hour'] >= int(hour_start)]
-        if hour_end:
-            df_filtered = df_filtered[df_filtered['hour'] <= int(hour_end)]
-        
-        # Weekday vs Weekend comparison
-        weekday_data = df_filtered[df_filtered['is_weekday'] == 1]
-        weekend_data = df_filtered[df_filtered['is_weekday'] == 0]
-        
-        weekday_vs_weekend = {
-            'weekday': {
-                'avg_flow': float(weekday_data['flow'].mean()) if len(weekday_data) > 0 else 0,
-                'avg_speed': float(weekday_data['speed'].mean()) if len(weekday_data) > 0 else 0,
-                'avg_occ': float(weekday_data['occ'].mean()) if len(weekday_data) > 0 else 0,
-                'avg_traffic_index': float(weekday_data['traffic_index'].mean()) if len(weekday_data) > 0 else 0
-            },
-            'weekend': {
-                'avg_flow': float(weekend_data['flow'].mean()) if len(weekend_data) > 0 else 0,
-                'avg_speed': float(weekend_data['speed'].mean()) if len(weekend_data) > 0 else 0,
-                'avg_occ': float(weekend_data['occ'].mean()) if len(weekend_data) > 0 else 0,
-                'avg_traffic_index': float(weekend_data['traffic_index'].mean()) if len(weekend_data) > 0 else 0
+        with instrumentation.stage('filter'):
+            df_filtered, approximate = select_rows(snap, request.args)
+        
+        if approximate:
+            with instrumentation.stage('aggregate'):
+                result = approximate_analysis(snap.approx_sample, df_filtered)
+            with instrumentation.stage('serialize'):
+                return jsonify({**result, **approx_marker(snap.approx_sample, df_filtered, True)})
+        
+        with instrumentation.stage('aggregate'):
+            # Weekday vs Weekend comparison
+            weekday_data = df_filtered[df_filtered['is_weekday'] == 1]
+            weekend_data = df_filtered[df_filtered['is_weekday'] == 0]
+        
+            weekday_vs_weekend = {
+                'weekday': {
+                    'avg_flow': float(weekday_data['flow'].mean()) if len(weekday_data) > 0 else 0,
+                    'avg_speed': float(weekday_data['speed'].mean()) if len(weekday_data) > 0 else 0,
+                    'avg_occ': float(weekday_data['occ'].mean()) if len(weekday_data) > 0 else 0,
+                    'avg_traffic_index': float(weekday_data['traffic_index'].mean()) if len(weekday_data) > 0 else 0
+                },
+                'weekend': {
+                    'avg_flow': float(weekend_data['flow'].mean()) if len(weekend_data) > 0 else 0,
+                    'avg_speed': float(weekend_data['speed'].mean()) if len(weekend_data) > 0 else 0,
+                    'avg_occ': float(weekend_data['occ'].mean()) if len(weekend_data) > 0 else 0,
+                    'avg_traffic_index': float(weekend_data['traffic_index'].mean()) if len(weekend_data) > 0 else 0
+                }
             }
-        }
         
-        # Hourly congestion profile
-        hourly_congestion = df_filtered.groupby('hour')['traffic_index'].mean().to_dict()
-        hourly_congestion = {str(k): float(v) for k, v in hourly_congestion.items()}
+            # Hourly congestion profile
+            hourly_congestion = df_filtered.groupby('hour')['traffic_index'].mean().to_dict()
+            hourly_congestion = {str(k): float(v) for k, v in hourly_congestion.items()}
         
-        # Daily congestion profile
-        day_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        daily_congestion = df_filtered.groupby('weekday')['traffic_index'].mean().to_dict()
-        daily_congestion = {day_names[k]: float(v) for k, v in daily_congestion.items() if k < 7}
+            # Daily congestion profile
+            day_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+            daily_congestion = df_filtered.groupby('weekday')['traffic_index'].mean().to_dict()
+            daily_congestion = {day_names[k]: float(v) for k, v in daily_congestion.items() if k < 7}
         
-        # Peak hours (top 5)
-        peak_hours_data = df_filtered.groupby('hour')['traffic_index'].mean().sort_values(ascending=False).head(5)
-        peak_hours = [{'hour': int(h), 'index': float(idx)} for h, idx in peak_hours_data.items()]
+            # Peak hours (top 5)
+            peak_hours_data = df_filtered.groupby('hour')['traffic_index'].mean().sort_values(ascending=False).head(5)
+            peak_hours = [{'hour': int(h), 'index': float(idx)} for h, idx in peak_hours_data.items()]
         
-        # Weekday vs Weekend hourly flow
-        weekday_hourly = weekday_data.groupby('hour')['flow'].mean().to_dict() if len(weekday_data) > 0 else {}
-        weekend_hourly = weekend_data.groupby('hour')['flow'].mean().to_dict() if len(weekend_data) > 0 else {}
-        weekday_hourly_flow = {str(k): float(v) for k, v in weekday_hourly.items()}
-        weekend_hourly_flow = {str(k): float(v) for k, v in weekend_hourly.items()}
+            # Weekday vs Weekend hourly flow
+            weekday_hourly = weekday_data.groupby('hour')['flow'].mean().to_dict() if len(weekday_data) > 0 else {}
+            weekend_hourly = weekend_data.groupby('hour')['flow'].mean().to_dict() if len(weekend_data) > 0 else {}
+            weekday_hourly_flow = {str(k): float(v) for k, v in weekday_hourly.items()}
+            weekend_hourly_flow = {str(k): float(v) for k, v in weekend_hourly.items()}
         
-        return jsonify({
-            'weekday_vs_weekend': weekday_vs_weekend,
-            'hourly_congestion': hourly_congestion,
-            'daily_congestion': daily_congestion,
-            'peak_hours': peak_hours,
-            'weekday_hourly_flow': weekday_hourly_flow,
-            'weekend_hourly_flow': weekend_hourly_flow
-        })
+        with instrumentation.stage('serialize'):
+            return jsonify({
+                'weekday_vs_weekend': weekday_vs_weekend,
+                'hourly_congestion': hourly_congestion,
+                'daily_congestion': daily_congestion,
+                'peak_hours': peak_hours,
+                'weekday_hourly_flow': weekday_hourly_flow,
+                'weekend_hourly_flow': weekend_hourly_flow,
+                **approx_marker(snap.approx_sample, df_filtered, False)
+            })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/train', methods=['POST'])
+@requires_data
 def train_model():
     """Train the Random Forest model."""
     try:
-        if df_processed is None:
+        snap = store.current()
+        if snap.df_processed is None:
             return jsonify({'error': 'Data not loaded', 'success': False}), 500
         
         # Prepare features and target
-        X = df_processed[TrafficModel.FEATURE_COLUMNS]
-        y = df_processed['flow']
+        X = snap.df_processed[TrafficModel.feature_columns(snap.df_processed)]
+        y = snap.df_processed['flow']
         
-        # Train model
-        metrics = traffic_model.train(X, y)
+        # Optionally leave out detectors flagged by the quality scan or listed explicitly
+        data = request.get_json(silent=True) or {}
+        exclude = [int(detid) for detid in data.get('exclude_detids', [])]
+        if data.get('exclude_unhealthy') and snap.quality_report is not None:
+            exclude += snap.quality_report.unhealthy_detids()
+        
+        # Train a new model so requests using the current one are unaffected, then publish it
+        current = snap.traffic_model
+        model = TrafficModel(n_estimators=current.n_estimators, random_state=current.random_state)
+        with instrumentation.stage('train'):
+            metrics = model.train(X, y, exclude_detids=sorted(set(exclude)), detids=snap.df_processed['detid'])
+        metrics['excluded_detectors'] = sorted(set(exclude))
+        # Model and drift monitor are published together, so they always belong to each other
+        snap = publish(**model_fields(model))
         
         # Get feature importance
-        feature_importance = traffic_model.get_feature_importance()
+        feature_importance = model.get_feature_importance()
+        
+        precomputed = 0
+        if data.get('precompute', PRECOMPUTE_PREDICTIONS):
+            with instrumentation.stage('precompute'):
+                precomputed = precompute_predictions(snap)
         
         return jsonify({
             'success': True,
             'metrics': metrics,
-            'feature_importance': feature_importance
+            'feature_importance': feature_importance,
+            'precomputed_predictions': precomputed
         })
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 500
 
 @app.route('/api/predict', methods=['POST'])
+@requires_data
 def predict():
     """Make a prediction."""
     try:
-        if not traffic_model.is_trained:
+        snap = store.current()
+        if not snap.traffic_model.is_trained:
             return jsonify({'error': 'Model not trained yet'}), 400
         
         data = request.json
-        hour = data.get('hour')
-        weekday = data.get('weekday')
-        detid = data.get('detid')
-        
-        # Get detector statistics from processed data
-        detector_data = df_processed[df_processed['detid'] == detid]
-        if len(detector_data) == 0:
-            # Use overall averages if detector not found
-            detector_mean_flow = df_processed['flow'].mean()
-            detector_mean_speed = df_processed['speed'].mean()
-            detector_mean_occ = df_processed['occ'].mean()
-            avg_occ = df_processed['occ'].mean()
-            avg_speed = df_processed['speed'].mean()
+        key = (
+            int(data.get('detid')),
+            int(data.get('hour')),
+            int(data.get('weekday')),
+            int(data.get('month', DEFAULT_PREDICT_MONTH))
+        )
+        
+        # Served from the prediction cache when this model version has seen the key
+        return jsonify(predict_keys(snap, [key])[0])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/drift')
+def get_drift():
+    """Get feature drift of ingested batches against the training distribution."""
+    monitor = store.current().drift_monitor
+    if monitor is None:
+        return jsonify({'error': 'Model not trained yet'}), 400
+    return jsonify(monitor.report())
+
+@app.route('/api/drift/batch', methods=['POST'])
+def ingest_drift_batch():
+    """Score a newly ingested batch of records (raw or with features) for drift."""
+    try:
+        snap = store.current()
+        monitor = snap.drift_monitor
+        if monitor is None:
+            return jsonify({'error': 'Model not trained yet'}), 400
+        
+        data = request.get_json(silent=True) or {}
+        records = data.get('records')
+        if not records:
+            return jsonify({'error': 'records must be a non-empty list'}), 400
+        batch = pd.DataFrame(records)
+        
+        with instrumentation.stage('features'):
+            if not all(col in batch.columns for col in monitor.features):
+                # Aggregate features come from the loaded (training) data, not from the batch itself;
+                # the detector index adds the spatial features the model may have been trained on
+                batch = feature_engineer.engineer_features(
+                    batch, snap.detector_index, aggregates=snap.feature_aggregates
+                )
+        with instrumentation.stage('score'):
+            scores = monitor.update(batch)
+        for name, score in scores.items():
+            instrumentation.registry.set_gauge('traffic_feature_psi', score['psi'], feature=name)
+        
+        return jsonify({
+            'rows': len(batch),
+            **DriftMonitor.summarize(scores),
+            'features': scores
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/forecast/train', methods=['POST'])
+@requires_data
+def train_forecaster():
+    """Train the short-horizon lag-feature forecaster."""
+    try:
+        snap = store.current()
+        if snap.flow_series is None:
+            return jsonify({'error': 'Data not loaded', 'success': False}), 500
+        
+        data = request.get_json(silent=True) or {}
+        forecaster = TrafficForecaster(
+            lags=int(data.get('lags', 6)),
+            horizon=int(data.get('horizon', 4)),
+            strategy=data.get('strategy', 'recursive')
+        )
+        metrics = forecaster.train(snap.flow_series)
+        publish(traffic_forecaster=forecaster)
+        
+        return jsonify({
+            'success': True,
+            'metrics': metrics
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 500
+
+@app.route('/api/forecast', methods=['POST'])
+@requires_data
+def forecast():
+    """Forecast the next N intervals for one or many detectors."""
+    try:
+        snap = store.current()
+        forecaster = snap.traffic_forecaster
+        if not forecaster.is_trained:
+            return jsonify({'error': 'Forecaster not trained yet'}), 400
+        
+        data = request.get_json(silent=True) or {}
+        detids = data.get('detids')
+        horizon = data.get('horizon')
+        
+        result = forecaster.forecast(
+            snap.flow_series, detids=detids, horizon=int(horizon) if horizon else None
+        )
+        forecasts = {}
+        for detid, group in result.groupby('detid'):
+            forecasts[str(detid)] = [
+                {'step': int(step), 'day': day, 'interval': int(interval), 'flow': float(flow)}
+                for step, day, interval, flow in zip(group['step'], group['day'], group['interval'], group['flow'])
+            ]
+        
+        return jsonify({
+            'strategy': forecaster.strategy,
+            'step_seconds': forecaster.step,
+            'forecasts': forecasts
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/detectors')
+@requires_data
+def get_detectors():
+    """Get detectors inside a bounding box (?bbox=west,south,east,north)."""
+    try:
+        detector_index = store.current().detector_index
+        if detector_index is None:
+            return jsonify({'error': 'Detector metadata not loaded'}), 400
+        
+        bbox = request.args.get('bbox')
+        if bbox:
+            try:
+                west, south, east, north = [float(v) for v in bbox.split(',')]
+            except ValueError:
+                return jsonify({'error': 'bbox must be west,south,east,north'}), 400
+            positions = detector_index.query_bbox(south, west, north, east)
         else:
-            detector_mean_flow = detector_data['flow'].mean()
-            detector_mean_speed = detector_data['speed'].mean()
-            detector_mean_occ = detector_data['occ'].mean()
-            avg_occ = detector_data['occ'].mean()
-            avg_speed = detector_data['speed'].mean()
-        
-        # Get hourly statistics
-        hourly_data = df_processed[df_processed['hour'] == hour]
-        hourly_mean_flow = hourly_data['flow'].mean() if len(hourly_data) > 0 else df_processed['flow'].mean()
-        
-        # Create feature vector
-        is_rush_hour = feature_engineer.is_rush_hour(hour)
-        is_weekday = feature_engineer.is_weekday(weekday)
-        is_peak_traffic = feature_engineer.is_peak_traffic(is_rush_hour, is_weekday)
-        
-        # Prepare input DataFrame
-        input_data = pd.DataFrame([{
-            'hour': hour,
+            positions = range(len(detector_index))
+        
+        detectors = detector_index.records(positions)
+        return jsonify({
+            'detectors': detectors,
+            'count': len(detectors)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/detectors/nearest')
+@requires_data
+def get_nearest_detectors():
+    """Get the k detectors nearest to a coordinate."""
+    try:
+        detector_index = store.current().detector_index
+        if detector_index is None:
+            return jsonify({'error': 'Detector metadata not loaded'}), 400
+        
+        lat = request.args.get('lat', type=float)
+        lon = request.args.get('lon', type=float)
+        if lat is None or lon is None:
+            return jsonify({'error': 'lat and lon are required'}), 400
+        k = request.args.get('k', default=5, type=int)
+        max_distance = request.args.get('max_distance', type=float)
+        
+        positions, distances = detector_index.nearest(lat, lon, k, max_distance)
+        return jsonify({
+            'detectors': detector_index.records(positions, distances)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/detectors/top')
+@requires_data
+def get_top_detectors():
+    """Get the k most congested detectors, optionally for one weekday and/or hour."""
+    try:
+        congestion_cube = store.current().congestion_cube
+        if congestion_cube is None:
+            return jsonify({'error': 'Data not loaded'}), 500
+        
+        metric = request.args.get('metric', 'traffic_index')
+        k = request.args.get('k', default=10, type=int)
+        weekday = request.args.get('weekday', type=int)
+        hour = request.args.get('hour', type=int)
+        try:
+            detectors = congestion_cube.top(k, metric, weekday, hour)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'metric': metric,
             'weekday': weekday,
-            'month': 10,  # Default month
-            'is_rush_hour': is_rush_hour,
-            'is_weekday': is_weekday,
-            'is_peak_traffic': is_peak_traffic,
-            'detector_mean_flow': detector_mean_flow,
-            'detector_mean_speed': detector_mean_speed,
-            'detector_mean_occ': detector_mean_occ,
-            'hourly_mean_flow': hourly_mean_flow,
-            'occ': avg_occ,
-            'speed': avg_speed,
-            'detid': detid
-        }])
-        
-        # Make prediction
-        prediction_result = traffic_model.predict(input_data)
-        
-        # Calculate traffic index
-        predicted_flow = prediction_result['prediction'][0]
-        traffic_index = feature_engineer.calculate_traffic_index(
-            predicted_flow, avg_occ, avg_speed
-        )
-        traffic_index = feature_engineer.normalize_index(traffic_index)
-        traffic_category = feature_engineer.categorize_traffic(traffic_index)
+            'hour': hour,
+            'detectors': detectors
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/heatmap')
+@requires_data
+def get_heatmap():
+    """Get the weekday x hour heatmap of a metric, city-wide or for one detector."""
+    try:
+        congestion_cube = store.current().congestion_cube
+        if congestion_cube is None:
+            return jsonify({'error': 'Data not loaded'}), 500
+        
+        metric = request.args.get('metric', 'traffic_index')
+        detid = request.args.get('detid', type=int)
+        try:
+            values = congestion_cube.heatmap(metric, detid)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except KeyError:
+            return jsonify({'error': f'Unknown detector {detid}'}), 404
+        
+        return jsonify({
+            'metric': metric,
+            'detid': detid,
+            'weekdays': WEEKDAY_NAMES,
+            'hours': list(range(values.shape[1])),
+            'values': congestion_cube.to_json(values)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/index-profiles')
+def get_index_profiles():
+    """Get the traffic-index profiles and detector groups in use."""
+    return jsonify(index_profiles.to_dict())
+
+@app.route('/api/index-profiles', methods=['POST'])
+@requires_data
+def set_index_profiles():
+    """Configure profiles/groups/default and recompute the traffic index without a reload."""
+    try:
+        if store.current().df_processed is None:
+            return jsonify({'error': 'Data not loaded'}), 500
+        
+        data = request.get_json(silent=True) or {}
+        with store.write_lock:
+            try:
+                index_profiles.configure(data.get('profiles'), data.get('groups'), data.get('default'))
+            except (ValueError, TypeError, AttributeError) as e:
+                return jsonify({'error': str(e)}), 400
+            with instrumentation.stage('index_profiles'):
+                applied = apply_index_profiles()
+        
+        return jsonify({**index_profiles.to_dict(), 'cached': applied['cached']})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/routes')
+def get_routes():
+    """Get the registered routes."""
+    return jsonify({'routes': route_registry.to_dict(), 'count': len(route_registry)})
+
+@app.route('/api/routes', methods=['POST'])
+def register_route():
+    """Register a route: {"id", "detids": [...], "lengths_m": [...], "name"}."""
+    data = request.get_json(silent=True) or {}
+    try:
+        route = route_registry.register(data['id'], data['detids'], data['lengths_m'], data.get('name'))
+    except KeyError as e:
+        return jsonify({'error': f'Missing field {e}'}), 400
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(route)
+
+@app.route('/api/routes/<route_id>/traveltime')
+@requires_data
+def get_route_travel_time(route_id):
+    """Get route travel times per interval (history), per weekday x hour (profile) or predicted."""
+    try:
+        snap = store.current()
+        if snap.congestion_cube is None:
+            return jsonify({'error': 'Data not loaded'}), 500
+        if route_id not in route_registry:
+            return jsonify({'error': f'Unknown route {route_id}'}), 404
+        
+        mode = request.args.get('mode', 'history')
+        if mode not in ('history', 'profile', 'predicted'):
+            return jsonify({'error': 'mode must be history, profile or predicted'}), 400
+        if mode == 'predicted' and not snap.traffic_model.is_trained:
+            return jsonify({'error': 'Model not trained yet'}), 400
+        
+        route = route_registry.get(route_id)
+        with instrumentation.stage('route_travel_time'):
+            result = route_travel_times(snap, route, mode, request.args)
+        
+        response = {'route': route, 'mode': mode, **result}
+        if mode != 'history':
+            response['weekdays'] = WEEKDAY_NAMES
+            response['hours'] = list(range(len(result['travel_time_s'][0])))
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/quality')
+@requires_data
+def get_quality():
+    """Get the per-detector data quality report (?status=healthy|unhealthy, ?detid=)."""
+    try:
+        quality_report = store.current().quality_report
+        if quality_report is None:
+            return jsonify({'error': 'Data not loaded'}), 500
+        
+        status = request.args.get('status')
+        if status not in (None, 'healthy', 'unhealthy'):
+            return jsonify({'error': 'status must be healthy or unhealthy'}), 400
+        detectors = quality_report.records(None if status is None else status == 'healthy')
+        detid = request.args.get('detid', type=int)
+        if detid is not None:
+            detectors = [record for record in detectors if record['detid'] == detid]
+            if not detectors:
+                return jsonify({'error': f'Unknown detector {detid}'}), 404
         
         return jsonify({
-            'prediction': float(predicted_flow),
-            'confidence_low': float(prediction_result['confidence_low'][0]),
-            'confidence_high': float(prediction_result['confidence_high'][0]),
-            'traffic_index': float(traffic_index),
-            'category': traffic_category
+            'summary': quality_report.summary(),
+            'thresholds': quality_report.thresholds,
+            'detectors': detectors
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/correlation')
+@requires_data
 def get_correlation():
     """Get feature correlations with target."""
     try:
-        if not traffic_model.is_trained:
+        snap = store.current()
+        if not snap.traffic_model.is_trained:
             return jsonify({'error': 'Model not trained yet'}), 400
         
-        correlations = traffic_model.calculate_correlation(df_processed, 'flow')
+        correlations = snap.traffic_model.calculate_correlation(snap.df_processed, 'flow')
         
         return jsonify({
             'correlations': correlations
@@ -0,0 +1,181 @@
+"""ASGI serving mode for Traffic ML Analysis.
+
+Wraps the existing Flask routes for an ASGI server, running each request on a
+bounded thread pool and collapsing identical in-flight GET requests into one.
+Run from backend/algo/src with e.g.:
+    uvicorn asgi:app --workers 2
+The WSGI deployment (gunicorn app:app) is unaffected.
+"""
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+Response = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one in-flight execution."""
+
+    def __init__(self):
+        self._inflight: Dict[Any, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Any, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the in-flight call for `key`, starting `fn()` if there is none."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled waiter does not cancel the shared call
+        return await asyncio.shield(task)
+
+
+class AsgiAdapter:
+    """ASGI application that serves a WSGI app from a bounded thread pool."""
+
+    DEDUPE_METHODS = ('GET', 'HEAD')
+
+    def __init__(self, wsgi_app: Callable, max_workers: Optional[int] = None,
+                 max_pending: int = 256, dedupe: bool = True, retry_after: int = 1):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or min(32, (os.cpu_count() or 1) + 4),
+            thread_name_prefix='asgi-worker'
+        )
+        self.max_pending = max_pending
+        self.dedupe = dedupe
+        self.retry_after = retry_after
+        self.single_flight = SingleFlight()
+        self._pending = 0
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+        if self._pending >= self.max_pending:
+            status, headers, content = 503, [(b'content-type', b'application/json'),
+                                             (b'retry-after', str(self.retry_after).encode())], \
+                b'{"error": "Server busy, retry shortly"}'
+        else:
+            self._pending += 1
+            try:
+                environ = self.build_environ(scope, body)
+                key = self._dedupe_key(scope, body)
+                if key is None:
+                    status, headers, content = await self._run(environ)
+                else:
+                    status, headers, content = await self.single_flight.do(key, lambda: self._run(environ))
+            finally:
+                self._pending -= 1
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else content})
+
+    async def _lifespan(self, receive: Callable, send: Callable):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _dedupe_key(self, scope: Dict[str, Any], body: bytes) -> Optional[Tuple]:
+        """Key identical idempotent requests; None when the request must run on its own."""
+        if not self.dedupe or scope['method'] not in self.DEDUPE_METHODS or body:
+            return None
+        headers = dict(scope.get('headers', []))
+        return (scope['method'], scope.get('root_path', ''), scope['path'],
+                scope.get('query_string', b''), headers.get(b'origin'))
+
+    async def _run(self, environ: Dict[str, Any]) -> Response:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.call_wsgi, environ)
+
+    def call_wsgi(self, environ: Dict[str, Any]) -> Response:
+        """Call the WSGI app synchronously and collect the full response."""
+        captured = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            captured['status'] = int(status.split(' ', 1)[0])
+            captured['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1'))
+                                   for k, v in response_headers]
+            return lambda data: chunks.append(data)
+
+        chunks: List[bytes] = []
+        result = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in result:
+                chunks.append(chunk)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return captured['status'], captured['headers'], b''.join(chunks)
+
+    @staticmethod
+    def build_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+        """Translate an ASGI HTTP scope into a PEP 3333 environ."""
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+                continue
+            if name == 'CONTENT_LENGTH':
+                continue
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+
+def create_app(wsgi_app: Callable = None) -> AsgiAdapter:
+    """Build the ASGI adapter around the Flask app, configured from the environment."""
+    if wsgi_app is None:
+        from app import app as wsgi_app
+    workers = os.environ.get('TRAFFIC_ASGI_THREADS')
+    return AsgiAdapter(
+        wsgi_app,
+        max_workers=int(workers) if workers else None,
+        max_pending=int(os.environ.get('TRAFFIC_ASGI_MAX_PENDING', 256)),
+        dedupe=os.environ.get('TRAFFIC_ASGI_DEDUPE', '1') != '0'
+    )
+
+
+app = create_app()
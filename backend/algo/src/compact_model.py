@@ -0,0 +1,170 @@
+"""Compact, memory-mappable Random Forest artifacts for Traffic ML Analysis.
+
+File layout: 4-byte magic, little-endian uint32 format version, uint32 header
+length, a JSON header, then the node arrays, each aligned to 64 bytes:
+    feature    int16   split feature per node, -1 for leaves
+    threshold  float32 split threshold, or the leaf value for leaves
+    left/right int16 or int32 child index within the tree
+Thresholds are rounded down to float32 so that `x <= threshold` gives the same
+branch as scikit-learn, which compares float32 inputs against float64 thresholds.
+"""
+import json
+import mmap
+import struct
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+MAGIC = b'TRFM'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+LEAF = -1
+
+
+def _floor_float32(values: np.ndarray) -> np.ndarray:
+    """Round float64 values down to the nearest float32."""
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+class CompactForest:
+    """Random Forest regressor stored as flat typed node arrays."""
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, offsets: np.ndarray, max_depth: int,
+                 feature_importances: np.ndarray, meta: Optional[Dict[str, Any]] = None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.max_depth = int(max_depth)
+        self.feature_importances_ = np.asarray(feature_importances, dtype=np.float64)
+        self.meta = meta or {}
+        self._mmap = None
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, forest, meta: Optional[Dict[str, Any]] = None) -> 'CompactForest':
+        """Convert a fitted single-output RandomForestRegressor."""
+        trees = [est.tree_ for est in forest.estimators_]
+        if any(tree.n_outputs != 1 for tree in trees):
+            raise ValueError("Only single-output forests can be exported")
+        if forest.n_features_in_ > np.iinfo(np.int16).max:
+            raise ValueError("Too many features for the compact format")
+        sizes = [tree.node_count for tree in trees]
+        index_dtype = np.int16 if max(sizes) <= np.iinfo(np.int16).max else np.int32
+
+        feature, threshold, left, right = [], [], [], []
+        for tree in trees:
+            is_leaf = tree.children_left == LEAF
+            feature.append(np.where(is_leaf, LEAF, tree.feature).astype(np.int16))
+            split = _floor_float32(tree.threshold)
+            threshold.append(np.where(is_leaf, tree.value[:, 0, 0].astype(np.float32), split))
+            left.append(np.where(is_leaf, 0, tree.children_left).astype(index_dtype))
+            right.append(np.where(is_leaf, 0, tree.children_right).astype(index_dtype))
+
+        return cls(
+            np.concatenate(feature), np.concatenate(threshold).astype(np.float32),
+            np.concatenate(left), np.concatenate(right),
+            np.r_[0, np.cumsum(sizes)], max(tree.max_depth for tree in trees),
+            forest.feature_importances_, meta
+        )
+
+    def tree_predictions(self, X) -> np.ndarray:
+        """Return per-tree predictions with shape (n_trees, n_rows)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        roots = np.repeat(self.offsets[:-1], n_rows)
+        node = roots.copy()
+        # (tree, row) pairs still descending; every step advances all of them one level
+        active = np.arange(len(node))
+        base = (active % n_rows) * n_features
+        for _ in range(self.max_depth):
+            current = node[active]
+            feature = self.feature[current]
+            internal = feature != LEAF
+            if not internal.all():
+                active, base = active[internal], base[internal]
+                current, feature = current[internal], feature[internal]
+            if len(active) == 0:
+                break
+            go_left = flat_X[base + feature] <= self.threshold[current]
+            node[active] = np.where(go_left, self.left[current], self.right[current]) + roots[active]
+        return self.threshold[node].astype(np.float64).reshape(self.n_trees, n_rows)
+
+    def predict(self, X) -> np.ndarray:
+        """Return the forest mean prediction."""
+        return self.tree_predictions(X).mean(axis=0)
+
+    def save(self, path: str) -> int:
+        """Write the artifact and return its size in bytes."""
+        arrays = {'feature': self.feature, 'threshold': self.threshold,
+                  'left': self.left, 'right': self.right}
+        header = {
+            'n_trees': self.n_trees,
+            'max_depth': self.max_depth,
+            'offsets': self.offsets.tolist(),
+            'feature_importances': self.feature_importances_.tolist(),
+            'meta': self.meta,
+            'arrays': {}
+        }
+        # Array offsets depend on the header length; repeat the layout until stable
+        while True:
+            header_bytes = json.dumps(header).encode('utf-8')
+            position = self._align(12 + len(header_bytes))
+            layout = {}
+            for name, array in arrays.items():
+                layout[name] = {'dtype': array.dtype.str, 'length': len(array), 'offset': position}
+                position = self._align(position + array.nbytes)
+            if layout == header['arrays']:
+                break
+            header['arrays'] = layout
+
+        with open(path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<II', FORMAT_VERSION, len(header_bytes)) + header_bytes)
+            for name, array in arrays.items():
+                f.seek(header['arrays'][name]['offset'])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(position)
+        return position
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: bool = True) -> 'CompactForest':
+        """Load an artifact, memory-mapping the node arrays by default."""
+        with open(path, 'rb') as f:
+            if mmap_mode:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buffer = f.read()
+        if bytes(buffer[:4]) != MAGIC:
+            raise ValueError(f"{path} is not a compact model artifact")
+        version, header_length = struct.unpack('<II', buffer[4:12])
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact model format version {version}")
+        header = json.loads(bytes(buffer[12:12 + header_length]).decode('utf-8'))
+
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            arrays[name] = np.frombuffer(buffer, dtype=np.dtype(spec['dtype']),
+                                         count=spec['length'], offset=spec['offset'])
+        forest = cls(arrays['feature'], arrays['threshold'], arrays['left'], arrays['right'],
+                     header['offsets'], header['max_depth'], header['feature_importances'],
+                     header['meta'])
+        forest._mmap = buffer if mmap_mode else None
+        return forest
+
+    @staticmethod
+    def _align(position: int) -> int:
+        return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
@@ -0,0 +1,126 @@
+"""Precomputed congestion matrices for Traffic ML Analysis."""
+import copy
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+
+WEEKDAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+
+class CongestionCube:
+    """Dense detector x weekday x hour means of traffic metrics, built once at load time.
+
+    Heatmaps and detector rankings are served as slices of these arrays instead
+    of groupbys over the processed frame.
+    """
+
+    METRICS = ('traffic_index', 'flow', 'speed', 'occ')
+    # Metrics where a low value means worse congestion
+    LOW_IS_WORSE = ('speed',)
+
+    def __init__(self, df: pd.DataFrame, metrics=METRICS):
+        self.detids = np.unique(df['detid'].to_numpy())
+        self.n_hours = max(24, int(df['hour'].max()) + 1) if len(df) else 24
+        det = np.searchsorted(self.detids, df['detid'].to_numpy())
+        weekday = df['weekday'].to_numpy().astype(np.int64)
+        hour = df['hour'].to_numpy().astype(np.int64)
+        # Row cell codes are kept so single metrics can be rebuilt (see with_metric)
+        self._cell = (det * 7 + weekday) * self.n_hours + hour
+        self._shape = (len(self.detids), 7, self.n_hours)
+
+        self.sums: Dict[str, np.ndarray] = {}
+        self.counts: Dict[str, np.ndarray] = {}
+        self.cell_means: Dict[str, np.ndarray] = {}
+        self.hour_means: Dict[str, np.ndarray] = {}
+        self.weekday_means: Dict[str, np.ndarray] = {}
+        self.detector_means: Dict[str, np.ndarray] = {}
+        self.city_means: Dict[str, np.ndarray] = {}
+        for metric in metrics:
+            self._build_metric(metric, df[metric].to_numpy(dtype=np.float64))
+
+    def _build_metric(self, metric: str, values: np.ndarray):
+        size = int(np.prod(self._shape))
+        valid = ~np.isnan(values)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sums = np.bincount(self._cell, weights=np.where(valid, values, 0.0), minlength=size).reshape(self._shape)
+            counts = np.bincount(self._cell, weights=valid, minlength=size).reshape(self._shape)
+            self.sums[metric], self.counts[metric] = sums, counts
+            self.cell_means[metric] = sums / counts
+            self.hour_means[metric] = sums.sum(axis=1) / counts.sum(axis=1)
+            self.weekday_means[metric] = sums.sum(axis=2) / counts.sum(axis=2)
+            self.detector_means[metric] = sums.sum(axis=(1, 2)) / counts.sum(axis=(1, 2))
+            self.city_means[metric] = sums.sum(axis=0) / counts.sum(axis=0)
+
+    def with_metric(self, metric: str, values) -> 'CongestionCube':
+        """Return a copy with one metric rebuilt from new row values (same rows as at build time).
+
+        The original cube is left untouched, so readers holding it stay consistent.
+        """
+        cube = copy.copy(self)
+        for name in ['sums', 'counts', 'cell_means', 'hour_means', 'weekday_means',
+                     'detector_means', 'city_means']:
+            setattr(cube, name, dict(getattr(self, name)))
+        cube._build_metric(metric, np.asarray(values, dtype=np.float64))
+        return cube
+
+    def __len__(self) -> int:
+        return len(self.detids)
+
+    def _check_metric(self, metric: str):
+        if metric not in self.cell_means:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {list(self.cell_means)}")
+
+    def _position(self, detid) -> int:
+        pos = int(np.searchsorted(self.detids, detid))
+        if pos >= len(self.detids) or self.detids[pos] != detid:
+            raise KeyError(detid)
+        return pos
+
+    @staticmethod
+    def to_json(values: np.ndarray) -> List:
+        """Convert an array to nested lists with NaN (empty cells) as None."""
+        return np.where(np.isnan(values), None, values).tolist()
+
+    def heatmap(self, metric: str = 'traffic_index', detid=None) -> np.ndarray:
+        """Return the weekday x hour matrix of means, city-wide or for one detector."""
+        self._check_metric(metric)
+        if detid is None:
+            return self.city_means[metric]
+        return self.cell_means[metric][self._position(detid)]
+
+    def detector_values(self, metric: str = 'traffic_index', weekday: Optional[int] = None,
+                        hour: Optional[int] = None) -> np.ndarray:
+        """Return one value per detector for the selected weekday and/or hour."""
+        self._check_metric(metric)
+        if weekday is not None and not 0 <= weekday < 7:
+            raise ValueError("weekday must be in [0, 6]")
+        if hour is not None and not 0 <= hour < self.n_hours:
+            raise ValueError(f"hour must be in [0, {self.n_hours - 1}]")
+        if weekday is not None and hour is not None:
+            return self.cell_means[metric][:, weekday, hour]
+        if hour is not None:
+            return self.hour_means[metric][:, hour]
+        if weekday is not None:
+            return self.weekday_means[metric][:, weekday]
+        return self.detector_means[metric]
+
+    def top(self, k: int = 10, metric: str = 'traffic_index', weekday: Optional[int] = None,
+            hour: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the k most congested detectors, worst first."""
+        values = self.detector_values(metric, weekday, hour)
+        # Score so that higher is worse; detectors without data rank last
+        score = -values if metric in self.LOW_IS_WORSE else values
+        score = np.where(np.isnan(score), -np.inf, score)
+        k = max(0, min(int(k), len(score)))
+        if k == 0:
+            return []
+        candidates = np.argpartition(-score, k - 1)[:k]
+        order = candidates[np.lexsort((self.detids[candidates], -score[candidates]))]
+        return [
+            {
+                'rank': rank + 1,
+                'detid': self.detids[pos].item(),
+                'value': None if np.isnan(values[pos]) else float(values[pos])
+            }
+            for rank, pos in enumerate(order)
+        ]
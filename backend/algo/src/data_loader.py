@@ -1,12 +1,17 @@
 """Data Loader module for Traffic ML Analysis."""
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Optional
+import json
+import os
+from typing import Dict, Any, List, Optional, Tuple
 
 class DataLoader:
     """Handles loading, validation, and preprocessing of traffic data."""
     
     REQUIRED_COLUMNS = ['day', 'interval', 'detid', 'flow', 'occ', 'speed']
+    DETECTOR_COLUMNS = ['detid', 'lat', 'lon']
+    MANIFEST_NAME = 'manifest.json'
+    PARTITION_FORMATS = {'csv': '.csv', 'parquet': '.parquet'}
     
     def __init__(self):
         self.data: Optional[pd.DataFrame] = None
@@ -19,6 +24,159 @@ class DataLoader:
         self.data = df
         return df
     
+    def load_detectors(self, file_path: str) -> pd.DataFrame:
+        """Load detector metadata (detid, lat, lon, optional bearing) from CSV."""
+        df = pd.read_csv(file_path)
+        # UTD19 metadata names the longitude column 'long'
+        if 'lon' not in df.columns and 'long' in df.columns:
+            df = df.rename(columns={'long': 'lon'})
+        if not all(col in df.columns for col in self.DETECTOR_COLUMNS):
+            raise ValueError("Invalid detector metadata: missing required columns")
+        return df.dropna(subset=self.DETECTOR_COLUMNS)
+    
+    # Partitioned datasets
+    @staticmethod
+    def partition_key(day: pd.Series, by: str = 'day') -> pd.Series:
+        """Return the partition key ('YYYY-MM-DD' or 'YYYY-MM') for each day string."""
+        if by == 'day':
+            return day.astype(str)
+        if by == 'month':
+            return day.astype(str).str[:7]
+        raise ValueError(f"Unknown partitioning: {by}")
+    
+    def read_manifest(self, directory: str) -> Dict[str, Any]:
+        """Read the partition manifest of a dataset directory."""
+        with open(os.path.join(directory, self.MANIFEST_NAME)) as f:
+            return json.load(f)
+    
+    def _write_manifest(self, directory: str, manifest: Dict[str, Any]):
+        path = os.path.join(directory, self.MANIFEST_NAME)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(path + '.tmp', path)
+    
+    @staticmethod
+    def _partition_stats(df: pd.DataFrame) -> Dict[str, Any]:
+        """Min/max statistics used to prune partitions."""
+        return {
+            'rows': len(df),
+            'min_day': str(df['day'].min()),
+            'max_day': str(df['day'].max()),
+            'min_interval': int(df['interval'].min()),
+            'max_interval': int(df['interval'].max()),
+            'detectors': int(df['detid'].nunique()),
+            'min_flow': float(df['flow'].min()),
+            'max_flow': float(df['flow'].max())
+        }
+    
+    def _read_partition(self, directory: str, filename: str) -> pd.DataFrame:
+        path = os.path.join(directory, filename)
+        if filename.endswith('.parquet'):
+            return pd.read_parquet(path)
+        return pd.read_csv(path)
+    
+    def _write_partition(self, df: pd.DataFrame, directory: str, key: str, manifest: Dict[str, Any]):
+        filename = f"{manifest['partition_by']}={key}{self.PARTITION_FORMATS[manifest['format']]}"
+        path = os.path.join(directory, filename)
+        df = df.sort_values(['day', 'detid', 'interval'], kind='stable')
+        if manifest['format'] == 'parquet':
+            df.to_parquet(path + '.tmp', index=False)
+        else:
+            df.to_csv(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+        manifest['partitions'][key] = {'file': filename, **self._partition_stats(df)}
+    
+    def write_partitions(self, df: pd.DataFrame, directory: str, by: str = 'day',
+                         file_format: str = 'csv') -> Dict[str, Any]:
+        """Split a dataset into day- or month-partitioned files with a manifest."""
+        if file_format not in self.PARTITION_FORMATS:
+            raise ValueError(f"Unknown partition format: {file_format}")
+        os.makedirs(directory, exist_ok=True)
+        manifest = {'version': 1, 'partition_by': by, 'format': file_format, 'partitions': {}}
+        for key, part in df.groupby(self.partition_key(df['day'], by), sort=True):
+            self._write_partition(part, directory, key, manifest)
+        self._write_manifest(directory, manifest)
+        return manifest
+    
+    def select_partitions(self, manifest: Dict[str, Any], start_date: Optional[str] = None,
+                          end_date: Optional[str] = None) -> List[str]:
+        """Return partition keys whose [min_day, max_day] overlaps the date range."""
+        keys = []
+        for key, stats in sorted(manifest['partitions'].items()):
+            if start_date and stats['max_day'] < start_date:
+                continue
+            if end_date and stats['min_day'] > end_date:
+                continue
+            keys.append(key)
+        return keys
+    
+    def load_partitioned(self, directory: str, start_date: Optional[str] = None,
+                         end_date: Optional[str] = None) -> pd.DataFrame:
+        """Load only the partitions overlapping a date range, sorted by day."""
+        manifest = self.read_manifest(directory)
+        keys = self.select_partitions(manifest, start_date, end_date)
+        frames = [self._read_partition(directory, manifest['partitions'][key]['file']) for key in keys]
+        if not frames:
+            raise ValueError("No partitions match the requested date range")
+        df = pd.concat(frames, ignore_index=True)
+        if start_date:
+            df = df[df['day'] >= start_date]
+        if end_date:
+            df = df[df['day'] <= end_date]
+        if not self.validate_data(df):
+            raise ValueError("Invalid data structure: missing required columns")
+        df = df.reset_index(drop=True)
+        self.data = df
+        return df
+    
+    def ingest_partitions(self, df: pd.DataFrame, directory: str) -> List[str]:
+        """Merge new records into their partitions, rewriting only the touched ones.
+        
+        Records replace existing ones with the same (day, interval, detid).
+        """
+        if not self.validate_data(df):
+            raise ValueError("Invalid data structure: missing required columns")
+        manifest = self.read_manifest(directory)
+        touched = []
+        for key, part in df.groupby(self.partition_key(df['day'], manifest['partition_by']), sort=True):
+            existing = manifest['partitions'].get(key)
+            if existing is not None:
+                part = pd.concat([self._read_partition(directory, existing['file']), part], ignore_index=True)
+                part = part.drop_duplicates(['day', 'interval', 'detid'], keep='last')
+            self._write_partition(part, directory, key, manifest)
+            touched.append(key)
+        self._write_manifest(directory, manifest)
+        return touched
+    
+    def apply_retention(self, directory: str, keep_from: str) -> List[str]:
+        """Delete partitions whose data ends before `keep_from`; return removed keys."""
+        manifest = self.read_manifest(directory)
+        removed = [key for key, stats in manifest['partitions'].items() if stats['max_day'] < keep_from]
+        for key in removed:
+            os.remove(os.path.join(directory, manifest['partitions'].pop(key)['file']))
+        self._write_manifest(directory, manifest)
+        return sorted(removed)
+    
+    def rebuild_partition(self, directory: str, key: str) -> Dict[str, Any]:
+        """Re-read one partition file and refresh its manifest statistics."""
+        manifest = self.read_manifest(directory)
+        df = self._read_partition(directory, manifest['partitions'][key]['file'])
+        self._write_partition(df, directory, key, manifest)
+        self._write_manifest(directory, manifest)
+        return manifest['partitions'][key]
+    
+    @staticmethod
+    def day_offsets(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Return sorted unique days and their start rows for a day-sorted DataFrame.
+        
+        Row range of day i is [starts[i], starts[i + 1]), the last ending at len(df).
+        """
+        day = df['day'].to_numpy()
+        if len(day) == 0:
+            return np.array([], dtype=object), np.array([], dtype=np.int64)
+        starts = np.r_[0, np.flatnonzero(day[1:] != day[:-1]) + 1]
+        return day[starts], starts
+    
     def validate_data(self, df: pd.DataFrame) -> bool:
         """Validate that DataFrame has required columns."""
         return all(col in df.columns for col in self.REQUIRED_COLUMNS)
@@ -0,0 +1,130 @@
+"""Feature drift monitoring against the training distribution for Traffic ML Analysis."""
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Population stability index thresholds commonly used for model monitoring
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# Floor for bin proportions so empty bins do not make the PSI infinite
+MIN_PROPORTION = 1e-4
+
+
+def psi(reference: np.ndarray, live: np.ndarray) -> float:
+    """Population stability index between two binned count vectors."""
+    p = np.maximum(reference / max(reference.sum(), 1), MIN_PROPORTION)
+    q = np.maximum(live / max(live.sum(), 1), MIN_PROPORTION)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks(reference: np.ndarray, live: np.ndarray) -> float:
+    """Kolmogorov-Smirnov statistic between two binned count vectors (at the bin edges)."""
+    p = np.cumsum(reference) / max(reference.sum(), 1)
+    q = np.cumsum(live) / max(live.sum(), 1)
+    return float(np.abs(p - q).max())
+
+
+def drift_status(value: float) -> str:
+    if value >= PSI_SIGNIFICANT:
+        return 'significant'
+    if value >= PSI_MODERATE:
+        return 'moderate'
+    return 'stable'
+
+
+class DriftMonitor:
+    """Tracks live feature histograms against a TrafficModel.feature_profile.
+
+    Each batch is binned once with the training edges and added to running
+    totals; a sliding window of the last `window` batches is kept by
+    subtracting evicted batch counts, so no history is ever rescanned.
+    """
+
+    def __init__(self, profile: Dict[str, Dict[str, list]], window: int = 24):
+        self.profile = profile
+        self.features = list(profile)
+        self.edges = {name: np.asarray(profile[name]['edges'], dtype=np.float64) for name in self.features}
+        self.reference = {name: np.asarray(profile[name]['counts'], dtype=np.int64) for name in self.features}
+        self.window = window
+        self.total = {name: np.zeros_like(counts) for name, counts in self.reference.items()}
+        self.windowed = {name: np.zeros_like(counts) for name, counts in self.reference.items()}
+        self._batches: Deque[Dict[str, np.ndarray]] = deque()
+        self.batches = 0
+        self.rows = 0
+        self.updated_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def bin_counts(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Bin one batch with the training edges."""
+        counts = {}
+        for name in self.features:
+            if name not in df.columns:
+                continue
+            values = df[name].to_numpy(dtype=np.float64)
+            values = values[np.isfinite(values)]
+            bins = np.searchsorted(self.edges[name], values, side='right')
+            counts[name] = np.bincount(bins, minlength=len(self.edges[name]) + 1)
+        return counts
+
+    def update(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Add a newly ingested batch and return its drift scores."""
+        counts = self.bin_counts(df)
+        with self._lock:
+            for name, batch in counts.items():
+                self.total[name] += batch
+                self.windowed[name] += batch
+            self._batches.append(counts)
+            while len(self._batches) > self.window:
+                for name, old in self._batches.popleft().items():
+                    self.windowed[name] -= old
+            self.batches += 1
+            self.rows += len(df)
+            self.updated_at = time.time()
+        return self._scores(counts)
+
+    def _scores(self, counts: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        scores = {}
+        for name, live in counts.items():
+            if live.sum() == 0:
+                continue
+            value = psi(self.reference[name], live)
+            scores[name] = {
+                'psi': value,
+                'ks': ks(self.reference[name], live),
+                'status': drift_status(value),
+                'rows': int(live.sum())
+            }
+        return scores
+
+    @staticmethod
+    def summarize(scores: Dict[str, Any]) -> Dict[str, Any]:
+        """Summarize per-feature scores by their worst feature."""
+        if not scores:
+            return {'max_psi': None, 'status': 'no_data', 'drifted_features': []}
+        max_psi = max(score['psi'] for score in scores.values())
+        return {
+            'max_psi': max_psi,
+            'status': drift_status(max_psi),
+            'drifted_features': sorted(
+                name for name, score in scores.items() if score['status'] != 'stable'
+            )
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """Return drift scores for the sliding window and for all batches so far."""
+        with self._lock:
+            window = self._scores({name: counts.copy() for name, counts in self.windowed.items()})
+            total = self._scores({name: counts.copy() for name, counts in self.total.items()})
+            batches, rows, updated_at = self.batches, self.rows, self.updated_at
+        return {
+            'batches': batches,
+            'rows': rows,
+            'window_batches': min(batches, self.window),
+            'updated_at': updated_at,
+            'window': {**self.summarize(window), 'features': window},
+            'cumulative': {**self.summarize(total), 'features': total}
+        }
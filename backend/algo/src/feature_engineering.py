@@ -1,12 +1,125 @@
 """Feature Engineering module for Traffic ML Analysis."""
+import os
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Tuple
+from multiprocessing import shared_memory
+from typing import Tuple, Dict, List, Any, Optional
+
+RUSH_HOURS = [7, 8, 9, 17, 18, 19]
+SPATIAL_COLUMNS = ['lat', 'lon', 'upstream_mean_flow', 'downstream_mean_flow', 'neighbor_mean_flow']
+CATEGORY_LABELS = np.array(['Low', 'Medium', 'High'], dtype=object)
+
+# Row-level columns computed by the shard kernel, in output order
+ROW_OUTPUTS = [
+    ('hour', np.int64), ('weekday', np.int64), ('month', np.int64),
+    ('is_rush_hour', np.int64), ('is_weekday', np.int64), ('is_peak_traffic', np.int64),
+    ('traffic_index', np.float64), ('category_code', np.int8)
+]
+ROW_INPUTS = [
+    ('det_code', np.int64), ('interval', np.int64), ('day_code', np.int64),
+    ('flow', np.float64), ('occ', np.float64), ('speed', np.float64)
+]
+
+
+# Normalizers and weights of calculate_traffic_index
+DEFAULT_INDEX_PROFILE = {
+    'flow_scale': 500.0, 'occ_scale': 100.0, 'speed_scale': 120.0,
+    'flow_weight': 0.4, 'occ_weight': 0.3, 'speed_weight': 0.3
+}
+
+
+def traffic_index_array(flow, occ, speed, profile: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """Vectorized calculate_traffic_index followed by normalize_index.
+    
+    `profile` overrides DEFAULT_INDEX_PROFILE entries with scalars or per-row arrays.
+    """
+    p = DEFAULT_INDEX_PROFILE if profile is None else {**DEFAULT_INDEX_PROFILE, **profile}
+    flow, occ, speed = (np.asarray(v, dtype=np.float64) for v in (flow, occ, speed))
+    flow_norm = np.minimum(np.where(np.isfinite(flow), flow, 0.0) / p['flow_scale'], 1.0)
+    occ_norm = np.minimum(np.where(np.isfinite(occ), occ, 0.0) / p['occ_scale'], 1.0)
+    speed_factor = np.maximum(1 - (np.where(np.isfinite(speed), speed, 60.0) / p['speed_scale']), 0)
+    index = flow_norm * p['flow_weight'] + occ_norm * p['occ_weight'] + speed_factor * p['speed_weight']
+    return np.clip(index * 100, 0, 100)
+
+
+def category_codes(index: np.ndarray) -> np.ndarray:
+    """Vectorized categorize_traffic as codes into CATEGORY_LABELS."""
+    return np.select([index <= 33, index <= 66], [0, 1], 2)
+
+
+def _feature_kernel(inputs: Dict[str, np.ndarray], outputs: Dict[str, np.ndarray],
+                    weekday_lut: np.ndarray, month_lut: np.ndarray,
+                    det_lo: int, n_detectors: int, n_hours: int) -> Dict[str, np.ndarray]:
+    """Fill row features for one shard in place and return its per-detector partial sums."""
+    hour = inputs['interval'] // 3600
+    weekday = weekday_lut[inputs['day_code']]
+    outputs['hour'][:] = hour
+    outputs['weekday'][:] = weekday
+    outputs['month'][:] = month_lut[inputs['day_code']]
+    rush = np.isin(hour, RUSH_HOURS)
+    workday = weekday < 5
+    outputs['is_rush_hour'][:] = rush
+    outputs['is_weekday'][:] = workday
+    outputs['is_peak_traffic'][:] = rush & workday
+
+    flow, occ, speed = inputs['flow'], inputs['occ'], inputs['speed']
+    index = traffic_index_array(flow, occ, speed)
+    outputs['traffic_index'][:] = index
+    outputs['category_code'][:] = category_codes(index)
+
+    # bincount adds each bin's weights in row order, so per-detector sums do not
+    # depend on how detectors are split into shards
+    det = inputs['det_code'] - det_lo
+    partials = {}
+    for name, values in [('flow', flow), ('speed', speed), ('occ', occ)]:
+        valid = ~np.isnan(values)
+        partials[f'{name}_sum'] = np.bincount(det, weights=np.where(valid, values, 0.0), minlength=n_detectors)
+        partials[f'{name}_count'] = np.bincount(det, weights=valid, minlength=n_detectors)
+    valid = ~np.isnan(flow)
+    cell = det * n_hours + hour
+    partials['hour_flow_sum'] = np.bincount(
+        cell, weights=np.where(valid, flow, 0.0), minlength=n_detectors * n_hours
+    ).reshape(n_detectors, n_hours)
+    partials['hour_flow_count'] = np.bincount(
+        cell, weights=valid, minlength=n_detectors * n_hours
+    ).reshape(n_detectors, n_hours)
+    return partials
+
+
+def _attach(spec: Dict[str, Tuple[str, str, int]], start: int, stop: int):
+    """Attach to shared memory blocks and return (blocks, views sliced to [start, stop))."""
+    blocks, views = [], {}
+    for name, (shm_name, dtype, length) in spec.items():
+        block = shared_memory.SharedMemory(name=shm_name)
+        blocks.append(block)
+        views[name] = np.ndarray((length,), dtype=dtype, buffer=block.buf)[start:stop]
+    return blocks, views
+
+
+def _feature_shard_worker(task: Dict) -> Dict[str, np.ndarray]:
+    """Process-pool entry point: run the kernel over one detector shard in shared memory."""
+    in_blocks, inputs = _attach(task['inputs'], task['start'], task['stop'])
+    out_blocks, outputs = _attach(task['outputs'], task['start'], task['stop'])
+    try:
+        return _feature_kernel(inputs, outputs, task['weekday_lut'], task['month_lut'],
+                               task['det_lo'], task['det_hi'] - task['det_lo'], task['n_hours'])
+    finally:
+        # Drop the views before closing so the buffers are no longer exported
+        del inputs, outputs
+        for block in in_blocks + out_blocks:
+            block.close()
+
 
 class FeatureEngineer:
     """Handles feature extraction and engineering for traffic data."""
     
+    NEIGHBOR_RADIUS_M = 1000
+    NEIGHBOR_LIMIT = 8
+    # Below this many rows the process pool costs more than it saves
+    PARALLEL_MIN_ROWS = 200000
+    
     # Time feature extraction
     @staticmethod
     def extract_hour(interval: int) -> int:
@@ -77,6 +190,64 @@ class FeatureEngineer:
         agg.columns = ['hour', 'hourly_mean_flow']
         return df.merge(agg, on='hour', how='left')
     
+    @staticmethod
+    def calculate_neighbor_aggregates(df: pd.DataFrame, pairs: pd.DataFrame,
+                                      profile: Optional[pd.Series] = None,
+                                      sides: Tuple[str, ...] = ('upstream', 'downstream')) -> pd.DataFrame:
+        """Calculate neighbor mean flow per detector, hour and side as `<side>_mean_flow`.
+        
+        `pairs` holds (detid, neighbor_detid, side) rows from DetectorIndex.neighbor_pairs
+        and `sides` the sides it reports (DetectorIndex.neighbor_sides). Detectors
+        without neighbors on a side fall back to their own mean flow.
+        `profile` (mean flow indexed by detid, hour) defaults to the one of `df`.
+        """
+        if profile is None:
+            profile = df.groupby(['detid', 'hour'])['flow'].mean()
+        profile = profile.reset_index()
+        profile.columns = ['neighbor_detid', 'hour', 'neighbor_flow']
+        linked = pairs.merge(profile, on='neighbor_detid', how='inner')
+        agg = linked.groupby(['detid', 'hour', 'side'])['neighbor_flow'].mean().unstack('side')
+        columns = [f'{side}_mean_flow' for side in sides]
+        agg = agg.reindex(columns=list(sides))
+        agg.columns = columns
+        df = df.merge(agg.reset_index(), on=['detid', 'hour'], how='left')
+        fallback = df['detector_mean_flow'] if 'detector_mean_flow' in df.columns else df['flow']
+        for col in columns:
+            df[col] = df[col].fillna(fallback)
+        return df
+    
+    @staticmethod
+    def aggregate_sums(df: pd.DataFrame) -> pd.DataFrame:
+        """Per (detid, hour) sums and non-null counts of flow, speed and occ.
+        
+        Sums of several chunks added together give the aggregates of the whole
+        dataset; see aggregates_from_sums.
+        """
+        hour = df['interval'] // 3600 if 'hour' not in df.columns else df['hour']
+        values = df[['flow', 'speed', 'occ']].replace([np.inf, -np.inf], np.nan)
+        keys = [df['detid'].rename('detid'), hour.rename('hour')]
+        sums = values.groupby(keys).sum()
+        counts = values.notna().groupby(keys).sum().add_suffix('_count')
+        return pd.concat([sums, counts], axis=1)
+    
+    @staticmethod
+    def aggregates_from_sums(sums: pd.DataFrame) -> Dict[str, Any]:
+        """Turn (combined) aggregate_sums into the aggregates used by engineer_features."""
+        detector = sums.groupby(level='detid').sum()
+        hourly = sums.groupby(level='hour').sum()
+        totals = sums.sum()
+        means = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for name in ['flow', 'speed', 'occ']:
+                means[f'detector_mean_{name}'] = detector[name] / detector[f'{name}_count']
+            return {
+                'detector': pd.DataFrame(means),
+                'hourly': hourly['flow'] / hourly['flow_count'],
+                'profile': sums['flow'] / sums['flow_count'],
+                'overall': pd.Series({name: totals[name] / totals[f'{name}_count']
+                                      for name in ['flow', 'speed', 'occ']})
+            }
+    
     # Traffic index functions
     @staticmethod
     def calculate_traffic_index(flow: float, occ: float, speed: float) -> float:
@@ -113,32 +284,250 @@ class FeatureEngineer:
         else:
             return "High"
 
+    # Prediction inputs
+    @staticmethod
+    def build_prediction_lookup(df: pd.DataFrame) -> Dict[str, Any]:
+        """Precompute the per-detector and per-hour statistics used as prediction inputs."""
+        spatial = [col for col in SPATIAL_COLUMNS if col in df.columns]
+        lookup = {
+            'detector': df.groupby('detid')[['flow', 'speed', 'occ']].mean(),
+            'overall': df[['flow', 'speed', 'occ']].mean(),
+            'hourly_flow': df.groupby('hour')['flow'].mean(),
+            'spatial': spatial
+        }
+        if spatial:
+            lookup['spatial_hour'] = df.groupby(['detid', 'hour'])[spatial].mean()
+            lookup['spatial_detector'] = df.groupby('detid')[spatial].mean()
+            lookup['spatial_overall'] = df[spatial].mean()
+        return lookup
+    
+    @staticmethod
+    def feature_aggregates(df: pd.DataFrame) -> Dict[str, Any]:
+        """Aggregates for engineer_features taken from the aggregate columns of an engineered frame.
+        
+        Batches featurized with them (e.g. for drift scoring) get exactly the
+        values the model was trained on rather than aggregates of the batch.
+        """
+        detector_columns = [f'detector_mean_{name}' for name in ['flow', 'speed', 'occ']]
+        return {
+            'detector': df.groupby('detid')[detector_columns].first(),
+            'hourly': df.groupby('hour')['hourly_mean_flow'].first(),
+            'profile': df.groupby(['detid', 'hour'])['flow'].mean(),
+            'overall': df[['flow', 'speed', 'occ']].mean()
+        }
+    
+    @staticmethod
+    def prediction_features(lookup: Dict[str, Any], detids, hours, weekdays, months) -> pd.DataFrame:
+        """Assemble model inputs for (detid, hour, weekday, month) rows from a prediction lookup.
+        
+        Unknown detectors fall back to overall means and unseen hours to the
+        overall mean flow; spatial features fall back from the detector-hour
+        mean to the detector mean to the overall mean.
+        """
+        detids, hours, weekdays, months = (np.asarray(v) for v in (detids, hours, weekdays, months))
+        detector = lookup['detector'].reindex(detids)
+        known = detector.index.isin(lookup['detector'].index)
+        overall = lookup['overall']
+        stats = {
+            name: np.where(known, detector[name].to_numpy(), overall[name])
+            for name in ['flow', 'speed', 'occ']
+        }
+        hourly = lookup['hourly_flow'].reindex(hours).to_numpy()
+        hourly = np.where(np.isin(hours, lookup['hourly_flow'].index), hourly, overall['flow'])
+        
+        is_rush = np.isin(hours, RUSH_HOURS).astype(np.int64)
+        is_wkday = np.isin(weekdays, [0, 1, 2, 3, 4]).astype(np.int64)
+        features = pd.DataFrame({
+            'hour': hours,
+            'weekday': weekdays,
+            'month': months,
+            'is_rush_hour': is_rush,
+            'is_weekday': is_wkday,
+            'is_peak_traffic': is_rush & is_wkday,
+            'detector_mean_flow': stats['flow'],
+            'detector_mean_speed': stats['speed'],
+            'detector_mean_occ': stats['occ'],
+            'hourly_mean_flow': hourly,
+            'occ': stats['occ'],
+            'speed': stats['speed'],
+            'detid': detids
+        })
+        
+        if lookup['spatial']:
+            keys = pd.MultiIndex.from_arrays([detids, hours])
+            at_hour = lookup['spatial_hour'].reindex(keys)
+            has_hour = keys.isin(lookup['spatial_hour'].index)
+            at_detector = lookup['spatial_detector'].reindex(detids)
+            for col in lookup['spatial']:
+                fallback = np.where(known, at_detector[col].to_numpy(), lookup['spatial_overall'][col])
+                features[col] = np.where(has_hour, at_hour[col].to_numpy(), fallback)
+        return features
+    
     # Main pipeline
-    def engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Apply all feature engineering to DataFrame."""
-        df = df.copy()
-        
-        # Time features
-        df['hour'] = df['interval'].apply(self.extract_hour)
-        df['weekday'] = df['day'].apply(self.extract_weekday)
-        df['month'] = df['day'].apply(self.extract_month)
-        
-        # Binary features
-        df['is_rush_hour'] = df['hour'].apply(self.is_rush_hour)
-        df['is_weekday'] = df['weekday'].apply(self.is_weekday)
-        df['is_peak_traffic'] = df.apply(
-            lambda x: self.is_peak_traffic(x['is_rush_hour'], x['is_weekday']), axis=1
-        )
+    @staticmethod
+    def resolve_jobs(n_jobs) -> int:
+        """Resolve an n_jobs setting (None, 0 or negative mean all cores) to a worker count."""
+        cpus = os.cpu_count() or 1
+        if not n_jobs or n_jobs < 0:
+            return cpus
+        return min(int(n_jobs), cpus)
+    
+    def _prepare_inputs(self, df: pd.DataFrame) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """Encode day/detid as integer codes and collect the kernel input columns."""
+        day_codes, days = pd.factorize(df['day'])
+        det_codes, detids = pd.factorize(df['detid'], sort=True, use_na_sentinel=False)
+        interval = df['interval'].to_numpy()
+        if len(interval) and not (np.isfinite(interval).all() and interval.min() >= 0):
+            raise ValueError("interval must be finite and non-negative")
+        interval = interval.astype(np.int64)
+        inputs = {
+            'det_code': det_codes.astype(np.int64),
+            'interval': interval,
+            'day_code': day_codes.astype(np.int64),
+            'flow': df['flow'].to_numpy(dtype=np.float64),
+            'occ': df['occ'].to_numpy(dtype=np.float64),
+            'speed': df['speed'].to_numpy(dtype=np.float64)
+        }
+        meta = {
+            'detids': detids,
+            'n_hours': int(interval.max()) // 3600 + 1 if len(interval) else 1,
+            'weekday_lut': np.array([self.extract_weekday(d) for d in days], dtype=np.int64),
+            'month_lut': np.array([self.extract_month(d) for d in days], dtype=np.int64)
+        }
+        return inputs, meta
+    
+    @staticmethod
+    def _empty_outputs(n_rows: int) -> Dict[str, np.ndarray]:
+        return {name: np.empty(n_rows, dtype=dtype) for name, dtype in ROW_OUTPUTS}
+    
+    def _run_serial(self, inputs: Dict[str, np.ndarray], meta: Dict) -> Tuple[Dict, List[Dict]]:
+        outputs = self._empty_outputs(len(inputs['interval']))
+        partials = _feature_kernel(inputs, outputs, meta['weekday_lut'], meta['month_lut'],
+                                   0, len(meta['detids']), meta['n_hours'])
+        return outputs, [partials]
+    
+    def _run_parallel(self, inputs: Dict[str, np.ndarray], meta: Dict, n_jobs: int) -> Tuple[Dict, List[Dict]]:
+        """Shard rows by detector, run the kernel on a process pool over shared memory."""
+        n_rows = len(inputs['interval'])
+        n_detectors = len(meta['detids'])
+        # A stable sort keeps each detector's rows in their original relative order
+        perm = np.argsort(inputs['det_code'], kind='stable')
+        det_sorted = inputs['det_code'][perm]
+        det_starts = np.searchsorted(det_sorted, np.arange(n_detectors + 1))
+        # Cut at detector boundaries closest to equal row counts
+        cuts = np.searchsorted(det_starts, np.linspace(0, n_rows, n_jobs + 1), side='left')
+        cuts = np.unique(np.clip(cuts, 0, n_detectors))
+        cuts[0], cuts[-1] = 0, n_detectors
+        
+        blocks = []
+        
+        def share(arrays, dtypes):
+            spec = {}
+            for name, dtype in dtypes:
+                nbytes = max(n_rows * np.dtype(dtype).itemsize, 1)
+                block = shared_memory.SharedMemory(create=True, size=nbytes)
+                blocks.append(block)
+                view = np.ndarray((n_rows,), dtype=dtype, buffer=block.buf)
+                if arrays is not None:
+                    view[:] = arrays[name][perm]
+                spec[name] = (block.name, np.dtype(dtype).str, n_rows)
+            return spec
+        
+        try:
+            in_spec = share(inputs, ROW_INPUTS)
+            out_spec = share(None, ROW_OUTPUTS)
+            tasks = [{
+                'inputs': in_spec,
+                'outputs': out_spec,
+                'start': int(det_starts[lo]),
+                'stop': int(det_starts[hi]),
+                'det_lo': int(lo),
+                'det_hi': int(hi),
+                'n_hours': meta['n_hours'],
+                'weekday_lut': meta['weekday_lut'],
+                'month_lut': meta['month_lut']
+            } for lo, hi in zip(cuts[:-1], cuts[1:])]
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as pool:
+                partials = list(pool.map(_feature_shard_worker, tasks))
+            
+            outputs = self._empty_outputs(n_rows)
+            for name, (shm_name, dtype, _) in out_spec.items():
+                block = next(b for b in blocks if b.name == shm_name)
+                outputs[name][perm] = np.ndarray((n_rows,), dtype=dtype, buffer=block.buf)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+        return outputs, partials
+    
+    @staticmethod
+    def _combine(partials: List[Dict], det_codes: np.ndarray, hour: np.ndarray) -> Dict[str, np.ndarray]:
+        """Combine shard partial sums and counts into per-row aggregate columns."""
+        merged = {key: np.concatenate([p[key] for p in partials]) for key in partials[0]}
+        columns = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for name in ['flow', 'speed', 'occ']:
+                mean = merged[f'{name}_sum'] / merged[f'{name}_count']
+                columns[f'detector_mean_{name}'] = mean[det_codes]
+            hourly = merged['hour_flow_sum'].sum(axis=0) / merged['hour_flow_count'].sum(axis=0)
+        columns['hourly_mean_flow'] = hourly[hour]
+        return columns
+    
+    @staticmethod
+    def _lookup_aggregates(aggregates: Dict[str, Any], detid: pd.Series, hour: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per-row aggregate columns from precomputed aggregates, unknown keys taking overall means."""
+        detector = aggregates['detector'].reindex(detid.to_numpy())
+        overall = aggregates['overall']
+        columns = {
+            f'detector_mean_{name}': detector[f'detector_mean_{name}'].fillna(overall[name]).to_numpy()
+            for name in ['flow', 'speed', 'occ']
+        }
+        columns['hourly_mean_flow'] = aggregates['hourly'].reindex(hour).fillna(overall['flow']).to_numpy()
+        return columns
+    
+    def engineer_features(self, df: pd.DataFrame, detector_index=None, n_jobs: int = 1,
+                          aggregates: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Apply all feature engineering to DataFrame.
+        
+        When a DetectorIndex is given, detector coordinates and neighbor
+        aggregate features are added as well. With n_jobs other than 1, frames
+        of at least PARALLEL_MIN_ROWS rows are sharded by detid across a process
+        pool; the output is identical to the serial path. `aggregates` (from
+        aggregates_from_sums) replaces the aggregates of `df` itself, e.g. when
+        scoring a dataset chunk by chunk.
+        """
+        df = df.reset_index(drop=True)
+        inputs, meta = self._prepare_inputs(df)
+        
+        jobs = 1 if n_jobs == 1 else self.resolve_jobs(n_jobs)
+        if jobs > 1 and len(df) >= self.PARALLEL_MIN_ROWS and len(meta['detids']) > 1:
+            outputs, partials = self._run_parallel(inputs, meta, jobs)
+        else:
+            outputs, partials = self._run_serial(inputs, meta)
+        
+        # Time and binary features
+        for name, _ in ROW_OUTPUTS[:6]:
+            df[name] = outputs[name]
         
         # Aggregate features
-        df = self.calculate_detector_aggregates(df)
-        df = self.calculate_hourly_aggregates(df)
+        if aggregates is None:
+            columns = self._combine(partials, inputs['det_code'], outputs['hour'])
+        else:
+            columns = self._lookup_aggregates(aggregates, df['detid'], outputs['hour'])
+        for name, values in columns.items():
+            df[name] = values
+        
+        # Spatial features
+        if detector_index is not None and len(detector_index) > 0:
+            df = df.merge(detector_index.coordinates(), on='detid', how='left')
+            pairs = detector_index.neighbor_pairs(self.NEIGHBOR_RADIUS_M, self.NEIGHBOR_LIMIT)
+            df = self.calculate_neighbor_aggregates(
+                df, pairs, aggregates['profile'] if aggregates is not None else None,
+                tuple(detector_index.neighbor_sides)
+            )
         
         # Traffic index
-        df['traffic_index'] = df.apply(
-            lambda x: self.calculate_traffic_index(x['flow'], x['occ'], x['speed']), axis=1
-        )
-        df['traffic_index'] = df['traffic_index'].apply(self.normalize_index)
-        df['traffic_category'] = df['traffic_index'].apply(self.categorize_traffic)
+        df['traffic_index'] = outputs['traffic_index']
+        df['traffic_category'] = CATEGORY_LABELS[outputs['category_code']]
         
         return df
@@ -0,0 +1,182 @@
+"""Configurable traffic-index profiles per detector group for Traffic ML Analysis."""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from feature_engineering import DEFAULT_INDEX_PROFILE, CATEGORY_LABELS, traffic_index_array, category_codes
+
+DEFAULT_NAME = 'default'
+SCALES = ('flow_scale', 'occ_scale', 'speed_scale')
+WEIGHTS = ('flow_weight', 'occ_weight', 'speed_weight')
+
+
+class IndexProfiles:
+    """Named traffic-index profiles and the detector groups that use them.
+
+    Detectors outside every group use the default profile. After bind(), the
+    index of the stored flow/occ/speed columns is recomputed in one vectorized
+    pass with per-row parameters gathered from a per-detector table, and the
+    result is cached per configuration, so switching back to an earlier
+    configuration is a lookup.
+    """
+
+    def __init__(self, max_cached: int = 4):
+        self.profiles: Dict[str, Dict[str, float]] = {DEFAULT_NAME: dict(DEFAULT_INDEX_PROFILE)}
+        self.groups: Dict[str, Dict[str, Any]] = {}
+        self.default = DEFAULT_NAME
+        self.key = self._config_key()
+        self.max_cached = max_cached
+        self.hits = 0
+        self.misses = 0
+        self._inputs: Optional[Dict[str, np.ndarray]] = None
+        self._columns: 'OrderedDict[str, Tuple[np.ndarray, np.ndarray]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def validate_profile(params: Dict[str, Any]) -> Dict[str, float]:
+        """Return a complete profile; missing parameters take the default values."""
+        unknown = sorted(set(params) - set(DEFAULT_INDEX_PROFILE))
+        if unknown:
+            raise ValueError(f"Unknown profile parameters {unknown}")
+        profile = {**DEFAULT_INDEX_PROFILE, **{name: float(value) for name, value in params.items()}}
+        for name in SCALES:
+            if not profile[name] > 0:
+                raise ValueError(f"{name} must be positive")
+        for name in WEIGHTS:
+            if not profile[name] >= 0:
+                raise ValueError(f"{name} must not be negative")
+        return profile
+
+    def configure(self, profiles: Optional[Dict[str, Dict[str, Any]]] = None,
+                  groups: Optional[Dict[str, Dict[str, Any]]] = None, default: Optional[str] = None):
+        """Add or replace profiles, replace the detector groups and/or pick the default profile.
+
+        `groups` maps a group name to {"detids": [...], "profile": name}. Everything
+        is validated before the configuration changes.
+        """
+        new_profiles = dict(self.profiles)
+        for name, params in (profiles or {}).items():
+            new_profiles[str(name)] = self.validate_profile(params)
+        new_groups = self.groups
+        if groups is not None:
+            new_groups, seen = {}, {}
+            for name, group in groups.items():
+                if group.get('profile') not in new_profiles:
+                    raise ValueError(f"Group '{name}' uses unknown profile '{group.get('profile')}'")
+                detids = sorted({int(detid) for detid in group.get('detids', [])})
+                for detid in detids:
+                    if detid in seen:
+                        raise ValueError(f"Detector {detid} is in groups '{seen[detid]}' and '{name}'")
+                    seen[detid] = name
+                new_groups[str(name)] = {'profile': group['profile'], 'detids': detids}
+        # Profiles still referenced by the kept groups must exist too
+        for name, group in new_groups.items():
+            if group['profile'] not in new_profiles:
+                raise ValueError(f"Group '{name}' uses unknown profile '{group['profile']}'")
+        new_default = self.default if default is None else default
+        if new_default not in new_profiles:
+            raise ValueError(f"Unknown default profile '{new_default}'")
+
+        with self._lock:
+            self.profiles, self.groups, self.default = new_profiles, new_groups, new_default
+            self.key = self._config_key()
+
+    def _config_key(self) -> str:
+        """Identify the configuration by the parameters each detector gets, not by names."""
+        resolved = {
+            'default': self.profiles[self.default],
+            'groups': sorted(json.dumps([self.profiles[group['profile']], group['detids']], sort_keys=True)
+                             for group in self.groups.values() if group['detids'])
+        }
+        return hashlib.sha1(json.dumps(resolved, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    @property
+    def is_default(self) -> bool:
+        """True when every detector uses the built-in index of engineer_features."""
+        return (self.profiles[self.default] == DEFAULT_INDEX_PROFILE
+                and not any(group['detids'] for group in self.groups.values()))
+
+    def resolved(self) -> Dict[str, Any]:
+        """Return the current configuration; configure() replaces rather than mutates it."""
+        with self._lock:
+            return {'key': self.key, 'profiles': self.profiles, 'groups': self.groups, 'default': self.default}
+
+    def _parameters(self, detids: np.ndarray, inverse: Optional[np.ndarray] = None,
+                    config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Per-row parameters for detectors given as unique ids plus row inverse, or as rows."""
+        if config is None:
+            config = {'profiles': self.profiles, 'groups': self.groups, 'default': self.default}
+        profiles, groups = config['profiles'], config['groups']
+        if not any(group['detids'] for group in groups.values()):
+            return profiles[config['default']]
+        if inverse is None:
+            detids, inverse = np.unique(np.asarray(detids), return_inverse=True)
+        names = list(DEFAULT_INDEX_PROFILE)
+        table = np.tile([profiles[config['default']][name] for name in names], (len(detids), 1))
+        for group in groups.values():
+            members = np.isin(detids, group['detids'])
+            table[members] = [profiles[group['profile']][name] for name in names]
+        # Only parameters that differ between detectors need a per-row gather
+        return {
+            name: table[:, i][inverse] if (table[:, i] != table[0, i]).any() else table[0, i]
+            for i, name in enumerate(names)
+        }
+
+    def index(self, flow, occ, speed, detids, config: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Traffic index of arbitrary rows (e.g. predictions) under `config` or the current configuration."""
+        if config:
+            params = self._parameters(np.asarray(detids), config=config)
+        else:
+            with self._lock:
+                params = self._parameters(np.asarray(detids))
+        return traffic_index_array(flow, occ, speed, params)
+
+    def bind(self, df: pd.DataFrame):
+        """Keep the input columns of a dataset and drop columns cached for the previous one."""
+        detids, inverse = np.unique(df['detid'].to_numpy(), return_inverse=True)
+        with self._lock:
+            self._inputs = {
+                'flow': df['flow'].to_numpy(dtype=np.float64),
+                'occ': df['occ'].to_numpy(dtype=np.float64),
+                'speed': df['speed'].to_numpy(dtype=np.float64),
+                'detids': detids,
+                'inverse': inverse
+            }
+            self._columns.clear()
+
+    def columns(self) -> Tuple[str, np.ndarray, np.ndarray, bool]:
+        """Return (key, traffic index, traffic category, cached) for the bound dataset."""
+        with self._lock:
+            if self._inputs is None:
+                raise ValueError("No dataset bound")
+            key = self.key
+            if key in self._columns:
+                self._columns.move_to_end(key)
+                self.hits += 1
+                return (key, *self._columns[key], True)
+            self.misses += 1
+            inputs = self._inputs
+            params = self._parameters(inputs['detids'], inputs['inverse'])
+            index = traffic_index_array(inputs['flow'], inputs['occ'], inputs['speed'], params)
+            categories = CATEGORY_LABELS[category_codes(index)]
+            self._columns[key] = (index, categories)
+            while len(self._columns) > self.max_cached:
+                self._columns.popitem(last=False)
+            return key, index, categories, False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable view of the configuration."""
+        with self._lock:
+            return {
+                'profiles': self.profiles,
+                'groups': self.groups,
+                'default': self.default,
+                'key': self.key,
+                'cache': {'entries': len(self._columns), 'hits': self.hits, 'misses': self.misses}
+            }
+
@@ -0,0 +1,191 @@
+"""Request timing and profiling instrumentation for Traffic ML Analysis."""
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus exposition style."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Record one observation."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe registry of labelled histograms and gauges rendered as Prometheus text."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms: Dict[str, Dict[Tuple, Histogram]] = {}
+        self._gauges: Dict[str, Dict[Tuple, float]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str):
+        """Attach HELP text to a metric name."""
+        self._help[name] = help_text
+
+    def observe(self, name: str, value: float, **labels):
+        """Record a histogram observation."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(self.buckets)
+            series[key].observe(value)
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Set a gauge value."""
+        with self._lock:
+            self._gauges.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    @staticmethod
+    def _labels(key: Tuple, extra: Optional[Tuple] = None) -> str:
+        pairs = list(key) + ([extra] if extra else [])
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f'# HELP {name} {self._help[name]}')
+                lines.append(f'# TYPE {name} histogram')
+                for key, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(list(hist.buckets) + ['+Inf'], hist.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{self._labels(key, ("le", bound))} {cumulative}')
+                    lines.append(f'{name}_sum{self._labels(key)} {hist.sum}')
+                    lines.append(f'{name}_count{self._labels(key)} {hist.count}')
+            for name, series in sorted(self._gauges.items()):
+                if name in self._help:
+                    lines.append(f'# HELP {name} {self._help[name]}')
+                lines.append(f'# TYPE {name} gauge')
+                for key, value in sorted(series.items()):
+                    lines.append(f'{name}{self._labels(key)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class Instrumentation:
+    """Per-route and per-stage timers plus opt-in cProfile breakdowns for a Flask app."""
+
+    REQUEST_METRIC = 'traffic_request_duration_seconds'
+    STAGE_METRIC = 'traffic_stage_duration_seconds'
+    LOAD_METRIC = 'traffic_load_stage_seconds'
+
+    def __init__(self, profiling_enabled: bool = False, profile_limit: int = 30):
+        self.registry = MetricsRegistry()
+        self.registry.describe(self.REQUEST_METRIC, 'Request latency by route.')
+        self.registry.describe(self.STAGE_METRIC, 'Time spent in each request stage by route.')
+        self.registry.describe(self.LOAD_METRIC, 'Duration of each load_data() stage at startup.')
+        self.profiling_enabled = profiling_enabled
+        self.profile_limit = profile_limit
+        # cProfile cannot run overlapping profilers; concurrent ?profile=1 requests run unprofiled
+        self._profile_lock = threading.Lock()
+        self.load_stages: Dict[str, float] = {}
+
+    def init_app(self, app):
+        """Register request hooks on a Flask app."""
+        from flask import g, request
+
+        @app.before_request
+        def _start_timer():
+            g.request_start = time.perf_counter()
+            if (self.profiling_enabled and request.args.get('profile') == '1'
+                    and self._profile_lock.acquire(blocking=False)):
+                g.profile_locked = True
+                g.profiler = cProfile.Profile()
+                g.profiler.enable()
+
+        @app.after_request
+        def _record(response):
+            profiler = g.pop('profiler', None)
+            if profiler is not None:
+                profiler.disable()
+                response = self._profile_response(response, profiler)
+            start = g.pop('request_start', None)
+            if start is not None:
+                self.registry.observe(
+                    self.REQUEST_METRIC, time.perf_counter() - start,
+                    route=request.url_rule.rule if request.url_rule else 'unmatched',
+                    method=request.method,
+                    status=response.status_code
+                )
+            return response
+
+        @app.teardown_request
+        def _release_profiler(exc):
+            # Runs even when a view raised and after_request was skipped
+            profiler = g.pop('profiler', None)
+            if profiler is not None:
+                profiler.disable()
+            if g.pop('profile_locked', False):
+                self._profile_lock.release()
+
+    def _profile_response(self, response, profiler: cProfile.Profile):
+        """Replace a response body with the profile breakdown, keeping the original JSON."""
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(self.profile_limit)
+        top = []
+        for (filename, line, func), (_, ncalls, tottime, cumtime, _) in sorted(
+                stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.profile_limit]:
+            top.append({
+                'function': f'{filename}:{line}({func})',
+                'calls': ncalls,
+                'tottime': tottime,
+                'cumtime': cumtime
+            })
+        body = response.get_json(silent=True) if response.is_json else None
+        response.set_data(json.dumps({
+            'response': body,
+            'status': response.status_code,
+            'profile': top,
+            'profile_text': stream.getvalue()
+        }))
+        response.mimetype = 'application/json'
+        return response
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a named stage of the current request (or of startup outside a request)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            from flask import has_request_context, request
+            if has_request_context() and request.url_rule is not None:
+                self.registry.observe(self.STAGE_METRIC, elapsed, route=request.url_rule.rule, stage=name)
+            else:
+                self.load_stages[name] = elapsed
+                self.registry.set_gauge(self.LOAD_METRIC, elapsed, stage=name)
+
+    def render(self) -> str:
+        """Render the metrics endpoint body."""
+        return self.registry.render()
@@ -1,36 +1,111 @@
 """ML Model module for Traffic ML Analysis."""
+import uuid
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import joblib
 from typing import Dict, Any, Optional, Tuple
 
+# scikit-learn and joblib are imported on first train/load so that workers
+# serving only statistics never pay for them at startup.
+
 class TrafficModel:
     """Random Forest model for traffic prediction."""
     
+    # detid is an identifier, not an ordinal; detectors are described by their
+    # mean flow/speed/occ here and by their coordinates when metadata exists
     FEATURE_COLUMNS = [
         'hour', 'weekday', 'month', 'is_rush_hour', 'is_weekday', 
         'is_peak_traffic', 'detector_mean_flow', 'detector_mean_speed',
-        'detector_mean_occ', 'hourly_mean_flow', 'occ', 'speed', 'detid'
+        'detector_mean_occ', 'hourly_mean_flow', 'occ', 'speed'
+    ]
+    
+    # Added by FeatureEngineer only when detector metadata is available; the
+    # neighbor flow is split into upstream/downstream only when bearings exist
+    SPATIAL_FEATURE_COLUMNS = ['lat', 'lon', 'upstream_mean_flow', 'downstream_mean_flow', 'neighbor_mean_flow']
+    
+    # Calendar and identifier features are left out of the drift profile: an
+    # ingested batch covers a few days or detectors, so their distributions
+    # always differ from the training data without the data having changed
+    UNPROFILED_COLUMNS = [
+        'hour', 'weekday', 'month', 'is_rush_hour', 'is_weekday', 'is_peak_traffic', 'detid', 'lat', 'lon'
     ]
     
     def __init__(self, n_estimators: int = 50, random_state: int = 42):
-        self.model = RandomForestRegressor(
-            n_estimators=n_estimators,
-            random_state=random_state,
-            n_jobs=-1,
-            max_depth=15,  # Limit depth for speed
-            min_samples_split=10
-        )
+        self.n_estimators = n_estimators
+        self.random_state = random_state
+        self.model = None
         self.is_trained = False
         self.feature_names = []
         self.train_size = 0
         self.test_size = 0
+        # Changes whenever the fitted estimator changes, so cached predictions can be keyed on it
+        self.version: Optional[str] = None
+        # Binned distribution of the training features, the reference for drift monitoring
+        self.feature_profile: Dict[str, Dict[str, list]] = {}
+    
+    @classmethod
+    def feature_columns(cls, df: pd.DataFrame) -> list:
+        """Return the feature columns available in a processed DataFrame."""
+        return cls.FEATURE_COLUMNS + [col for col in cls.SPATIAL_FEATURE_COLUMNS if col in df.columns]
+    
+    @classmethod
+    def build_feature_profile(cls, X: pd.DataFrame, n_bins: int = 20) -> Dict[str, Dict[str, list]]:
+        """Summarize each feature except UNPROFILED_COLUMNS as quantile bin edges and per-bin counts.
+        
+        Bin i holds values in [edges[i-1], edges[i]); bins 0 and len(edges) are open-ended.
+        """
+        profile = {}
+        quantiles = np.linspace(0, 1, n_bins + 1)
+        for col in X.columns:
+            if col in cls.UNPROFILED_COLUMNS:
+                continue
+            values = X[col].to_numpy(dtype=np.float64)
+            values = values[np.isfinite(values)]
+            if len(values) == 0:
+                continue
+            edges = np.unique(np.quantile(values, quantiles))
+            counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+            profile[col] = {'edges': edges.tolist(), 'counts': counts.tolist()}
+        return profile
+    
+    @classmethod
+    def profiled(cls, profile: Dict[str, Dict[str, list]]) -> Dict[str, Dict[str, list]]:
+        """Drop UNPROFILED_COLUMNS from a profile stored by an older model."""
+        return {name: entry for name, entry in profile.items() if name not in cls.UNPROFILED_COLUMNS}
     
-    def train(self, X: pd.DataFrame, y: pd.Series, test_size: float = 0.2, max_samples: int = 100000) -> Dict[str, Any]:
-        """Train the model and return metrics."""
+    def build_estimator(self):
+        """Create the underlying Random Forest estimator."""
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(
+            n_estimators=self.n_estimators,
+            random_state=self.random_state,
+            n_jobs=-1,
+            max_depth=15,  # Limit depth for speed
+            min_samples_split=10
+        )
+    
+    def train(self, X: pd.DataFrame, y: pd.Series, test_size: float = 0.2, max_samples: int = 100000,
+              exclude_detids: Optional[list] = None, detids: Optional[pd.Series] = None) -> Dict[str, Any]:
+        """Train the model and return metrics.
+        
+        Rows of detectors in `exclude_detids` (e.g. unhealthy ones from a
+        QualityReport) are dropped before sampling. `detids` gives the detector
+        of each row; it defaults to a detid column of X.
+        """
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+        
+        excluded_rows = 0
+        if exclude_detids:
+            if detids is None:
+                if 'detid' not in X.columns:
+                    raise ValueError("Excluding detectors needs a detid column or detids")
+                detids = X['detid']
+            keep = ~np.isin(np.asarray(detids), list(exclude_detids))
+            excluded_rows = int((~keep).sum())
+            X, y = X[keep], y[keep]
+            if len(X) == 0:
+                raise ValueError("No training rows left after excluding detectors")
+        
         # Sample data if too large (for faster training)
         total_size = len(X)
         if len(X) > max_samples:
@@ -50,10 +125,13 @@ class TrafficModel:
         self.train_size = len(X_train)
         self.test_size = len(X_test)
         self.feature_names = feature_names
+        self.feature_profile = self.build_feature_profile(X)
         
         # Train model
+        self.model = self.build_estimator()
         self.model.fit(X_train, y_train)
         self.is_trained = True
+        self.version = uuid.uuid4().hex
         
         # Calculate metrics
         y_pred = self.model.predict(X_test)
@@ -65,7 +143,8 @@ class TrafficModel:
             'train_size': self.train_size,
             'test_size': self.test_size,
             'total_size': total_size,
-            'sampled_size': len(X)
+            'sampled_size': len(X),
+            'excluded_rows': excluded_rows
         }
         
         return metrics
@@ -75,11 +154,16 @@ class TrafficModel:
         if not self.is_trained:
             raise ValueError("Model not trained yet")
         
-        # Convert to numpy array
+        # Align columns with training order, then convert to numpy array
+        if self.feature_names and all(col in X.columns for col in self.feature_names):
+            X = X[self.feature_names]
         X_array = X.values
         
         # Get predictions from all trees for confidence interval
-        predictions = np.array([tree.predict(X_array) for tree in self.model.estimators_])
+        if hasattr(self.model, 'tree_predictions'):
+            predictions = self.model.tree_predictions(X_array)
+        else:
+            predictions = np.array([tree.predict(X_array) for tree in self.model.estimators_])
         
         mean_pred = predictions.mean(axis=0)
         std_pred = predictions.std(axis=0)
@@ -117,15 +201,40 @@ class TrafficModel:
     
     def save_model(self, path: str):
         """Save model to file."""
+        import joblib
         joblib.dump({
             'model': self.model,
             'feature_names': self.feature_names,
-            'is_trained': self.is_trained
+            'is_trained': self.is_trained,
+            'feature_profile': self.feature_profile
         }, path)
     
     def load_model(self, path: str):
         """Load model from file."""
+        import joblib
         data = joblib.load(path)
         self.model = data['model']
         self.feature_names = data['feature_names']
         self.is_trained = data['is_trained']
+        self.feature_profile = self.profiled(data.get('feature_profile', {}))
+        self.version = uuid.uuid4().hex
+    
+    def save_compact(self, path: str) -> int:
+        """Save the forest as a compact memory-mappable artifact; return its size in bytes."""
+        from compact_model import CompactForest
+        if not self.is_trained:
+            raise ValueError("Model not trained yet")
+        forest = self.model
+        if not isinstance(forest, CompactForest):
+            forest = CompactForest.from_sklearn(forest)
+        forest.meta = {'feature_names': self.feature_names, 'feature_profile': self.feature_profile}
+        return forest.save(path)
+    
+    def load_compact(self, path: str):
+        """Load a compact artifact; its node arrays stay memory-mapped and shared between workers."""
+        from compact_model import CompactForest
+        self.model = CompactForest.load(path)
+        self.feature_names = self.model.meta.get('feature_names', [])
+        self.feature_profile = self.profiled(self.model.meta.get('feature_profile', {}))
+        self.is_trained = True
+        self.version = uuid.uuid4().hex
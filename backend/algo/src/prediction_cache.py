@@ -0,0 +1,67 @@
+"""Versioned prediction cache for Traffic ML Analysis."""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+
+class PredictionCache:
+    """LRU cache of prediction results tied to a single model version.
+
+    Lookups or stores with a different version than the cached one clear the
+    cache first, so results of a replaced model are never served.
+    """
+
+    def __init__(self, max_entries: int = 200000):
+        self.max_entries = max_entries
+        self.version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: Optional[str]):
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def invalidate(self):
+        """Drop all cached results (e.g. after the input data changed)."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_many(self, version: Optional[str], keys: Sequence[Hashable]) -> List[Optional[Any]]:
+        """Return cached results for `keys`, with None for misses."""
+        results = []
+        with self._lock:
+            self._check_version(version)
+            for key in keys:
+                value = self._entries.get(key)
+                if value is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                results.append(value)
+        return results
+
+    def put_many(self, version: Optional[str], keys: Sequence[Hashable], values: Sequence[Any]):
+        """Store results for `keys`, evicting the least recently used beyond max_entries."""
+        with self._lock:
+            self._check_version(version)
+            for key, value in zip(keys, values):
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a JSON-serializable summary of the cache."""
+        return {
+            'version': self.version,
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses
+        }
@@ -0,0 +1,163 @@
+"""Per-detector data quality scan for Traffic ML Analysis."""
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+# Consecutive identical flow readings from which a detector counts as stuck
+STUCK_RUN = 12
+# Highest plausible speed (km/h)
+MAX_SPEED_KMH = 250.0
+VALUE_COLUMNS = ['flow', 'occ', 'speed']
+
+# Thresholds above/below which a detector is flagged unhealthy
+THRESHOLDS = {
+    'min_coverage': 0.5,
+    'max_stuck_fraction': 0.5,
+    'max_zero_fraction': 0.95,
+    'max_impossible_fraction': 0.05,
+    'max_imputed_fraction': 0.2
+}
+
+
+class QualityReport:
+    """Health metrics of every detector, computed from raw data before imputation.
+
+    Rows are sorted once by (detid, day, interval); coverage, gaps, constant
+    runs, impossible value combinations and missing values are then counted
+    for all detectors at once with bincount and ufunc.at reductions.
+    """
+
+    def __init__(self, df: pd.DataFrame, step: Optional[int] = None,
+                 thresholds: Optional[Dict[str, float]] = None):
+        self.thresholds = {**THRESHOLDS, **(thresholds or {})}
+        det_codes, detids = pd.factorize(df['detid'], sort=True)
+        day_codes, days = pd.factorize(df['day'], sort=True)
+        interval = pd.to_numeric(df['interval'], errors='coerce').to_numpy(dtype=np.float64)
+        # Rows without a detector cannot be attributed; handle_missing_values fills them
+        assigned = det_codes >= 0
+        self.unassigned_rows = int((~assigned).sum())
+        self.n_days = len(days)
+        self.step = int(step) if step else self._infer_step(interval)
+        self.slots_per_day = max(1, 86400 // self.step)
+
+        det, day, interval = det_codes[assigned], day_codes[assigned], interval[assigned]
+        values = {col: pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)[assigned]
+                  for col in VALUE_COLUMNS}
+        # One int64 sort key; rows without a valid interval sort last within their detector and day
+        slot_key = np.where(np.isfinite(interval), interval, 86400).astype(np.int64)
+        order = np.argsort((det.astype(np.int64) * (self.n_days + 1) + day + 1) * 86401 + slot_key, kind='stable')
+        det, day, interval = det[order], day[order], interval[order]
+        values = {col: v[order] for col, v in values.items()}
+        n = len(detids)
+
+        def count(mask: np.ndarray) -> np.ndarray:
+            return np.bincount(det, weights=mask, minlength=n).astype(np.int64)
+
+        stats: Dict[str, Any] = {'rows': np.bincount(det, minlength=n)}
+
+        # Missing and infinite values, which handle_missing_values mean-imputes
+        missing = {col: ~np.isfinite(v) for col, v in values.items()}
+        for col in VALUE_COLUMNS:
+            stats[f'imputed_{col}'] = count(missing[col])
+        stats['imputed_rows'] = count(missing['flow'] | missing['occ'] | missing['speed'])
+
+        # Coverage: distinct (day, interval) slots against every slot of every day in the data
+        timed = np.isfinite(interval) & (day >= 0)
+        first = np.r_[True, (det[1:] != det[:-1]) | (day[1:] != day[:-1]) | (interval[1:] != interval[:-1])]
+        slot = first & timed
+        stats['slots'] = count(slot)
+        stats['duplicate_rows'] = count(~first & timed)
+        stats['coverage'] = np.minimum(stats['slots'] / (self.n_days * self.slots_per_day), 1.0)
+
+        # Gaps: consecutive slots of one detector and day more than one step apart
+        s_det, s_day, s_interval = det[slot], day[slot], interval[slot]
+        delta = np.diff(s_interval)
+        gap = (s_det[1:] == s_det[:-1]) & (s_day[1:] == s_day[:-1]) & (delta > self.step)
+        stats['gaps'] = np.bincount(s_det[1:][gap], minlength=n)
+        stats['max_gap_s'] = self._segment_max(s_det[1:][gap], delta[gap], n)
+
+        # Constant runs: identical consecutive flow readings (NaN never repeats)
+        flow = values['flow']
+        same = (det[1:] == det[:-1]) & (flow[1:] == flow[:-1])
+        run_id = np.cumsum(np.r_[True, ~same]) - 1
+        run_length = np.bincount(run_id)[run_id]
+        stats['longest_constant_run'] = self._segment_max(det, run_length, n)
+        stats['stuck_rows'] = count(run_length >= STUCK_RUN)
+        stats['zero_flow_rows'] = count(flow == 0)
+
+        # Physically impossible readings
+        occ, speed = values['occ'], values['speed']
+        impossible = ((flow > 0) & (speed == 0)) | (flow < 0) | (occ < 0) | (occ > 100) \
+            | (speed < 0) | (speed > MAX_SPEED_KMH)
+        stats['impossible_rows'] = count(impossible)
+
+        self.detectors = pd.DataFrame(stats, index=pd.Index(detids, name='detid'))
+        self.detectors['issues'] = self._issues(self.detectors)
+        self.detectors['healthy'] = self.detectors['issues'].map(len) == 0
+
+    @staticmethod
+    def _segment_max(groups: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+        """Per-group maximum of values whose (sorted) groups are contiguous; 0 for empty groups."""
+        result = np.zeros(n, dtype=np.int64)
+        if len(groups):
+            starts = np.r_[0, np.flatnonzero(groups[1:] != groups[:-1]) + 1]
+            result[groups[starts]] = np.maximum.reduceat(values, starts)
+        return result
+
+    @staticmethod
+    def _infer_step(interval: np.ndarray) -> int:
+        """Most common spacing between distinct interval values."""
+        distinct = np.unique(interval[np.isfinite(interval)])
+        diffs = np.diff(distinct)
+        if len(diffs) == 0:
+            return 86400
+        steps, counts = np.unique(diffs, return_counts=True)
+        return max(1, int(steps[counts.argmax()]))
+
+    def _issues(self, stats: pd.DataFrame) -> List[List[str]]:
+        t = self.thresholds
+        rows = np.maximum(stats['rows'].to_numpy(), 1)
+        flags = {
+            'low_coverage': stats['coverage'].to_numpy() < t['min_coverage'],
+            'stuck': stats['stuck_rows'].to_numpy() / rows > t['max_stuck_fraction'],
+            'zero_reporting': stats['zero_flow_rows'].to_numpy() / rows > t['max_zero_fraction'],
+            'impossible_values': stats['impossible_rows'].to_numpy() / rows > t['max_impossible_fraction'],
+            'missing_values': stats['imputed_rows'].to_numpy() / rows > t['max_imputed_fraction']
+        }
+        return [[name for name, flag in flags.items() if flag[i]] for i in range(len(stats))]
+
+    def __len__(self) -> int:
+        return len(self.detectors)
+
+    def unhealthy_detids(self) -> List:
+        return [detid.item() if hasattr(detid, 'item') else detid
+                for detid in self.detectors.index[~self.detectors['healthy']]]
+
+    def summary(self) -> Dict[str, Any]:
+        issues = {}
+        for names in self.detectors['issues']:
+            for name in names:
+                issues[name] = issues.get(name, 0) + 1
+        return {
+            'detectors': len(self.detectors),
+            'healthy': int(self.detectors['healthy'].sum()),
+            'unhealthy': int((~self.detectors['healthy']).sum()),
+            'rows': int(self.detectors['rows'].sum()) + self.unassigned_rows,
+            'unassigned_rows': self.unassigned_rows,
+            'imputed_rows': int(self.detectors['imputed_rows'].sum()),
+            'days': self.n_days,
+            'step_s': self.step,
+            'issues': issues
+        }
+
+    def records(self, healthy: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """Return per-detector metrics as JSON-serializable records."""
+        frame = self.detectors
+        if healthy is not None:
+            frame = frame[frame['healthy'] == healthy]
+        records = frame.reset_index().to_dict('records')
+        for record in records:
+            for key, value in record.items():
+                if hasattr(value, 'item'):
+                    record[key] = value.item()
+        return records
@@ -0,0 +1,116 @@
+"""Background data loading with a readiness state for Traffic ML Analysis."""
+import os
+import threading
+import time
+from typing import Callable, Dict, Any, Optional
+
+
+class BackgroundLoader:
+    """Runs a load function once in a background thread and tracks its readiness.
+
+    Threads do not survive fork(): a process forked while a load is running
+    (e.g. a gunicorn --preload worker) restarts the load on its next start().
+    """
+
+    IDLE = 'idle'
+    LOADING = 'loading'
+    READY = 'ready'
+    FAILED = 'failed'
+
+    def __init__(self, load_fn: Callable[[], Any], retry_after: int = 5):
+        self.load_fn = load_fn
+        self.retry_after = retry_after
+        self.state = self.IDLE
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Process the loading thread runs in
+        self._pid = os.getpid()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == self.READY
+
+    @property
+    def is_pending(self) -> bool:
+        """True while data has not been loaded and no load has failed yet."""
+        return self.state in (self.IDLE, self.LOADING)
+
+    def _reset_if_forked(self):
+        """Forget a load whose thread was left behind in the parent process (call under _lock)."""
+        if self.state == self.LOADING and self._pid != os.getpid():
+            self.state = self.IDLE
+            self.started_at = None
+            self._done = threading.Event()
+
+    def start(self) -> bool:
+        """Start loading in a daemon thread; return False if already started."""
+        with self._lock:
+            self._reset_if_forked()
+            if self.state != self.IDLE:
+                return False
+            self.state = self.LOADING
+            self.started_at = time.time()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='data-loader', daemon=True)
+            self._thread.start()
+            return True
+
+    def run(self) -> bool:
+        """Load synchronously in the calling thread; return True when ready."""
+        with self._lock:
+            self._reset_if_forked()
+            if self.state != self.IDLE:
+                return self.wait()
+            self.state = self.LOADING
+            self.started_at = time.time()
+            self._pid = os.getpid()
+        self._run()
+        return self.is_ready
+
+    def _run(self):
+        try:
+            result = self.load_fn()
+            if result is False:
+                self.error = 'Data load failed'
+                self.state = self.FAILED
+            else:
+                self.state = self.READY
+        except Exception as e:
+            self.error = str(e)
+            self.state = self.FAILED
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+    def mark_ready(self):
+        """Mark data as loaded by other means (e.g. injected in tests or benchmarks)."""
+        with self._lock:
+            now = time.time()
+            self.started_at = self.started_at or now
+            self.finished_at = now
+            self.error = None
+            self.state = self.READY
+            self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until loading finishes or `timeout` elapses; return True when ready."""
+        if self.state == self.IDLE:
+            return False
+        self._done.wait(timeout)
+        return self.is_ready
+
+    def status(self) -> Dict[str, Any]:
+        """Return a JSON-serializable readiness summary."""
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            'status': self.state,
+            'ready': self.is_ready,
+            'error': self.error,
+            'load_seconds': elapsed
+        }
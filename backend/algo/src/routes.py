@@ -0,0 +1,189 @@
+"""Route travel-time estimation over detector chains for Traffic ML Analysis."""
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Speed assumed where a detector has no reading at all (km/h)
+FREE_FLOW_KMH = 50.0
+# Lower bound on speeds so stopped traffic does not give infinite travel times (km/h)
+MIN_SPEED_KMH = 5.0
+# Bureau of Public Roads volume-delay function t = t0 * (1 + ALPHA * (v / c) ** BETA)
+BPR_ALPHA = 0.15
+BPR_BETA = 4.0
+FREE_FLOW_QUANTILE = 0.85
+CAPACITY_QUANTILE = 0.95
+
+
+def segment_seconds(lengths_m: np.ndarray, speeds_kmh: np.ndarray) -> np.ndarray:
+    """Travel time in seconds of segments of the given lengths at the given speeds."""
+    return lengths_m / (np.maximum(speeds_kmh, MIN_SPEED_KMH) / 3.6)
+
+
+class RouteRegistry:
+    """User-defined routes: ordered detector ids, each covering a segment of known length."""
+
+    def __init__(self):
+        self.routes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    def __contains__(self, route_id) -> bool:
+        return str(route_id) in self.routes
+
+    def register(self, route_id, detids: List[int], lengths_m: List[float],
+                 name: Optional[str] = None) -> Dict[str, Any]:
+        """Add or replace a route; `lengths_m[i]` is the segment length covered by `detids[i]`."""
+        detids = [int(detid) for detid in detids]
+        lengths = [float(length) for length in lengths_m]
+        if not detids:
+            raise ValueError("A route needs at least one detector")
+        if len(lengths) != len(detids):
+            raise ValueError("lengths_m must have one length per detector")
+        if not all(length > 0 for length in lengths):
+            raise ValueError("Segment lengths must be positive")
+        route = {'id': str(route_id), 'name': name or str(route_id), 'detids': detids, 'lengths_m': lengths}
+        # Changes whenever the route definition changes, so cached results can be keyed on it
+        route['signature'] = hashlib.sha1(json.dumps([detids, lengths]).encode('utf-8')).hexdigest()[:16]
+        with self._lock:
+            self.routes[route['id']] = route
+        return route
+
+    def get(self, route_id) -> Dict[str, Any]:
+        """Return a route; raises KeyError for unknown ids."""
+        return self.routes[str(route_id)]
+
+    def load(self, path: str) -> int:
+        """Register routes from a JSON file mapping ids to {"detids", "lengths_m", "name"}."""
+        with open(path) as f:
+            routes = json.load(f)
+        for route_id, route in routes.items():
+            self.register(route_id, route['detids'], route['lengths_m'], route.get('name'))
+        return len(routes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {route_id: dict(route) for route_id, route in self.routes.items()}
+
+
+def _route_positions(route: Dict[str, Any], detids: np.ndarray) -> np.ndarray:
+    """Position of each route detector in a sorted detid array, -1 when absent."""
+    route_detids = np.asarray(route['detids'])
+    pos = np.searchsorted(detids, route_detids)
+    found = pos < len(detids)
+    found[found] = detids[pos[found]] == route_detids[found]
+    return np.where(found, pos, -1)
+
+
+def historical_travel_times(df: pd.DataFrame, route: Dict[str, Any], cube) -> Dict[str, Any]:
+    """Travel time of the route for every (day, interval) in `df`, in one vectorized pass.
+
+    Readings are averaged into a time x detector speed matrix with bincount.
+    Detectors without a reading in an interval take their weekday x hour mean
+    from the congestion cube, then their overall mean, then FREE_FLOW_KMH.
+    """
+    route_detids = np.unique(route['detids'])
+    rows = df[df['detid'].isin(route_detids)]
+    days, day_codes = np.unique(rows['day'].to_numpy().astype(str), return_inverse=True)
+    times, time_codes = np.unique(day_codes * 86400 + rows['interval'].to_numpy(dtype=np.int64),
+                                  return_inverse=True)
+    det = np.searchsorted(route_detids, rows['detid'].to_numpy())
+    n_times, n_dets = len(times), len(route_detids)
+
+    speed = rows['speed'].to_numpy(dtype=np.float64)
+    valid = np.isfinite(speed)
+    cell = time_codes * n_dets + det
+    sums = np.bincount(cell[valid], weights=speed[valid], minlength=n_times * n_dets).reshape(n_times, n_dets)
+    counts = np.bincount(cell[valid], minlength=n_times * n_dets).reshape(n_times, n_dets)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        speeds = sums / counts
+
+    # Fallbacks by weekday and hour of each time slot
+    day_of_time = times // 86400
+    interval = times % 86400
+    weekday = pd.to_datetime(pd.Series(days)).dt.weekday.to_numpy()[day_of_time] if len(days) else day_of_time
+    hour = np.minimum(interval // 3600, cube.n_hours - 1)
+    cube_pos = _route_positions({'detids': route_detids}, cube.detids)
+    known = cube_pos >= 0
+    fallback = np.full((n_times, n_dets), FREE_FLOW_KMH)
+    if known.any():
+        cell_means = cube.cell_means['speed'][cube_pos[known]]
+        detector_means = cube.detector_means['speed'][cube_pos[known]]
+        profile = cell_means[:, weekday, hour].T
+        profile = np.where(np.isnan(profile), detector_means, profile)
+        fallback[:, known] = np.where(np.isnan(profile), FREE_FLOW_KMH, profile)
+    observed = ~np.isnan(speeds)
+    speeds = np.where(observed, speeds, fallback)
+
+    # Route order may repeat detectors; map each segment to its matrix column
+    columns = np.searchsorted(route_detids, route['detids'])
+    lengths = np.asarray(route['lengths_m'])
+    seconds = segment_seconds(lengths, speeds[:, columns]).sum(axis=1)
+    observed_fraction = (observed[:, columns] * lengths).sum(axis=1) / lengths.sum()
+    return {
+        'day': days[day_of_time].tolist(),
+        'interval': interval.tolist(),
+        'travel_time_s': seconds.tolist(),
+        'observed_fraction': observed_fraction.tolist(),
+        'summary': _summary(seconds, route)
+    }
+
+
+def profile_travel_times(cube, route: Dict[str, Any]) -> Dict[str, Any]:
+    """Weekday x hour travel times of the route from the congestion cube's mean speeds."""
+    pos = _route_positions(route, cube.detids)
+    known = pos >= 0
+    speeds = np.full((len(pos), 7, cube.n_hours), FREE_FLOW_KMH)
+    if known.any():
+        means = cube.cell_means['speed'][pos[known]]
+        detector_means = cube.detector_means['speed'][pos[known]][:, None, None]
+        means = np.where(np.isnan(means), detector_means, means)
+        speeds[known] = np.where(np.isnan(means), FREE_FLOW_KMH, means)
+    lengths = np.asarray(route['lengths_m'])[:, None, None]
+    seconds = segment_seconds(lengths, speeds).sum(axis=0)
+    return {'travel_time_s': seconds.tolist(), 'summary': _summary(seconds.ravel(), route)}
+
+
+def bpr_parameters(df: pd.DataFrame, route: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Free-flow speed and capacity per route segment from observed speeds and flows."""
+    rows = df[df['detid'].isin(route['detids'])]
+    grouped = rows.groupby('detid')
+    free_flow = grouped['speed'].quantile(FREE_FLOW_QUANTILE).reindex(route['detids'])
+    capacity = grouped['flow'].quantile(CAPACITY_QUANTILE).reindex(route['detids'])
+    return {
+        'free_flow_kmh': free_flow.fillna(FREE_FLOW_KMH).clip(lower=MIN_SPEED_KMH).to_numpy(dtype=np.float64),
+        'capacity': capacity.to_numpy(dtype=np.float64)
+    }
+
+
+def predicted_travel_times(route: Dict[str, Any], flows: np.ndarray,
+                           parameters: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Weekday x hour travel times from predicted flows (segments x 7 x hours) with the BPR function.
+
+    Segments without a usable capacity keep their free-flow travel time.
+    """
+    lengths = np.asarray(route['lengths_m'])[:, None, None]
+    free_flow = segment_seconds(lengths, parameters['free_flow_kmh'][:, None, None])
+    capacity = parameters['capacity'][:, None, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.where(capacity > 0, np.maximum(flows, 0) / capacity, 0.0)
+    ratio = np.nan_to_num(ratio, nan=0.0)
+    seconds = (free_flow * (1 + BPR_ALPHA * ratio ** BPR_BETA)).sum(axis=0)
+    return {'travel_time_s': seconds.tolist(), 'summary': _summary(seconds.ravel(), route)}
+
+
+def _summary(seconds: np.ndarray, route: Dict[str, Any]) -> Dict[str, Any]:
+    length = float(sum(route['lengths_m']))
+    if len(seconds) == 0:
+        return {'length_m': length, 'mean_s': None, 'min_s': None, 'p95_s': None}
+    return {
+        'length_m': length,
+        'mean_s': float(seconds.mean()),
+        'min_s': float(seconds.min()),
+        'p95_s': float(np.quantile(seconds, 0.95))
+    }
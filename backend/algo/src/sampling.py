@@ -0,0 +1,133 @@
+"""Stratified samples and estimators for approximate queries in Traffic ML Analysis."""
+import copy
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Hashable, Optional, Tuple
+
+# Two-sided 95% normal quantile
+Z_95 = 1.96
+
+Estimate = Tuple[float, float, float]
+
+
+class StratifiedSample:
+    """Up to `per_stratum` random rows from every detid x weekday x hour stratum.
+
+    Each sampled row carries the weight N_h / n_h of its stratum. Means are
+    estimated with the weighted ratio estimator and totals with the weighted
+    sum; both get linearized stratified variances (with finite population
+    correction) for normal-approximation confidence intervals. Filtering the
+    sample to a domain keeps the per-stratum sizes of the full sample, so
+    filtered estimates remain valid domain estimates.
+    """
+
+    STRATA = ['detid', 'weekday', 'hour']
+    STRATUM_COLUMN = '_stratum'
+    WEIGHT_COLUMN = '_weight'
+
+    def __init__(self, df: pd.DataFrame, per_stratum: int = 10, seed: int = 42):
+        codes = df.groupby(self.STRATA, sort=False).ngroup().to_numpy()
+        self.population = np.bincount(codes).astype(np.float64)
+        self.per_stratum = per_stratum
+
+        # Rank rows within their stratum in random order and keep the first per_stratum
+        rng = np.random.default_rng(seed)
+        order = np.lexsort((rng.random(len(codes)), codes))
+        starts = np.r_[0, np.cumsum(self.population)[:-1]].astype(np.int64)
+        rank = np.arange(len(order)) - starts[codes[order]]
+        # Sorted positions keep the source order (e.g. sorted by day) in the sample
+        keep = np.sort(order[rank < per_stratum])
+
+        self.sampled = np.minimum(self.population, per_stratum)
+        # Source positions of the sampled rows, to carry later column updates over
+        self.rows = keep
+        self.frame = df.iloc[keep].reset_index(drop=True)
+        self.frame[self.STRATUM_COLUMN] = codes[keep]
+        self.frame[self.WEIGHT_COLUMN] = (self.population / self.sampled)[codes[keep]]
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def population_rows(self) -> int:
+        return int(self.population.sum())
+
+    def estimate_rows(self, frame: pd.DataFrame) -> float:
+        """Estimated number of population rows represented by a filtered sample frame."""
+        return float(frame[self.WEIGHT_COLUMN].sum())
+
+    def _estimate(self, frame: pd.DataFrame, y: np.ndarray, by: Optional[str],
+                  ratio: bool) -> Dict[Hashable, Estimate]:
+        """Weighted totals (or ratio means) of y per group, with stratified 95% intervals.
+
+        Variances are linearized: each row contributes z = y (totals) or
+        z = (y - mean) / total weight (means), and rows outside a group
+        contribute 0, which is why only per-stratum sums of z and z^2 are needed.
+        """
+        if by:
+            groups, labels = pd.factorize(frame[by], sort=True)
+        else:
+            groups, labels = np.zeros(len(frame), dtype=np.int64), [0]
+        n_groups, n_strata = len(labels), len(self.population)
+        w = frame[self.WEIGHT_COLUMN].to_numpy()
+        strata = frame[self.STRATUM_COLUMN].to_numpy()
+        valid = ~np.isnan(y) & (groups >= 0)
+        groups, strata, w, y = groups[valid], strata[valid], w[valid], y[valid]
+
+        weights = np.bincount(groups, weights=w, minlength=n_groups)
+        totals = np.bincount(groups, weights=w * y, minlength=n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if ratio:
+                estimates = totals / weights
+                z = (y - estimates[groups]) / weights[groups]
+            else:
+                estimates = totals
+                z = y
+            cell = groups * n_strata + strata
+            sums = np.bincount(cell, weights=z, minlength=n_groups * n_strata).reshape(n_groups, n_strata)
+            squares = np.bincount(cell, weights=z * z, minlength=n_groups * n_strata).reshape(n_groups, n_strata)
+            n, N = self.sampled, self.population
+            s2 = (squares - sums ** 2 / n) / (n - 1)
+            terms = N ** 2 * (1 - n / N) * s2 / n
+        # Fully sampled strata and single-row strata contribute no estimable variance
+        variances = terms[:, (n > 1) & (n < N)].sum(axis=1)
+        half = Z_95 * np.sqrt(np.maximum(variances, 0.0))
+
+        results = {}
+        for g, label in enumerate(labels):
+            if weights[g] == 0:
+                continue
+            key = label.item() if hasattr(label, 'item') else label
+            results[key] = (float(estimates[g]), float(estimates[g] - half[g]), float(estimates[g] + half[g]))
+        return results
+
+    def mean(self, frame: pd.DataFrame, column: str, by: Optional[str] = None) -> Dict[Hashable, Estimate]:
+        """Estimate the mean of a column (per group of `by`) with a 95% interval."""
+        return self._estimate(frame, frame[column].to_numpy(dtype=np.float64), by, ratio=True)
+
+    def count(self, frame: pd.DataFrame, by: Optional[str] = None) -> Dict[Hashable, Estimate]:
+        """Estimate the number of population rows (per group of `by`) with a 95% interval."""
+        return self._estimate(frame, np.ones(len(frame)), by, ratio=False)
+
+    @staticmethod
+    def split(estimates: Dict[Hashable, Estimate]) -> Tuple[Dict[Hashable, float], Dict[Hashable, list]]:
+        """Split estimates into point values and [low, high] intervals."""
+        values = {key: est for key, (est, _, _) in estimates.items()}
+        intervals = {key: [low, high] for key, (_, low, high) in estimates.items()}
+        return values, intervals
+
+    def with_columns(self, columns: Dict[str, np.ndarray]) -> 'StratifiedSample':
+        """Return a copy whose frame takes new values of source-length columns."""
+        sample = copy.copy(self)
+        sample.frame = self.frame.copy(deep=False)
+        for name, values in columns.items():
+            sample.frame[name] = np.asarray(values)[self.rows]
+        return sample
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'sample_rows': len(self.frame),
+            'population_rows': self.population_rows,
+            'strata': len(self.population),
+            'per_stratum': self.per_stratum
+        }
@@ -0,0 +1,74 @@
+"""Immutable serving state for Traffic ML Analysis."""
+import threading
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Everything a request reads: dataset, indexes, aggregates and models.
+
+    A snapshot is never changed after it is published. Its frames, cube and
+    sample are shared with later snapshots and must be treated as read-only;
+    writers build replacements and publish a new snapshot instead.
+    """
+
+    df_raw: Any = None
+    df_processed: Any = None
+    detector_index: Any = None
+    day_offsets: Any = None
+    congestion_cube: Any = None
+    prediction_lookup: Any = None
+    # Training-data aggregates for featurizing raw batches (FeatureEngineer.feature_aggregates)
+    feature_aggregates: Any = None
+    approx_sample: Any = None
+    approx_offsets: Any = None
+    quality_report: Any = None
+    # Unsampled per-detector flow series the forecaster trains and forecasts on
+    # (TrafficForecaster.build_series)
+    flow_series: Any = None
+    # Changes on every (re)load, so results derived from the data can be cached per dataset
+    dataset_version: Optional[str] = None
+    # Traffic-index configuration the index columns were computed with (see IndexProfiles.resolved)
+    index_config: Dict[str, Any] = field(default_factory=dict)
+    traffic_model: Any = None
+    # Drift monitor against traffic_model's training profile; published with the model
+    drift_monitor: Any = None
+    traffic_forecaster: Any = None
+    # Incremented by every publish
+    generation: int = 0
+
+    @property
+    def model_version(self) -> Optional[str]:
+        return self.traffic_model.version if self.traffic_model is not None else None
+
+    @property
+    def index_key(self) -> Optional[str]:
+        return self.index_config.get('key')
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the snapshot fields by name."""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+class SnapshotStore:
+    """Holds the current snapshot; readers take it once, writers replace it atomically.
+
+    current() is a single reference read, so readers never lock. Writers that
+    derive a snapshot from the current one hold `write_lock` across the whole
+    read-modify-publish sequence so concurrent writers cannot lose updates.
+    """
+
+    def __init__(self, snapshot: Optional[Snapshot] = None):
+        self._current = snapshot if snapshot is not None else Snapshot()
+        self.write_lock = threading.RLock()
+
+    def current(self) -> Snapshot:
+        return self._current
+
+    def publish(self, **changes) -> Snapshot:
+        """Publish a copy of the current snapshot with some fields replaced."""
+        with self.write_lock:
+            snapshot = replace(self._current, generation=self._current.generation + 1, **changes)
+            self._current = snapshot
+        return snapshot
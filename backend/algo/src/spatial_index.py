@@ -0,0 +1,159 @@
+"""Spatial index module for detector metadata."""
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Optional, Tuple
+
+EARTH_RADIUS_M = 6371000.0
+
+
+class DetectorIndex:
+    """Uniform grid index over detector coordinates for bbox and nearest-neighbor queries."""
+
+    def __init__(self, detectors: pd.DataFrame, cell_size: float = 0.005):
+        detectors = detectors.drop_duplicates('detid').reset_index(drop=True)
+        self.detids = detectors['detid'].to_numpy()
+        self.lat = detectors['lat'].to_numpy(dtype=float)
+        self.lon = detectors['lon'].to_numpy(dtype=float)
+        self.bearing = (
+            detectors['bearing'].to_numpy(dtype=float) if 'bearing' in detectors.columns else None
+        )
+        self.cell_size = cell_size
+
+        # Bucket detectors by grid cell; each cell keeps the positions of its detectors
+        rows = np.floor(self.lat / cell_size).astype(np.int64)
+        cols = np.floor(self.lon / cell_size).astype(np.int64)
+        order = np.lexsort((cols, rows))
+        self._cells: Dict[Tuple[int, int], np.ndarray] = {}
+        if len(order) > 0:
+            sorted_rows, sorted_cols = rows[order], cols[order]
+            breaks = np.flatnonzero((np.diff(sorted_rows) != 0) | (np.diff(sorted_cols) != 0)) + 1
+            for start, end in zip(np.r_[0, breaks], np.r_[breaks, len(order)]):
+                self._cells[(int(sorted_rows[start]), int(sorted_cols[start]))] = order[start:end]
+            self._row_range = (int(rows.min()), int(rows.max()))
+            self._col_range = (int(cols.min()), int(cols.max()))
+
+    def __len__(self) -> int:
+        return len(self.detids)
+
+    def _cell_of(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Return the grid cell containing a coordinate."""
+        return int(np.floor(lat / self.cell_size)), int(np.floor(lon / self.cell_size))
+
+    def _candidates(self, row0: int, row1: int, col0: int, col1: int) -> np.ndarray:
+        """Collect detector positions from all cells in an inclusive cell range."""
+        if (row1 - row0 + 1) * (col1 - col0 + 1) > len(self._cells):
+            found = [pos for (r, c), pos in self._cells.items() if row0 <= r <= row1 and col0 <= c <= col1]
+        else:
+            found = [self._cells[(r, c)] for r in range(row0, row1 + 1)
+                     for c in range(col0, col1 + 1) if (r, c) in self._cells]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def _distances(self, lat: float, lon: float, positions: np.ndarray) -> np.ndarray:
+        """Equirectangular distance in meters from a point to the given detectors."""
+        dy = np.radians(self.lat[positions] - lat)
+        dx = np.radians(self.lon[positions] - lon) * np.cos(np.radians(lat))
+        return EARTH_RADIUS_M * np.hypot(dx, dy)
+
+    def records(self, positions: np.ndarray, distances: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Convert detector positions to JSON-serializable records."""
+        result = []
+        for i, pos in enumerate(positions):
+            record = {
+                'detid': int(self.detids[pos]),
+                'lat': float(self.lat[pos]),
+                'lon': float(self.lon[pos])
+            }
+            if distances is not None:
+                record['distance_m'] = float(distances[i])
+            result.append(record)
+        return result
+
+    def query_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Return positions of detectors inside a bounding box."""
+        if not self._cells:
+            return np.empty(0, dtype=np.int64)
+        row0, col0 = self._cell_of(min_lat, min_lon)
+        row1, col1 = self._cell_of(max_lat, max_lon)
+        positions = self._candidates(row0, row1, col0, col1)
+        inside = ((self.lat[positions] >= min_lat) & (self.lat[positions] <= max_lat) &
+                  (self.lon[positions] >= min_lon) & (self.lon[positions] <= max_lon))
+        return np.sort(positions[inside])
+
+    def within(self, lat: float, lon: float, radius_m: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Return positions and distances of detectors within a radius, nearest first."""
+        dlat = np.degrees(radius_m / EARTH_RADIUS_M)
+        dlon = dlat / max(np.cos(np.radians(lat)), 1e-6)
+        row0, col0 = self._cell_of(lat - dlat, lon - dlon)
+        row1, col1 = self._cell_of(lat + dlat, lon + dlon)
+        positions = self._candidates(row0, row1, col0, col1)
+        distances = self._distances(lat, lon, positions)
+        keep = distances <= radius_m
+        order = np.argsort(distances[keep], kind='stable')
+        return positions[keep][order], distances[keep][order]
+
+    def nearest(self, lat: float, lon: float, k: int = 1,
+                max_distance_m: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return positions and distances of the k nearest detectors, nearest first."""
+        if not self._cells or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        row, col = self._cell_of(lat, lon)
+        # Any detector outside ring r is at least r cells away along one axis
+        ring_m = np.radians(self.cell_size) * EARTH_RADIUS_M * np.cos(np.radians(lat))
+        max_ring = max(abs(row - self._row_range[0]), abs(row - self._row_range[1]),
+                       abs(col - self._col_range[0]), abs(col - self._col_range[1]))
+        ring = 0
+        while True:
+            positions = self._candidates(row - ring, row + ring, col - ring, col + ring)
+            distances = self._distances(lat, lon, positions)
+            if max_distance_m is not None:
+                keep = distances <= max_distance_m
+                positions, distances = positions[keep], distances[keep]
+            order = np.argsort(distances, kind='stable')[:k]
+            if ring >= max_ring:
+                break
+            if len(order) == k and distances[order[-1]] <= ring * ring_m:
+                break
+            if max_distance_m is not None and ring * ring_m > max_distance_m:
+                break
+            ring += 1
+        return positions[order], distances[order]
+
+    def neighbor_pairs(self, radius_m: float, max_neighbors: int = 8) -> pd.DataFrame:
+        """Build (detid, neighbor_detid, side) pairs for detectors within a radius.
+
+        With a 'bearing' column (direction of travel, degrees clockwise from north)
+        neighbors ahead are 'downstream' and neighbors behind are 'upstream'. Without
+        it there is no direction to split by and every neighbor has side 'neighbor'.
+        """
+        det_pos, nbr_pos = [], []
+        for pos in range(len(self.detids)):
+            found, _ = self.within(self.lat[pos], self.lon[pos], radius_m)
+            found = found[found != pos][:max_neighbors]
+            det_pos.append(np.full(len(found), pos))
+            nbr_pos.append(found)
+        det_pos = np.concatenate(det_pos) if det_pos else np.empty(0, dtype=np.int64)
+        nbr_pos = np.concatenate(nbr_pos) if nbr_pos else np.empty(0, dtype=np.int64)
+
+        if self.bearing is not None:
+            heading = np.radians(self.bearing[det_pos])
+            dx = (self.lon[nbr_pos] - self.lon[det_pos]) * np.cos(np.radians(self.lat[det_pos]))
+            dy = self.lat[nbr_pos] - self.lat[det_pos]
+            ahead = dx * np.sin(heading) + dy * np.cos(heading) > 0
+            side = np.where(ahead, 'downstream', 'upstream')
+        else:
+            side = np.full(len(det_pos), 'neighbor', dtype=object)
+
+        return pd.DataFrame({
+            'detid': self.detids[det_pos],
+            'neighbor_detid': self.detids[nbr_pos],
+            'side': side
+        })
+
+    @property
+    def neighbor_sides(self) -> List[str]:
+        """Sides neighbor_pairs reports: upstream/downstream with bearings, otherwise 'neighbor'."""
+        return ['upstream', 'downstream'] if self.bearing is not None else ['neighbor']
+
+    def coordinates(self) -> pd.DataFrame:
+        """Return detector coordinates as a DataFrame for merging."""
+        return pd.DataFrame({'detid': self.detids, 'lat': self.lat, 'lon': self.lon})
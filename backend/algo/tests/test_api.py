@@ -84,3 +84,25 @@ def test_features_no_model(client):
     
     response = client.get('/api/features')
     assert response.status_code == 400
+
+@pytest.mark.parametrize('args', [
+    {'start_date': '2016-09-27'},
+    {'end_date': '2016-09-27'},
+    {'start_date': '2016-09-26', 'end_date': '2016-09-28', 'detid': '2'},
+    {'start_date': '2016-09-29', 'hour_start': '1'},
+    {'start_date': '2016-10-05'},
+])
+def test_filter_data_day_offsets_match_mask(args):
+    """Test date slicing with day offsets gives the same rows as full-scan masking."""
+    import app as app_module
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({
+        'day': rng.choice(['2016-09-26', '2016-09-27', '2016-09-28', '2016-10-01'], 200),
+        'detid': rng.randint(1, 4, 200),
+        'hour': rng.randint(0, 24, 200)
+    })
+    sorted_df, offsets = app_module.index_days(df)
+
+    expected = app_module.filter_data(sorted_df, args)
+    result = app_module.filter_data(sorted_df, args, offsets)
+    pd.testing.assert_frame_equal(result, expected)
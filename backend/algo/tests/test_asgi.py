@@ -0,0 +1,99 @@
+"""Unit tests for the ASGI serving mode."""
+import asyncio
+import threading
+import time
+import pytest
+from flask import Flask, jsonify, request
+
+import sys
+sys.path.insert(0, 'src')
+from asgi import AsgiAdapter, SingleFlight
+
+
+@pytest.fixture
+def flask_app():
+    app = Flask(__name__)
+    app.calls = 0
+    lock = threading.Lock()
+
+    @app.route('/api/slow')
+    def slow():
+        with lock:
+            app.calls += 1
+        time.sleep(0.1)
+        return jsonify({'query': request.args.get('q'), 'calls': app.calls})
+
+    @app.route('/api/echo', methods=['POST'])
+    def echo():
+        with lock:
+            app.calls += 1
+        return jsonify(request.get_json())
+
+    return app
+
+
+async def call(adapter, method='GET', path='/api/slow', query=b'', body=b'', headers=None):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query,
+        'headers': headers or [], 'http_version': '1.1', 'scheme': 'http',
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 5000), 'root_path': ''
+    }
+    await adapter(scope, receive, send)
+    return messages[0]['status'], dict(messages[0]['headers']), messages[1]['body']
+
+
+def test_identical_gets_are_collapsed(flask_app):
+    """Test concurrent identical GET requests run the route once."""
+    adapter = AsgiAdapter(flask_app, max_workers=4)
+
+    async def burst():
+        return await asyncio.gather(*[call(adapter, query=b'q=1') for _ in range(5)])
+
+    results = asyncio.run(burst())
+    assert flask_app.calls == 1
+    assert all(status == 200 for status, _, _ in results)
+    assert len({body for _, _, body in results}) == 1
+    assert b'"query":"1"' in results[0][2].replace(b' ', b'')
+
+
+def test_different_queries_and_posts_run_separately(flask_app):
+    """Test different query strings and POST requests are not deduplicated."""
+    adapter = AsgiAdapter(flask_app, max_workers=4)
+
+    async def burst():
+        return await asyncio.gather(
+            call(adapter, query=b'q=1'),
+            call(adapter, query=b'q=2'),
+            call(adapter, method='POST', path='/api/echo', body=b'{"a": 1}',
+                 headers=[(b'content-type', b'application/json')]),
+            call(adapter, method='POST', path='/api/echo', body=b'{"a": 1}',
+                 headers=[(b'content-type', b'application/json')])
+        )
+
+    results = asyncio.run(burst())
+    assert flask_app.calls == 4
+    assert results[2][1][b'content-type'] == b'application/json'
+
+
+def test_single_flight_propagates_errors():
+    """Test a failing shared call raises for every waiter and is then forgotten."""
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(flight.do('k', fail), flight.do('k', fail), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(flight) == 0
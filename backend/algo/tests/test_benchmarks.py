@@ -0,0 +1,148 @@
+"""Unit tests for the benchmark suite helpers."""
+import pytest
+import pandas as pd
+import numpy as np
+from hypothesis import given, strategies as st, settings
+
+import sys
+sys.path.insert(0, '.')
+from benchmarks.synthetic import generate_torino_like, parse_size
+from benchmarks.run_benchmarks import compare
+from src.data_loader import DataLoader
+
+
+@given(
+    n_rows=st.integers(min_value=1, max_value=5000),
+    n_detectors=st.integers(min_value=1, max_value=20),
+    n_days=st.integers(min_value=1, max_value=5)
+)
+@settings(max_examples=50, deadline=None)
+def test_generator_shape_and_ranges(n_rows, n_detectors, n_days):
+    """Generated data should have the requested size and valid torino-like values."""
+    df = generate_torino_like(n_rows, n_detectors, n_days)
+
+    assert len(df) == n_rows
+    assert DataLoader().validate_data(df)
+    assert df['interval'].between(0, 86399).all()
+    assert df['detid'].between(1, n_detectors).all()
+    assert (df['flow'] >= 0).all()
+    assert df['occ'].between(0, 100).all()
+    assert not df.duplicated(['day', 'detid', 'interval']).any()
+
+
+def test_generator_missing_ratio():
+    """Test missing values are injected when requested."""
+    df = generate_torino_like(10000, missing_ratio=0.1)
+    assert 0.05 < df['flow'].isna().mean() < 0.15
+
+
+def test_parse_size():
+    """Test row-count suffixes are expanded."""
+    assert parse_size('10k') == 10_000
+    assert parse_size('1.5m') == 1_500_000
+    assert parse_size('2500') == 2500
+
+
+def test_compare_flags_regressions():
+    """Test only entries slower than the threshold are reported."""
+    baseline = {'runs': {'1000': {'stages': {'load_csv': {'median_s': 1.0}, 'train': {'median_s': 2.0}},
+                                  'routes': {}}}}
+    results = {'runs': {'1000': {'stages': {'load_csv': {'median_s': 1.1}, 'train': {'median_s': 3.0}},
+                                 'routes': {}}}}
+    regressions = compare(results, baseline, threshold=1.25)
+    assert [r['name'] for r in regressions] == ['train']
+
+
+def test_loadtest_parsing_and_summary():
+    """Test gunicorn configurations, scenario weights and percentile summaries."""
+    from benchmarks.loadtest import parse_config, parse_mix, summarize
+
+    assert parse_config('sync:4') == {'worker_class': 'sync', 'workers': 4, 'threads': 1, 'name': 'sync-w4'}
+    assert parse_config('gthread:2x8')['name'] == 'gthread-w2-t8'
+    with pytest.raises(ValueError):
+        parse_config('sync:2x4')
+    with pytest.raises(ValueError):
+        parse_config('eventlet:2')
+    assert parse_mix('filter=3,predict=1') == {'filter': 0.75, 'predict': 0.25}
+    with pytest.raises(ValueError):
+        parse_mix('browse=1')
+
+    stats = summarize([i / 1000 for i in range(1, 101)], elapsed=2.0, errors=1)
+    assert stats['requests'] == 100 and stats['errors'] == 1
+    assert stats['median_s'] == pytest.approx(0.0505)
+    assert stats['p99_s'] == pytest.approx(0.09901)
+    assert stats['throughput_rps'] == 50.0
+    assert summarize([], 1.0)['p95_s'] is None
+
+
+def test_loadtest_rss_of_children():
+    """Test worker memory is read from /proc for child processes."""
+    import os
+    import subprocess
+    from benchmarks.loadtest import read_rss_mb, child_pids
+
+    if not os.path.exists('/proc/self/status'):
+        pytest.skip('/proc not available')
+    child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(5)'])
+    try:
+        assert child.pid in child_pids(os.getpid())
+        assert read_rss_mb(child.pid) > 0
+    finally:
+        child.kill()
+        child.wait()
+    assert read_rss_mb(-1) is None
+
+
+def test_loadtest_replays_dashboard_mix(monkeypatch):
+    """Test the session scenarios succeed against the app served over HTTP."""
+    import threading
+    from werkzeug.serving import make_server
+    from benchmarks.loadtest import run_load
+
+    monkeypatch.setenv('TRAFFIC_LOAD_MODE', 'lazy')
+    sys.path.insert(0, 'src')
+    import app as app_module
+    from feature_engineering import FeatureEngineer
+    from model import TrafficModel
+
+    processed = FeatureEngineer().engineer_features(generate_torino_like(5000, 5, 2))
+    model = TrafficModel(n_estimators=3)
+    model.train(processed[TrafficModel.feature_columns(processed)], processed['flow'])
+    app_module.use_data(processed, processed, model=model)
+
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        days = sorted(processed['day'].astype(str).unique())
+        result = run_load(f'http://127.0.0.1:{server.server_port}', days, 5,
+                          {'filter': 0.8, 'predict': 0.2}, concurrency=2, duration=1.0)
+    finally:
+        server.shutdown()
+        thread.join()
+    assert result['total']['errors'] == 0 and result['total']['requests'] > 0
+    assert set(result['routes']) <= {'GET /api/statistics', 'GET /api/analysis', 'GET /api/data',
+                                     'POST /api/predict'}
+    assert result['routes']['GET /api/statistics']['requests'] == result['scenarios']['filter']['requests']
+
+
+def test_benchmarks_refuse_to_overwrite_baseline(tmp_path):
+    """Test the baseline is not used as the output file, before any benchmark runs."""
+    from benchmarks.run_benchmarks import main
+
+    baseline = tmp_path / 'results.json'
+    baseline.write_text('{"runs": {}}')
+    with pytest.raises(SystemExit):
+        main(['--baseline', str(baseline), '--output', str(baseline)])
+    assert baseline.read_text() == '{"runs": {}}'
+
+
+def test_loadtest_refuses_to_overwrite_baseline(tmp_path):
+    """Test the baseline is not used as the output file, before any load is generated."""
+    from benchmarks.loadtest import main
+
+    baseline = tmp_path / 'load_results.json'
+    baseline.write_text('{"runs": {}}')
+    with pytest.raises(SystemExit):
+        main(['--baseline', str(baseline), '--output', str(baseline)])
+    assert baseline.read_text() == '{"runs": {}}'
@@ -0,0 +1,76 @@
+"""Unit tests for compact model artifacts."""
+import pytest
+import pandas as pd
+import numpy as np
+
+import sys
+sys.path.insert(0, 'src')
+from compact_model import CompactForest, _floor_float32
+from model import TrafficModel
+
+
+@pytest.fixture(scope='module')
+def trained():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(0, 100, (2000, len(TrafficModel.FEATURE_COLUMNS))),
+                     columns=TrafficModel.FEATURE_COLUMNS)
+    # Repeated, closely spaced float32 values exercise threshold rounding
+    X['hour'] = rng.integers(0, 24, 2000)
+    X['occ'] = np.float32(1.0) + rng.integers(0, 5, 2000) * np.float32(np.finfo(np.float32).eps)
+    y = X['hour'] * 10 + X['occ'] * 1000 + rng.normal(0, 5, 2000)
+    model = TrafficModel(n_estimators=8)
+    model.train(X, y)
+    return model, X
+
+
+def test_floor_float32_never_rounds_up():
+    """Test thresholds are rounded to the largest float32 not above them."""
+    values = np.array([0.1, 1 / 3, 1.0 + 1e-9, -2.7, 1e10 + 0.5])
+    rounded = _floor_float32(values)
+    assert rounded.dtype == np.float32
+    assert (rounded.astype(np.float64) <= values).all()
+    assert (np.nextafter(rounded, np.float32(np.inf)).astype(np.float64) > values).all()
+
+
+def test_tree_predictions_match_sklearn(trained):
+    """Compact traversal should reach the same leaves as scikit-learn."""
+    model, X = trained
+    forest = CompactForest.from_sklearn(model.model)
+    X_array = X[model.feature_names].to_numpy()
+
+    expected = np.array([tree.predict(X_array) for tree in model.model.estimators_])
+    actual = forest.tree_predictions(X_array)
+    # Only leaf values are rounded to float32
+    assert np.allclose(actual, expected, rtol=1e-6, atol=0)
+    assert forest.left.dtype == np.int16
+
+
+def test_save_and_memory_mapped_load(trained, tmp_path):
+    """Test a saved artifact round-trips through TrafficModel and predicts the same."""
+    model, X = trained
+    path = tmp_path / 'model.trfm'
+    size = model.save_compact(str(path))
+    assert size == path.stat().st_size
+
+    loaded = TrafficModel()
+    loaded.load_compact(str(path))
+    assert loaded.is_trained
+    assert loaded.feature_names == model.feature_names
+    assert loaded.version is not None and loaded.version != model.version
+    assert list(loaded.get_feature_importance()) == list(model.get_feature_importance())
+
+    expected = model.predict(X.iloc[:50])
+    actual = loaded.predict(X.iloc[:50])
+    for key in ['prediction', 'confidence_low', 'confidence_high']:
+        assert np.allclose(actual[key], expected[key], rtol=1e-5)
+
+    in_memory = CompactForest.load(str(path), mmap_mode=False)
+    assert np.array_equal(in_memory.threshold, loaded.model.threshold)
+
+
+def test_load_rejects_other_files(tmp_path):
+    """Test files without the artifact magic are rejected."""
+    path = tmp_path / 'model.joblib'
+    path.write_bytes(b'not a compact model')
+    with pytest.raises(ValueError):
+        CompactForest.load(str(path))
@@ -0,0 +1,98 @@
+"""Unit tests for the precomputed congestion matrices."""
+import pytest
+import pandas as pd
+import numpy as np
+from hypothesis import given, strategies as st, settings
+
+import sys
+sys.path.insert(0, '.')
+from src.congestion import CongestionCube
+
+
+def _frame(n_rows, n_detectors, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'detid': rng.integers(1, n_detectors + 1, n_rows) * 10,
+        'weekday': rng.integers(0, 7, n_rows),
+        'hour': rng.integers(0, 24, n_rows),
+        'traffic_index': rng.uniform(0, 100, n_rows),
+        'flow': rng.uniform(0, 500, n_rows),
+        'speed': rng.uniform(0, 120, n_rows),
+        'occ': rng.uniform(0, 100, n_rows)
+    })
+    df.loc[rng.random(n_rows) < 0.1, 'speed'] = np.nan
+    return df
+
+
+@given(
+    n_rows=st.integers(min_value=1, max_value=500),
+    n_detectors=st.integers(min_value=1, max_value=15),
+    seed=st.integers(min_value=0, max_value=1000)
+)
+@settings(max_examples=30, deadline=None)
+def test_matrices_match_groupby(n_rows, n_detectors, seed):
+    """Cube slices should equal groupby means over the same rows."""
+    df = _frame(n_rows, n_detectors, seed)
+    cube = CongestionCube(df)
+
+    for metric in ['traffic_index', 'speed']:
+        city = df.groupby(['weekday', 'hour'])[metric].mean()
+        heatmap = cube.heatmap(metric)
+        for (weekday, hour), value in city.items():
+            assert np.isclose(heatmap[weekday, hour], value, equal_nan=True)
+
+        per_detector = df.groupby('detid')[metric].mean()
+        values = cube.detector_values(metric)
+        assert np.allclose(values, per_detector.reindex(cube.detids).to_numpy(), equal_nan=True)
+
+        per_hour = df[df['hour'] == 8].groupby('detid')[metric].mean()
+        values = cube.detector_values(metric, hour=8)
+        assert np.allclose(values, per_hour.reindex(cube.detids).to_numpy(), equal_nan=True)
+
+    detid = df['detid'].iloc[0]
+    rows = df[df['detid'] == detid]
+    heatmap = cube.heatmap('flow', detid)
+    for (weekday, hour), value in rows.groupby(['weekday', 'hour'])['flow'].mean().items():
+        assert np.isclose(heatmap[weekday, hour], value)
+
+
+@given(
+    k=st.integers(min_value=0, max_value=20),
+    seed=st.integers(min_value=0, max_value=1000)
+)
+@settings(max_examples=30, deadline=None)
+def test_top_matches_full_sort(k, seed):
+    """Top-k by argpartition should match a full sort, worst first."""
+    df = _frame(400, 12, seed)
+    cube = CongestionCube(df)
+
+    top = cube.top(k, 'traffic_index')
+    expected = df.groupby('detid')['traffic_index'].mean().sort_values(ascending=False).head(k)
+    assert [d['detid'] for d in top] == list(expected.index)
+    assert [d['rank'] for d in top] == list(range(1, len(expected) + 1))
+
+    # Low speed is the worst
+    top_speed = cube.top(k, 'speed', weekday=1)
+    expected = df[df['weekday'] == 1].groupby('detid')['speed'].mean().dropna().sort_values().head(k)
+    assert [d['detid'] for d in top_speed][:len(expected)] == list(expected.index)
+
+
+def test_invalid_arguments():
+    """Test unknown metrics, detectors and out-of-range slices are rejected."""
+    cube = CongestionCube(_frame(100, 3, 0))
+    with pytest.raises(ValueError):
+        cube.heatmap('error')
+    with pytest.raises(KeyError):
+        cube.heatmap('flow', detid=999)
+    with pytest.raises(ValueError):
+        cube.top(5, weekday=7)
+    with pytest.raises(ValueError):
+        cube.top(5, hour=-1)
+
+
+def test_to_json_maps_empty_cells_to_none():
+    """Test empty cells serialize as None."""
+    cube = CongestionCube(_frame(5, 1, 0))
+    values = cube.to_json(cube.heatmap())
+    assert len(values) == 7 and len(values[0]) == 24
+    assert None in sum(values, [])
@@ -70,3 +70,64 @@ def test_validate_data_missing_columns():
         'interval': [0]
     })
     assert loader.validate_data(df) == False
+
+
+def make_days_df(days, rows_per_day=4):
+    records = []
+    for day in days:
+        for i in range(rows_per_day):
+            records.append({'day': day, 'interval': i * 300, 'detid': 1 + i % 2,
+                            'flow': 100.0 + i, 'occ': 5.0, 'speed': 50.0})
+    return pd.DataFrame(records)
+
+
+def test_partition_round_trip_and_pruning(tmp_path):
+    """Test partitioned writes load back and date filters read only overlapping partitions."""
+    loader = DataLoader()
+    df = make_days_df(['2016-09-26', '2016-09-27', '2016-10-01'])
+    manifest = loader.write_partitions(df, str(tmp_path), by='day')
+
+    assert sorted(manifest['partitions']) == ['2016-09-26', '2016-09-27', '2016-10-01']
+    assert manifest['partitions']['2016-09-27']['rows'] == 4
+    assert loader.select_partitions(manifest, start_date='2016-09-27', end_date='2016-09-30') == ['2016-09-27']
+
+    result = loader.load_partitioned(str(tmp_path), start_date='2016-09-27')
+    assert sorted(result['day'].unique()) == ['2016-09-27', '2016-10-01']
+    assert len(result) == 8
+
+
+def test_month_partitions_and_ingest(tmp_path):
+    """Test ingestion rewrites only touched partitions and replaces duplicate records."""
+    loader = DataLoader()
+    loader.write_partitions(make_days_df(['2016-09-26', '2016-10-01']), str(tmp_path), by='month')
+
+    update = make_days_df(['2016-10-01', '2016-10-02'], rows_per_day=2)
+    update['flow'] = 999.0
+    touched = loader.ingest_partitions(update, str(tmp_path))
+    assert touched == ['2016-10']
+
+    manifest = loader.read_manifest(str(tmp_path))
+    assert manifest['partitions']['2016-09']['rows'] == 4
+    assert manifest['partitions']['2016-10']['rows'] == 6
+    assert manifest['partitions']['2016-10']['max_flow'] == 999.0
+
+
+def test_retention_and_rebuild(tmp_path):
+    """Test retention drops old partitions and rebuild refreshes a single partition."""
+    loader = DataLoader()
+    loader.write_partitions(make_days_df(['2016-09-26', '2016-09-27']), str(tmp_path))
+
+    assert loader.apply_retention(str(tmp_path), keep_from='2016-09-27') == ['2016-09-26']
+    assert not (tmp_path / 'day=2016-09-26.csv').exists()
+
+    part = pd.read_csv(tmp_path / 'day=2016-09-27.csv').head(1)
+    part.to_csv(tmp_path / 'day=2016-09-27.csv', index=False)
+    assert loader.rebuild_partition(str(tmp_path), '2016-09-27')['rows'] == 1
+
+
+def test_day_offsets():
+    """Test per-day start offsets of a day-sorted frame."""
+    df = make_days_df(['2016-09-26', '2016-09-27'], rows_per_day=3)
+    days, starts = DataLoader.day_offsets(df)
+    assert list(days) == ['2016-09-26', '2016-09-27']
+    assert list(starts) == [0, 3]
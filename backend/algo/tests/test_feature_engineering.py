@@ -199,3 +199,72 @@ def test_traffic_categorization(index):
         assert category == "Medium"
     else:
         assert category == "High"
+
+
+# Parallel feature engineering must be indistinguishable from the serial path
+
+def _torino_frame(n_detectors, n_rows, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'day': rng.choice(['2016-09-30', '2016-10-01', '2016-10-03'], n_rows),
+        'interval': rng.integers(0, 86400, n_rows),
+        'detid': rng.integers(1, n_detectors + 1, n_rows),
+        'flow': rng.uniform(0, 600, n_rows),
+        'occ': rng.uniform(0, 100, n_rows),
+        'error': 0,
+        'city': 'torino',
+        'speed': rng.uniform(0, 130, n_rows)
+    })
+    df.loc[rng.random(n_rows) < 0.05, 'speed'] = np.nan
+    return df
+
+
+@given(
+    n_detectors=st.integers(min_value=2, max_value=30),
+    n_rows=st.integers(min_value=2, max_value=400),
+    n_jobs=st.integers(min_value=2, max_value=4),
+    seed=st.integers(min_value=0, max_value=1000)
+)
+@settings(max_examples=10, deadline=None)
+def test_parallel_matches_serial(n_detectors, n_rows, n_jobs, seed):
+    """Sharded process-pool output should equal the serial output exactly."""
+    df = _torino_frame(n_detectors, n_rows, seed)
+    serial = fe.engineer_features(df)
+    
+    parallel_fe = FeatureEngineer()
+    parallel_fe.PARALLEL_MIN_ROWS = 0
+    parallel_fe.resolve_jobs = lambda jobs: jobs
+    parallel = parallel_fe.engineer_features(df, n_jobs=n_jobs)
+    
+    pd.testing.assert_frame_equal(parallel, serial, check_exact=True)
+
+
+def test_vectorized_features_match_scalar_functions():
+    """Vectorized columns should agree with the scalar feature functions."""
+    df = _torino_frame(5, 300, seed=7)
+    result = fe.engineer_features(df)
+    
+    assert (result['hour'] == df['interval'].apply(fe.extract_hour)).all()
+    assert (result['weekday'] == df['day'].apply(fe.extract_weekday)).all()
+    assert (result['is_rush_hour'] == result['hour'].apply(fe.is_rush_hour)).all()
+    expected_index = df.apply(
+        lambda x: fe.normalize_index(fe.calculate_traffic_index(x['flow'], x['occ'], x['speed'])), axis=1
+    )
+    assert np.array_equal(result['traffic_index'].to_numpy(), expected_index.to_numpy())
+    assert (result['traffic_category'] == result['traffic_index'].apply(fe.categorize_traffic)).all()
+    expected_flow = df.groupby('detid')['flow'].mean()
+    assert np.allclose(result['detector_mean_flow'], df['detid'].map(expected_flow), rtol=1e-12)
+    expected_speed = df.groupby('detid')['speed'].mean()
+    assert np.allclose(result['detector_mean_speed'], df['detid'].map(expected_speed), rtol=1e-12)
+
+
+def test_chunked_aggregates_match_whole_frame():
+    """Features of chunks with combined aggregate sums should equal those of the whole frame."""
+    df = _torino_frame(8, 600, seed=3)
+    chunks = [df.iloc[start:start + 150] for start in range(0, len(df), 150)]
+    sums = pd.concat([fe.aggregate_sums(chunk) for chunk in chunks]).groupby(level=['detid', 'hour']).sum()
+    aggregates = fe.aggregates_from_sums(sums)
+    
+    chunked = pd.concat([fe.engineer_features(chunk, aggregates=aggregates) for chunk in chunks],
+                        ignore_index=True)
+    pd.testing.assert_frame_equal(chunked, fe.engineer_features(df), check_exact=False, rtol=1e-12)
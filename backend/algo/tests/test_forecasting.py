@@ -0,0 +1,117 @@
+"""Property tests for Forecasting module."""
+import pytest
+import pandas as pd
+import numpy as np
+from hypothesis import given, strategies as st, settings
+
+import sys
+sys.path.insert(0, 'src')
+sys.path.insert(0, '.')
+from src.forecasting import TrafficForecaster
+from src.feature_engineering import FeatureEngineer
+
+
+def make_series(n_detectors=2, n_steps=200, step=300, seed=42):
+    rng = np.random.RandomState(seed)
+    rows = []
+    for det_id in range(1, n_detectors + 1):
+        for i in range(n_steps):
+            rows.append({
+                'day': '2016-09-26',
+                'interval': i * step,
+                'detid': det_id,
+                'flow': 100 + 10 * det_id + rng.uniform(-5, 5),
+                'occ': 5.0,
+                'speed': 50.0
+            })
+    return FeatureEngineer().engineer_features(pd.DataFrame(rows))
+
+
+# Feature: traffic-ml-analysis, Property 9: Lag Feature Correctness
+
+@given(
+    n_steps=st.integers(min_value=5, max_value=40),
+    lags=st.integers(min_value=1, max_value=6),
+    drop=st.integers(min_value=1, max_value=3)
+)
+@settings(max_examples=100)
+def test_lag_matrix_matches_time_lookup(n_steps, lags, drop):
+    """Property 9: Lag j should equal flow at interval t - j*step of the same detector, or NaN."""
+    df = pd.DataFrame({
+        'day': '2016-09-26',
+        'interval': np.arange(n_steps) * 300,
+        'detid': 1,
+        'flow': np.arange(n_steps, dtype=float)
+    })
+    df = df.drop(index=drop).reset_index(drop=True)
+
+    forecaster = TrafficForecaster(lags=lags, windows=(1,))
+    forecaster.step = 300
+    result = forecaster._lag_matrix(df)
+    lookup = dict(zip(df['interval'], df['flow']))
+
+    for i, interval in enumerate(df['interval']):
+        for j in range(1, lags + 1):
+            expected = lookup.get(interval - j * 300, np.nan)
+            if np.isnan(expected):
+                assert np.isnan(result[i, j - 1])
+            else:
+                assert result[i, j - 1] == expected
+
+
+def test_lags_do_not_cross_detectors():
+    """Test lag features never take values from another detector."""
+    df = TrafficForecaster.sort_series(make_series(n_steps=5))
+    forecaster = TrafficForecaster(lags=2, windows=(1,))
+    forecaster.step = 300
+    lags = forecaster._lag_matrix(df)
+    first_of_second = df.index[df['detid'] == 2][0]
+    assert np.isnan(lags[first_of_second]).all()
+
+
+@pytest.mark.parametrize('strategy', ['recursive', 'direct'])
+def test_forecast_batches_all_detectors(strategy):
+    """Test forecasting returns horizon steps for every detector after its last record."""
+    df = make_series()
+    forecaster = TrafficForecaster(horizon=3, strategy=strategy, n_estimators=5)
+    metrics = forecaster.train(df)
+    assert len(metrics['steps']) == (1 if strategy == 'recursive' else 3)
+
+    result = forecaster.forecast(df, horizon=3)
+    assert len(result) == 6
+    assert list(result[result['detid'] == 1]['interval']) == [60000, 60300, 60600]
+    assert result['flow'].between(90, 135).all()
+
+
+def test_forecast_requires_training():
+    """Test forecasting before training raises an error."""
+    with pytest.raises(ValueError):
+        TrafficForecaster().forecast(make_series(n_steps=5))
+
+
+def test_forecaster_trains_on_unsampled_series(monkeypatch, tmp_path):
+    """Test the app forecaster sees every interval, not the 20% row sample load_data serves."""
+    monkeypatch.setenv('TRAFFIC_LOAD_MODE', 'lazy')
+    import app as app_module
+    from readiness import BackgroundLoader
+
+    rows = make_series(n_detectors=3, n_steps=288)[['day', 'interval', 'detid', 'flow', 'occ', 'speed']]
+    csv_path = tmp_path / 'torino.csv'
+    rows.to_csv(csv_path, index=False)
+    monkeypatch.setattr(app_module, 'DATA_PATH', str(csv_path))
+    monkeypatch.setattr(app_module, 'DETECTORS_PATH', str(tmp_path / 'detectors.csv'))
+    monkeypatch.setattr(app_module, 'MODEL_PATH', None)
+    monkeypatch.setattr(app_module, 'data_state', BackgroundLoader(app_module.load_data))
+    assert app_module.data_state.run()
+    snap = app_module.store.current()
+    assert len(snap.df_processed) == len(rows) // 5 and len(snap.flow_series) == len(rows)
+
+    client = app_module.app.test_client()
+    metrics = client.post('/api/forecast/train', json={'lags': 4}).get_json()['metrics']
+    assert metrics['lag_coverage'] > 0.95
+    # The sampled frame would leave most lags to the detector-mean fallback
+    sampled = TrafficForecaster(lags=4, n_estimators=5).train(snap.df_processed)
+    assert sampled['lag_coverage'] < 0.5
+
+    forecasts = client.post('/api/forecast', json={'horizon': 2}).get_json()['forecasts']
+    assert sorted(forecasts) == ['1', '2', '3']
@@ -0,0 +1,22 @@
+"""Regression guard for serving-path import time."""
+import pytest
+
+import sys
+sys.path.insert(0, '.')
+from benchmarks.import_time import main, measure_import
+
+
+@pytest.mark.parametrize('module', ['app', 'model', 'forecasting'])
+def test_serving_import_defers_ml_libraries(module):
+    """Importing serving modules must not pull in scikit-learn, scipy or joblib."""
+    _, loaded = measure_import(module)
+    assert loaded == []
+
+
+def test_import_guard_refuses_to_overwrite_baseline(tmp_path):
+    """The baseline must not double as the output file, or the run compares with itself."""
+    baseline = tmp_path / 'import_results.json'
+    baseline.write_text('{"runs": {}}')
+    with pytest.raises(SystemExit):
+        main(['--baseline', str(baseline), '--output', str(baseline)])
+    assert baseline.read_text() == '{"runs": {}}'
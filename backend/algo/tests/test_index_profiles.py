@@ -0,0 +1,120 @@
+"""Unit tests for configurable traffic-index profiles."""
+import pytest
+import pandas as pd
+import numpy as np
+
+import sys
+sys.path.insert(0, 'src')
+sys.path.insert(0, '.')
+from feature_engineering import FeatureEngineer, DEFAULT_INDEX_PROFILE, traffic_index_array
+from index_profiles import IndexProfiles
+from benchmarks.synthetic import generate_torino_like
+
+URBAN = {'flow_scale': 300, 'speed_scale': 60, 'flow_weight': 0.6, 'occ_weight': 0.2, 'speed_weight': 0.2}
+
+
+@pytest.fixture(scope='module')
+def processed():
+    return FeatureEngineer().engineer_features(generate_torino_like(20000, 12, 3))
+
+
+def test_default_profile_matches_engineer_features(processed):
+    """The default profile should reproduce the engineered traffic index exactly."""
+    profiles = IndexProfiles()
+    profiles.bind(processed)
+    assert profiles.is_default
+    _, index, categories, cached = profiles.columns()
+    assert not cached
+    assert np.array_equal(index, processed['traffic_index'].to_numpy())
+    assert (categories == processed['traffic_category'].to_numpy()).all()
+
+
+def test_group_profiles_apply_per_detector(processed):
+    """Grouped detectors use their profile, all others the default."""
+    profiles = IndexProfiles()
+    profiles.bind(processed)
+    profiles.configure(profiles={'urban': URBAN}, groups={'centro': {'detids': [1, 2, 3], 'profile': 'urban'}})
+    assert not profiles.is_default
+    _, index, _, _ = profiles.columns()
+
+    grouped = processed['detid'].isin([1, 2, 3]).to_numpy()
+    flow, occ, speed = (processed[col].to_numpy() for col in ['flow', 'occ', 'speed'])
+    expected = np.where(
+        grouped,
+        traffic_index_array(flow, occ, speed, IndexProfiles.validate_profile(URBAN)),
+        traffic_index_array(flow, occ, speed)
+    )
+    assert np.array_equal(index, expected)
+    assert np.array_equal(profiles.index(flow[:50], occ[:50], speed[:50], processed['detid'][:50]), expected[:50])
+
+
+def test_switching_back_is_cached(processed):
+    """Returning to an earlier configuration should reuse its cached columns."""
+    profiles = IndexProfiles()
+    profiles.bind(processed)
+    first_key, first, _, _ = profiles.columns()
+    profiles.configure(profiles={'urban': URBAN}, default='urban')
+    assert profiles.key != first_key
+    profiles.columns()
+
+    profiles.configure(default='default')
+    key, index, _, cached = profiles.columns()
+    assert cached and key == first_key and index is first
+    assert profiles.to_dict()['cache'] == {'entries': 2, 'hits': 1, 'misses': 2}
+
+    # A new dataset drops the cached columns
+    profiles.bind(processed.iloc[:100])
+    assert not profiles.columns()[3]
+
+
+def test_invalid_configuration_is_rejected():
+    """Invalid profiles and groups raise ValueError and leave the configuration unchanged."""
+    profiles = IndexProfiles()
+    key = profiles.key
+    with pytest.raises(ValueError):
+        profiles.configure(profiles={'bad': {'flow_scale': 0}})
+    with pytest.raises(ValueError):
+        profiles.configure(profiles={'bad': {'jam_factor': 1}})
+    with pytest.raises(ValueError):
+        profiles.configure(groups={'a': {'detids': [1], 'profile': 'missing'}})
+    with pytest.raises(ValueError):
+        profiles.configure(profiles={'urban': URBAN}, groups={
+            'a': {'detids': [1, 2], 'profile': 'urban'},
+            'b': {'detids': [2], 'profile': 'default'}
+        })
+    with pytest.raises(ValueError):
+        profiles.configure(default='missing')
+    assert profiles.key == key and list(profiles.profiles) == ['default']
+    assert profiles.profiles['default'] == DEFAULT_INDEX_PROFILE
+
+
+def test_index_profile_endpoints(monkeypatch, processed):
+    """Test switching profiles updates the index served by the API without a reload."""
+    monkeypatch.setenv('TRAFFIC_LOAD_MODE', 'lazy')
+    import app as app_module
+
+    monkeypatch.setattr(app_module, 'index_profiles', IndexProfiles())
+    app_module.use_data(processed, processed)
+    client = app_module.app.test_client()
+    before = client.get('/api/heatmap').get_json()['values']
+
+    groups = {'all': {'detids': list(range(1, 13)), 'profile': 'urban'}}
+    response = client.post('/api/index-profiles', json={'profiles': {'urban': URBAN}, 'groups': groups})
+    assert response.status_code == 200
+    assert response.get_json()['cached'] is False
+    after = client.get('/api/heatmap').get_json()['values']
+    assert after != before
+    assert not np.array_equal(app_module.df_processed['traffic_index'], processed['traffic_index'])
+    assert np.array_equal(app_module.approx_sample.frame['traffic_index'],
+                          app_module.df_processed['traffic_index'].to_numpy()[app_module.approx_sample.rows])
+
+    client.post('/api/index-profiles', json={'groups': {}})
+    assert client.get('/api/heatmap').get_json()['values'] == before
+    assert client.get('/api/index-profiles').get_json()['groups'] == {}
+    # Switching to a configuration seen before is served from the cache
+    response = client.post('/api/index-profiles', json={'groups': groups})
+    assert response.get_json()['cached'] is True
+    assert client.get('/api/heatmap').get_json()['values'] == after
+
+    response = client.post('/api/index-profiles', json={'profiles': {'bad': {'occ_scale': -1}}})
+    assert response.status_code == 400
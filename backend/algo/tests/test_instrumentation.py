@@ -0,0 +1,101 @@
+"""Unit tests for Instrumentation module."""
+import pytest
+from flask import Flask, jsonify
+
+import sys
+sys.path.insert(0, '.')
+from src.instrumentation import Instrumentation, MetricsRegistry
+
+
+@pytest.fixture
+def instrumented_client():
+    app = Flask(__name__)
+    instrumentation = Instrumentation(profiling_enabled=True)
+    instrumentation.init_app(app)
+
+    @app.route('/work')
+    def work():
+        with instrumentation.stage('aggregate'):
+            total = sum(range(1000))
+        return jsonify({'total': total})
+
+    @app.route('/metrics')
+    def metrics():
+        return instrumentation.render()
+
+    with app.test_client() as client:
+        yield client, instrumentation
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test rendered buckets are cumulative and end with +Inf equal to count."""
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    for value in [0.05, 0.5, 0.5, 5.0]:
+        registry.observe('latency', value, route='/x')
+    text = registry.render()
+
+    assert 'latency_bucket{route="/x",le="0.1"} 1' in text
+    assert 'latency_bucket{route="/x",le="1.0"} 3' in text
+    assert 'latency_bucket{route="/x",le="+Inf"} 4' in text
+    assert 'latency_count{route="/x"} 4' in text
+
+
+def test_request_and_stage_metrics_recorded(instrumented_client):
+    """Test route latency and stage timers appear on the metrics endpoint."""
+    client, _ = instrumented_client
+    client.get('/work')
+    text = client.get('/metrics').get_data(as_text=True)
+
+    assert 'traffic_request_duration_seconds_count{method="GET",route="/work",status="200"} 1' in text
+    assert 'traffic_stage_duration_seconds_count{route="/work",stage="aggregate"} 1' in text
+
+
+def test_profile_mode_returns_breakdown(instrumented_client):
+    """Test ?profile=1 wraps the original response with a profile breakdown."""
+    client, _ = instrumented_client
+    data = client.get('/work?profile=1').get_json()
+
+    assert data['response'] == {'total': 499500}
+    assert len(data['profile']) > 0
+    assert 'cumtime' in data['profile'][0]
+
+
+def test_profile_mode_is_opt_in():
+    """Test ?profile=1 is ignored unless profiling was enabled."""
+    app = Flask(__name__)
+    Instrumentation().init_app(app)
+
+    @app.route('/work')
+    def work():
+        return jsonify({'total': 1})
+
+    assert app.test_client().get('/work?profile=1').get_json() == {'total': 1}
+
+
+def test_failed_profiled_request_releases_profiler():
+    """Test a view raising under ?profile=1 does not leave profiling disabled."""
+    app = Flask(__name__)
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+    Instrumentation(profiling_enabled=True).init_app(app)
+
+    @app.route('/fail')
+    def fail():
+        raise RuntimeError('boom')
+
+    @app.route('/work')
+    def work():
+        return jsonify({'total': 1})
+
+    client = app.test_client()
+    with pytest.raises(RuntimeError):
+        client.get('/fail?profile=1')
+    assert 'profile' in client.get('/work?profile=1').get_json()
+
+
+def test_stage_outside_request_records_load_stage():
+    """Test stages timed outside a request are reported as startup load stages."""
+    instrumentation = Instrumentation()
+    with instrumentation.stage('read_csv'):
+        pass
+    assert 'read_csv' in instrumentation.load_stages
+    assert 'traffic_load_stage_seconds{stage="read_csv"}' in instrumentation.render()
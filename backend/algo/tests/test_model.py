@@ -74,3 +74,30 @@ def test_feature_importance_after_training():
     assert 'feature1' in importance
     assert 'feature2' in importance
     assert sum(importance.values()) > 0
+
+
+def test_train_excludes_detectors():
+    """Test rows of excluded detectors are left out of training."""
+    np.random.seed(42)
+    
+    X = pd.DataFrame({
+        'feature1': np.random.randn(200),
+        'detid': np.repeat([1, 2, 3, 4], 50)
+    })
+    y = pd.Series(np.random.randn(200))
+    
+    model = TrafficModel(n_estimators=5)
+    metrics = model.train(X, y, exclude_detids=[2, 4])
+    assert metrics['excluded_rows'] == 100
+    assert metrics['total_size'] == 100
+    assert model.train_size + model.test_size == 100
+    
+    with pytest.raises(ValueError):
+        model.train(X, y, exclude_detids=[1, 2, 3, 4])
+    with pytest.raises(ValueError):
+        model.train(X[['feature1']], y, exclude_detids=[1])
+    
+    # Detector ids may come from outside the features
+    metrics = model.train(X[['feature1']], y, exclude_detids=[1], detids=X['detid'])
+    assert metrics['excluded_rows'] == 50
+    assert model.feature_names == ['feature1']
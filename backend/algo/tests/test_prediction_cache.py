@@ -0,0 +1,118 @@
+"""Unit tests for the versioned prediction cache and cached /api/predict."""
+import pytest
+import pandas as pd
+import numpy as np
+
+import sys
+sys.path.insert(0, 'src')
+from prediction_cache import PredictionCache
+from feature_engineering import FeatureEngineer
+
+
+def test_get_and_put_many():
+    """Test cached values are returned and misses are None."""
+    cache = PredictionCache()
+    cache.put_many('v1', [(1, 8, 0, 10)], [{'prediction': 1.0}])
+
+    assert cache.get_many('v1', [(1, 8, 0, 10), (2, 8, 0, 10)]) == [{'prediction': 1.0}, None]
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_new_version_invalidates():
+    """Test a different model version never sees older results."""
+    cache = PredictionCache()
+    cache.put_many('v1', ['a', 'b'], [1, 2])
+
+    assert cache.get_many('v2', ['a', 'b']) == [None, None]
+    assert len(cache) == 0
+    assert cache.version == 'v2'
+
+
+def test_lru_eviction():
+    """Test the least recently used entries are evicted beyond max_entries."""
+    cache = PredictionCache(max_entries=2)
+    cache.put_many('v1', ['a', 'b'], [1, 2])
+    cache.get_many('v1', ['a'])
+    cache.put_many('v1', ['c'], [3])
+
+    assert cache.get_many('v1', ['a', 'b', 'c']) == [1, None, 3]
+
+
+@pytest.fixture
+def processed():
+    rng = np.random.default_rng(0)
+    n = 3000
+    df = pd.DataFrame({
+        'day': rng.choice(['2016-09-26', '2016-09-27', '2016-10-01'], n),
+        'interval': rng.integers(0, 20 * 3600, n),
+        'detid': rng.integers(1, 6, n),
+        'flow': rng.uniform(0, 500, n),
+        'occ': rng.uniform(0, 100, n),
+        'error': 0,
+        'city': 'torino',
+        'speed': rng.uniform(10, 120, n)
+    })
+    df = FeatureEngineer().engineer_features(df)
+    # Stand-ins for the spatial features added when detector metadata exists
+    df['lat'] = 45.0 + df['detid'] * 0.001
+    df['lon'] = 7.6 + df['detid'] * 0.001
+    df['upstream_mean_flow'] = df['flow'] * 0.5
+    df['downstream_mean_flow'] = df['flow'] * 0.7
+    return df
+
+
+@pytest.mark.parametrize('detid,hour', [(1, 8), (3, 22), (99, 8), (99, 23)])
+def test_prediction_features_match_row_scans(processed, detid, hour):
+    """Lookup-based features should equal means over the matching processed rows."""
+    fe = FeatureEngineer()
+    features = fe.prediction_features(fe.build_prediction_lookup(processed), [detid], [hour], [2], [10])
+    row = features.iloc[0]
+
+    detector = processed[processed['detid'] == detid]
+    source = detector if len(detector) else processed
+    assert row['detector_mean_flow'] == pytest.approx(source['flow'].mean())
+    assert row['speed'] == pytest.approx(source['speed'].mean())
+    hourly = processed[processed['hour'] == hour]
+    expected_hourly = hourly['flow'].mean() if len(hourly) else processed['flow'].mean()
+    assert row['hourly_mean_flow'] == pytest.approx(expected_hourly)
+    spatial = detector[detector['hour'] == hour]
+    if len(spatial) == 0:
+        spatial = source
+    assert row['upstream_mean_flow'] == pytest.approx(spatial['upstream_mean_flow'].mean())
+    assert row['is_rush_hour'] == fe.is_rush_hour(hour)
+    assert row['is_peak_traffic'] == fe.is_peak_traffic(fe.is_rush_hour(hour), fe.is_weekday(2))
+
+
+def test_predict_endpoint_uses_cache(processed, monkeypatch):
+    """Test training precomputes the grid and a new model version invalidates it."""
+    monkeypatch.setenv('TRAFFIC_LOAD_MODE', 'lazy')
+    import app as app_module
+    from model import TrafficModel
+
+    monkeypatch.setattr(app_module, 'prediction_cache', PredictionCache())
+    app_module.use_data(processed, processed, model=TrafficModel(n_estimators=5))
+    client = app_module.app.test_client()
+
+    response = client.post('/api/train', json={'precompute': True})
+    assert response.get_json()['precomputed_predictions'] == 5 * 7 * 24
+    misses = app_module.prediction_cache.misses
+
+    body = client.post('/api/predict', json={'detid': 2, 'hour': 8, 'weekday': 1}).get_json()
+    assert app_module.prediction_cache.misses == misses
+    assert set(body) == {'prediction', 'confidence_low', 'confidence_high', 'traffic_index', 'category'}
+
+    # Uncached computation of the same key gives the same answer
+    version = app_module.traffic_model.version
+    app_module.prediction_cache.invalidate()
+    uncached = client.post('/api/predict', json={'detid': 2, 'hour': 8, 'weekday': 1}).get_json()
+    assert uncached['category'] == body['category']
+    for field in ['prediction', 'confidence_low', 'confidence_high', 'traffic_index']:
+        assert uncached[field] == pytest.approx(body[field])
+
+    # Without the option, training does not precompute the grid
+    assert client.post('/api/train').get_json()['precomputed_predictions'] == 0
+    assert app_module.traffic_model.version != version
+    client.post('/api/predict', json={'detid': 2, 'hour': 8, 'weekday': 1})
+    assert app_module.prediction_cache.version == app_module.traffic_model.version
+    assert len(app_module.prediction_cache) == 1
@@ -0,0 +1,122 @@
+"""Unit tests for the per-detector data quality scan."""
+import pytest
+import pandas as pd
+import numpy as np
+
+import sys
+sys.path.insert(0, 'src')
+sys.path.insert(0, '.')
+from quality import QualityReport, STUCK_RUN
+from benchmarks.synthetic import generate_torino_like
+
+
+def _frame():
+    """Six detectors over two days; detectors 2-6 each carry one kind of defect."""
+    df = generate_torino_like(6 * 2 * 288, 6, 2, seed=1)
+    rng = np.random.default_rng(0)
+    det = df['detid']
+    df.loc[det == 2, 'flow'] = 42.0
+    df.loc[det == 3, 'flow'] = 0.0
+    # Detector 4 loses every other slot on the first day and all of the second
+    drop = (det == 4) & ((df['day'] == '2016-09-27') | (df['interval'] // 300 % 2 == 1))
+    df = df[~drop]
+    df.loc[df['detid'] == 5, 'speed'] = 0.0
+    df.loc[(df['detid'] == 6) & (rng.random(len(df)) < 0.5), 'occ'] = np.nan
+    df.loc[(df['detid'] == 6) & (df['interval'] == 600), 'speed'] = np.inf
+    # A shuffled copy must give the same report
+    return df.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def test_flags_each_defect():
+    """Every seeded defect should be flagged on its detector only."""
+    report = QualityReport(_frame())
+    issues = report.detectors['issues'].to_dict()
+    assert report.step == 300 and report.slots_per_day == 288
+    assert issues[1] == []
+    assert issues[2] == ['stuck']
+    assert 'zero_reporting' in issues[3] and 'stuck' in issues[3]
+    assert issues[4] == ['low_coverage']
+    assert issues[5] == ['impossible_values']
+    assert issues[6] == ['missing_values']
+    assert report.unhealthy_detids() == [2, 3, 4, 5, 6]
+    assert report.summary()['healthy'] == 1
+
+
+def test_metrics_match_row_scans():
+    """Counts should agree with straightforward per-detector scans."""
+    df = _frame()
+    report = QualityReport(df).detectors
+
+    four = df[df['detid'] == 4].sort_values(['day', 'interval'])
+    assert report.loc[4, 'slots'] == len(four) == 144
+    assert report.loc[4, 'coverage'] == pytest.approx(144 / 576)
+    # One gap between every kept slot of the first day
+    assert report.loc[4, 'gaps'] == 143 and report.loc[4, 'max_gap_s'] == 600
+
+    six = df[df['detid'] == 6]
+    assert report.loc[6, 'imputed_occ'] == six['occ'].isna().sum()
+    assert report.loc[6, 'imputed_speed'] == 2
+    assert report.loc[6, 'imputed_rows'] == (six['occ'].isna() | np.isinf(six['speed'])).sum()
+    assert report.loc[2, 'longest_constant_run'] == 576
+    assert report.loc[1, 'longest_constant_run'] < STUCK_RUN
+    assert report.loc[5, 'impossible_rows'] == (df.loc[df['detid'] == 5, 'flow'] > 0).sum()
+    assert (report['duplicate_rows'] == 0).all()
+
+
+def test_duplicates_and_unassigned_rows():
+    """Test duplicate slots and rows without a detector are counted, not attributed."""
+    df = _frame()
+    extra = df[df['detid'] == 1].head(5)
+    df = pd.concat([df, extra, extra.assign(detid=np.nan)], ignore_index=True)
+    report = QualityReport(df)
+    assert report.detectors.loc[1, 'duplicate_rows'] == 5
+    assert report.unassigned_rows == 5
+    assert report.summary()['rows'] == len(df)
+
+
+def test_quality_endpoint_and_training_exclusion(monkeypatch):
+    """Test /api/quality and training without unhealthy detectors."""
+    monkeypatch.setenv('TRAFFIC_LOAD_MODE', 'lazy')
+    import app as app_module
+    from feature_engineering import FeatureEngineer
+    from model import TrafficModel
+
+    raw = _frame()
+    processed = FeatureEngineer().engineer_features(app_module.data_loader.handle_missing_values(raw))
+    app_module.use_data(raw, processed, model=TrafficModel(n_estimators=3))
+    client = app_module.app.test_client()
+
+    body = client.get('/api/quality').get_json()
+    assert body['summary']['unhealthy'] == 5 and len(body['detectors']) == 6
+    assert [d['detid'] for d in client.get('/api/quality?status=healthy').get_json()['detectors']] == [1]
+    assert client.get('/api/quality?detid=4').get_json()['detectors'][0]['issues'] == ['low_coverage']
+    assert client.get('/api/quality?detid=99').status_code == 404
+    assert client.get('/api/quality?status=bad').status_code == 400
+
+    metrics = client.post('/api/train', json={'exclude_unhealthy': True, 'precompute': False}).get_json()['metrics']
+    assert metrics['excluded_detectors'] == [2, 3, 4, 5, 6]
+    assert metrics['excluded_rows'] == (processed['detid'] != 1).sum()
+    assert metrics['total_size'] == (processed['detid'] == 1).sum()
+
+
+def test_load_data_scans_before_sampling(monkeypatch, tmp_path):
+    """Test the scan in load_data sees every row, not the 20% sample that is served."""
+    monkeypatch.setenv('TRAFFIC_LOAD_MODE', 'lazy')
+    import app as app_module
+    from model import TrafficModel
+
+    csv_path = tmp_path / 'torino.csv'
+    _frame().to_csv(csv_path, index=False)
+    monkeypatch.setattr(app_module, 'DATA_PATH', str(csv_path))
+    monkeypatch.setattr(app_module, 'DETECTORS_PATH', str(tmp_path / 'detectors.csv'))
+    monkeypatch.setattr(app_module, 'MODEL_PATH', None)
+    app_module.use_model(TrafficModel(n_estimators=3))
+    assert app_module.load_data()
+    client = app_module.app.test_client()
+
+    summary = client.get('/api/quality').get_json()['summary']
+    assert summary['step_s'] == 300 and summary['healthy'] == 1
+    assert summary['issues']['low_coverage'] == 1
+    response = client.post('/api/train', json={'exclude_unhealthy': True})
+    assert response.status_code == 200
+    assert response.get_json()['metrics']['excluded_detectors'] == [2, 3, 4, 5, 6]
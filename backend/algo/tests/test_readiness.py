@@ -0,0 +1,102 @@
+"""Unit tests for background data loading and readiness."""
+import multiprocessing
+import os
+import threading
+import pytest
+
+import sys
+sys.path.insert(0, 'src')
+import app as app_module
+from readiness import BackgroundLoader
+
+
+@pytest.fixture
+def client():
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def blocked_loader():
+    """Swap in a loader that stays in 'loading' until released."""
+    release = threading.Event()
+    original = app_module.data_state
+    loader = BackgroundLoader(lambda: release.wait(5), retry_after=7)
+    app_module.data_state = loader
+    yield loader, release
+    release.set()
+    loader.wait(5)
+    app_module.data_state = original
+
+
+def test_loader_reaches_ready():
+    """Test a successful load transitions idle -> loading -> ready."""
+    release = threading.Event()
+    loader = BackgroundLoader(lambda: release.wait(5))
+    assert loader.state == BackgroundLoader.IDLE
+    assert loader.start() is True
+    assert loader.start() is False
+    assert loader.state == BackgroundLoader.LOADING
+    release.set()
+    assert loader.wait(5) is True
+    assert loader.status()['load_seconds'] is not None
+
+
+def test_loader_records_failure():
+    """Test exceptions and False results mark the loader as failed."""
+    def boom():
+        raise IOError("missing file")
+
+    loader = BackgroundLoader(boom)
+    assert loader.run() is False
+    assert loader.state == BackgroundLoader.FAILED
+    assert loader.error == "missing file"
+
+    loader = BackgroundLoader(lambda: False)
+    loader.start()
+    assert loader.wait(5) is False
+    assert loader.state == BackgroundLoader.FAILED
+
+
+def test_data_endpoints_return_503_while_loading(client, blocked_loader):
+    """Test data endpoints answer 503 with Retry-After until loading finishes."""
+    response = client.get('/api/statistics')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '7'
+    assert response.get_json()['status'] == 'loading'
+
+
+def test_healthz_and_spa_available_while_loading(client, blocked_loader):
+    """Test /healthz and the SPA shell do not wait for data."""
+    health = client.get('/healthz')
+    assert health.status_code == 200
+    assert health.get_json()['ready'] is False
+    assert client.get('/').status_code == 200
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork()")
+def test_forked_loader_restarts_interrupted_load():
+    """Test a process forked mid-load (gunicorn --preload) loads instead of waiting forever."""
+    release = threading.Event()
+    loads = multiprocessing.get_context('fork').Value('i', 0)
+
+    def load():
+        with loads.get_lock():
+            loads.value += 1
+        return release.wait(5)
+
+    def child():
+        release.set()
+        loader.start()
+        os._exit(0 if loader.wait(5) else 1)
+
+    loader = BackgroundLoader(load)
+    assert loader.start() is True
+    process = multiprocessing.get_context('fork').Process(target=child)
+    process.start()
+    process.join(10)
+    release.set()
+    assert process.exitcode == 0
+    assert loader.wait(5) is True
+    assert loads.value == 2
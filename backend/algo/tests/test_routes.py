@@ -0,0 +1,143 @@
+"""Unit tests for route travel-time estimation."""
+import pytest
+import pandas as pd
+import numpy as np
+
+import sys
+sys.path.insert(0, 'src')
+sys.path.insert(0, '.')
+from routes import (RouteRegistry, historical_travel_times, profile_travel_times, bpr_parameters,
+                    predicted_travel_times, segment_seconds, BPR_ALPHA, BPR_BETA, MIN_SPEED_KMH)
+from congestion import CongestionCube
+from feature_engineering import FeatureEngineer
+from benchmarks.synthetic import generate_torino_like
+
+
+@pytest.fixture(scope='module')
+def processed():
+    df = FeatureEngineer().engineer_features(generate_torino_like(12000, 6, 2))
+    return df.sort_values('day', kind='stable').reset_index(drop=True)
+
+
+@pytest.fixture
+def route():
+    return RouteRegistry().register('r1', [3, 1, 5], [400, 250, 800])
+
+
+def test_historical_matches_per_interval_loop(processed, route):
+    """Vectorized travel times should equal a loop over intervals."""
+    result = historical_travel_times(processed, route, CongestionCube(processed))
+
+    rows = processed[processed['detid'].isin(route['detids'])]
+    expected = []
+    for (day, interval), group in rows.groupby(['day', 'interval']):
+        speeds = group.groupby('detid')['speed'].mean()
+        expected.append(sum(
+            length / (max(speeds[detid], MIN_SPEED_KMH) / 3.6)
+            for detid, length in zip(route['detids'], route['lengths_m'])
+        ))
+    assert len(result['travel_time_s']) == len(expected)
+    assert np.allclose(result['travel_time_s'], expected)
+    assert result['observed_fraction'] == [1.0] * len(expected)
+    assert result['day'][0] == rows['day'].min() and result['interval'][0] == rows['interval'].min()
+
+
+def test_missing_readings_fall_back_to_cube_means(processed, route):
+    """Detectors without a reading use their weekday x hour mean speed."""
+    cube = CongestionCube(processed)
+    first = processed[processed['detid'].isin(route['detids'])].iloc[0]
+    dropped = processed.drop(index=processed[
+        (processed['day'] == first['day']) & (processed['interval'] == first['interval'])
+        & (processed['detid'] == 5)
+    ].index)
+    result = historical_travel_times(dropped, route, cube)
+    assert result['observed_fraction'][0] == pytest.approx(1 - 800 / 1450)
+
+    full = historical_travel_times(processed, route, cube)
+    fallback_speed = cube.heatmap('speed', 5)[first['weekday'], first['hour']]
+    observed_speed = processed[(processed['day'] == first['day']) & (processed['interval'] == first['interval'])
+                               & (processed['detid'] == 5)]['speed'].mean()
+    delta = segment_seconds(800, fallback_speed) - segment_seconds(800, observed_speed)
+    assert result['travel_time_s'][0] == pytest.approx(full['travel_time_s'][0] + delta)
+
+
+def test_profile_and_predicted_travel_times(processed, route):
+    """Profile times follow cube mean speeds; BPR times grow with flow from the free-flow time."""
+    cube = CongestionCube(processed)
+    profile = np.array(profile_travel_times(cube, route)['travel_time_s'])
+    expected = sum(segment_seconds(length, cube.heatmap('speed', detid))
+                   for detid, length in zip(route['detids'], route['lengths_m']))
+    assert profile.shape == (7, 24)
+    observed = ~np.isnan(expected)
+    assert np.allclose(profile[observed], expected[observed])
+    # Weekdays without data use each detector's overall mean speed
+    means = sum(segment_seconds(length, cube.detector_means['speed'][cube.detids == detid][0])
+                for detid, length in zip(route['detids'], route['lengths_m']))
+    assert np.allclose(profile[~observed], means)
+
+    parameters = bpr_parameters(processed, route)
+    lengths = np.array(route['lengths_m'])
+    free_flow = segment_seconds(lengths, parameters['free_flow_kmh']).sum()
+    idle = np.array(predicted_travel_times(route, np.zeros((3, 7, 24)), parameters)['travel_time_s'])
+    assert np.allclose(idle, free_flow)
+
+    at_capacity = np.broadcast_to(parameters['capacity'][:, None, None], (3, 7, 24))
+    loaded = np.array(predicted_travel_times(route, at_capacity, parameters)['travel_time_s'])
+    assert np.allclose(loaded, free_flow * (1 + BPR_ALPHA * 1 ** BPR_BETA))
+
+
+def test_registry_validates_routes():
+    """Test routes need one positive length per detector."""
+    registry = RouteRegistry()
+    with pytest.raises(ValueError):
+        registry.register('a', [], [])
+    with pytest.raises(ValueError):
+        registry.register('a', [1, 2], [100])
+    with pytest.raises(ValueError):
+        registry.register('a', [1], [0])
+    first = registry.register('a', [1, 2], [100, 200])
+    second = registry.register('a', [1, 2], [100, 300])
+    assert first['signature'] != second['signature'] and len(registry) == 1
+    with pytest.raises(KeyError):
+        registry.get('missing')
+
+
+def test_travel_time_endpoints(monkeypatch, processed):
+    """Test the travel-time endpoint in all modes and its per-dataset cache."""
+    monkeypatch.setenv('TRAFFIC_LOAD_MODE', 'lazy')
+    import app as app_module
+    from model import TrafficModel
+    from prediction_cache import PredictionCache
+
+    monkeypatch.setattr(app_module, 'route_registry', RouteRegistry())
+    monkeypatch.setattr(app_module, 'route_cache', PredictionCache())
+    app_module.use_data(processed, processed, model=TrafficModel(n_estimators=3))
+    client = app_module.app.test_client()
+
+    assert client.post('/api/routes', json={'id': 'r1', 'detids': [3, 1, 5]}).status_code == 400
+    response = client.post('/api/routes', json={'id': 'r1', 'detids': [3, 1, 5], 'lengths_m': [400, 250, 800]})
+    assert response.status_code == 200
+    assert client.get('/api/routes').get_json()['count'] == 1
+    assert client.get('/api/routes/missing/traveltime').status_code == 404
+    assert client.get('/api/routes/r1/traveltime?mode=fastest').status_code == 400
+    assert client.get('/api/routes/r1/traveltime?mode=predicted').status_code == 400
+
+    history = client.get('/api/routes/r1/traveltime').get_json()
+    assert history['mode'] == 'history' and len(history['travel_time_s']) == len(history['interval'])
+    again = client.get('/api/routes/r1/traveltime').get_json()
+    assert again == history and app_module.route_cache.hits == 1
+    first_day = client.get(f"/api/routes/r1/traveltime?end_date={history['day'][0]}").get_json()
+    assert set(first_day['day']) == {history['day'][0]}
+
+    profile = client.get('/api/routes/r1/traveltime?mode=profile').get_json()
+    assert len(profile['travel_time_s']) == 7 and profile['weekdays'][0] == 'Mon'
+
+    client.post('/api/train', json={'precompute': False})
+    predicted = client.get('/api/routes/r1/traveltime?mode=predicted').get_json()
+    assert np.array(predicted['travel_time_s']).shape == (7, 24)
+    assert predicted['summary']['min_s'] > 0
+
+    # Reloading data gives a new dataset version, which drops cached results
+    app_module.use_data(processed, processed)
+    client.get('/api/routes/r1/traveltime')
+    assert len(app_module.route_cache) == 1
@@ -0,0 +1,113 @@
+"""Unit tests for stratified samples and approximate queries."""
+import pytest
+import pandas as pd
+import numpy as np
+from hypothesis import given, strategies as st, settings
+
+import sys
+sys.path.insert(0, 'src')
+from sampling import StratifiedSample
+
+
+def _frame(n_rows, n_detectors, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'day': rng.choice(['2016-09-26', '2016-09-27', '2016-10-01'], n_rows),
+        'detid': rng.integers(1, n_detectors + 1, n_rows),
+        'weekday': rng.integers(0, 7, n_rows),
+        'hour': rng.integers(0, 24, n_rows),
+    })
+    df['flow'] = rng.gamma(2.0, 50.0, n_rows) + df['hour'] * 5 + df['detid']
+    df['traffic_category'] = np.where(df['flow'] > 150, 'High', 'Low')
+    return df.sort_values('day', kind='stable').reset_index(drop=True)
+
+
+@given(
+    n_rows=st.integers(min_value=1, max_value=3000),
+    n_detectors=st.integers(min_value=1, max_value=10),
+    per_stratum=st.integers(min_value=1, max_value=5),
+    seed=st.integers(min_value=0, max_value=1000)
+)
+@settings(max_examples=30, deadline=None)
+def test_sample_covers_every_stratum(n_rows, n_detectors, per_stratum, seed):
+    """Every stratum is sampled, capped at per_stratum, and weights add up to the population."""
+    df = _frame(n_rows, n_detectors, seed)
+    sample = StratifiedSample(df, per_stratum=per_stratum, seed=seed)
+
+    sizes = sample.frame.groupby(StratifiedSample.STRATA).size()
+    population = df.groupby(StratifiedSample.STRATA).size()
+    assert len(sizes) == len(population)
+    assert (sizes == np.minimum(population, per_stratum).reindex(sizes.index)).all()
+    assert sample.estimate_rows(sample.frame) == pytest.approx(len(df))
+    # The sample keeps the source (day-sorted) order
+    assert sample.frame['day'].is_monotonic_increasing
+
+
+def test_full_sample_is_exact():
+    """With every row sampled, estimates equal exact answers with zero-width intervals."""
+    df = _frame(2000, 3, 0)
+    sample = StratifiedSample(df, per_stratum=10 ** 6)
+
+    estimates = sample.mean(sample.frame, 'flow', 'hour')
+    exact = df.groupby('hour')['flow'].mean()
+    for hour, (value, low, high) in estimates.items():
+        assert value == pytest.approx(exact[hour])
+        assert low == pytest.approx(high)
+    counts = sample.count(sample.frame, 'traffic_category')
+    assert counts['High'][0] == pytest.approx((df['traffic_category'] == 'High').sum())
+
+
+def test_intervals_cover_true_values():
+    """95% intervals should contain the exact answer in most resamples."""
+    df = _frame(60000, 5, 1)
+    domain = df[df['day'] >= '2016-09-27']
+    true_mean = domain['flow'].mean()
+    true_high = (domain['traffic_category'] == 'High').sum()
+
+    mean_hits = count_hits = 0
+    trials = 40
+    for seed in range(trials):
+        sample = StratifiedSample(df, per_stratum=5, seed=seed)
+        frame = sample.frame[sample.frame['day'] >= '2016-09-27']
+        _, low, high = sample.mean(frame, 'flow')[0]
+        mean_hits += low <= true_mean <= high
+        _, low, high = sample.count(frame, 'traffic_category')['High']
+        count_hits += low <= true_high <= high
+    assert mean_hits >= 0.85 * trials
+    assert count_hits >= 0.85 * trials
+
+
+def test_approx_endpoints(monkeypatch):
+    """Test ?approx=1 answers from the sample for large slices and exactly for small ones."""
+    monkeypatch.setenv('TRAFFIC_LOAD_MODE', 'lazy')
+    import app as app_module
+    from feature_engineering import FeatureEngineer
+    sys.path.insert(0, '.')
+    from benchmarks.synthetic import generate_torino_like
+
+    processed = FeatureEngineer().engineer_features(generate_torino_like(30000, 10, 3))
+    monkeypatch.setattr(app_module, 'APPROX_PER_STRATUM', 3)
+    monkeypatch.setattr(app_module, 'APPROX_EXACT_ROWS', 5000)
+    app_module.use_data(processed, processed)
+    client = app_module.app.test_client()
+
+    exact = client.get('/api/data').get_json()
+    approx = client.get('/api/data?approx=1').get_json()
+    assert 'approximate' not in exact
+    assert approx['approximate'] is True
+    low, high = approx['confidence_intervals']['total_records']
+    # The unfiltered row count is known exactly, so the interval has zero width
+    assert low == pytest.approx(exact['total_records']) == high
+    assert set(approx['hourly_flow']) == set(exact['hourly_flow'])
+
+    analysis = client.get('/api/analysis?approx=1').get_json()
+    assert analysis['approximate'] is True
+    assert len(analysis['peak_hours']) == 5
+    stats = client.get('/api/statistics?approx=1').get_json()
+    assert stats['approximate'] is True
+    assert stats['row_count'] == pytest.approx(len(processed))
+
+    # A single detector is a small slice, answered exactly
+    small = client.get('/api/data?approx=1&detid=1').get_json()
+    assert small['approximate'] is False
+    assert small['total_records'] == client.get('/api/data?detid=1').get_json()['total_records']
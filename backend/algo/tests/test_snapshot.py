@@ -0,0 +1,147 @@
+"""Unit tests for the immutable serving snapshot."""
+import dataclasses
+import threading
+
+import pytest
+import numpy as np
+
+import sys
+sys.path.insert(0, 'src')
+sys.path.insert(0, '.')
+from snapshot import Snapshot, SnapshotStore
+from feature_engineering import FeatureEngineer
+from index_profiles import IndexProfiles
+from benchmarks.synthetic import generate_torino_like
+
+
+@pytest.fixture(scope='module')
+def processed():
+    return FeatureEngineer().engineer_features(generate_torino_like(8000, 5, 3))
+
+
+def test_publish_replaces_fields_of_a_copy():
+    """Publishing should leave snapshots already taken untouched."""
+    store = SnapshotStore()
+    before = store.current()
+    after = store.publish(dataset_version='a', df_raw='raw')
+    assert store.current() is after and after.generation == before.generation + 1
+    assert before.dataset_version is None and after.df_raw == 'raw'
+    assert store.publish(dataset_version='b').df_raw == 'raw'
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        after.dataset_version = 'c'
+    with pytest.raises(TypeError):
+        store.publish(unknown=1)
+
+
+def test_concurrent_readers_see_consistent_snapshots():
+    """Readers racing a writer should never see fields of two different publishes."""
+    store = SnapshotStore(Snapshot(df_raw=0, dataset_version='0'))
+    errors = []
+
+    def read():
+        for _ in range(20000):
+            snap = store.current()
+            if str(snap.df_raw) != snap.dataset_version:
+                errors.append(snap)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for i in range(1, 5000):
+        store.publish(df_raw=i, dataset_version=str(i))
+    for thread in readers:
+        thread.join()
+    assert not errors
+    assert store.current().generation == 4999
+
+
+def test_requests_keep_their_snapshot(monkeypatch, processed):
+    """Training and profile switches publish new snapshots instead of mutating the served one."""
+    monkeypatch.setenv('TRAFFIC_LOAD_MODE', 'lazy')
+    import app as app_module
+    from model import TrafficModel
+
+    monkeypatch.setattr(app_module, 'index_profiles', IndexProfiles())
+    app_module.use_data(processed, processed, model=TrafficModel(n_estimators=3))
+    client = app_module.app.test_client()
+    served = app_module.store.current()
+    assert served.traffic_model is app_module.traffic_model and not served.traffic_model.is_trained
+
+    client.post('/api/train', json={'precompute': False})
+    current = app_module.store.current()
+    assert current.traffic_model.is_trained and not served.traffic_model.is_trained
+    assert current.dataset_version == served.dataset_version
+    assert app_module.traffic_model is current.traffic_model
+
+    served_index = served.df_processed['traffic_index'].to_numpy().copy()
+    client.post('/api/index-profiles', json={'default': 'urban', 'profiles': {'urban': {'flow_scale': 200}}})
+    switched = app_module.store.current()
+    assert switched.index_key != current.index_key
+    assert np.array_equal(served.df_processed['traffic_index'], served_index)
+    assert not np.array_equal(switched.df_processed['traffic_index'], served_index)
+    assert switched.traffic_model is current.traffic_model
+
+    # Predictions are cached per index configuration, so both configurations are served correctly
+    body = client.post('/api/predict', json={'detid': 2, 'hour': 8, 'weekday': 1}).get_json()
+    client.post('/api/index-profiles', json={'default': 'default'})
+    default = client.post('/api/predict', json={'detid': 2, 'hour': 8, 'weekday': 1}).get_json()
+    assert default['prediction'] == pytest.approx(body['prediction'])
+    assert default['traffic_index'] != body['traffic_index']
+
+
+def test_concurrent_training_publishes_model_with_its_drift_monitor(monkeypatch, processed):
+    """Concurrent trains should always leave the served model paired with its own drift monitor."""
+    monkeypatch.setenv('TRAFFIC_LOAD_MODE', 'lazy')
+    import app as app_module
+    from model import TrafficModel
+
+    app_module.use_data(processed, processed, model=TrafficModel(n_estimators=2))
+    statuses = []
+
+    def train():
+        statuses.append(app_module.app.test_client().post('/api/train').status_code)
+
+    threads = [threading.Thread(target=train) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert statuses == [200] * 3
+    snap = app_module.store.current()
+    assert snap.drift_monitor.profile is snap.traffic_model.feature_profile
+    assert app_module.drift_monitor is snap.drift_monitor
+
+
+def test_threaded_requests_during_profile_switches(monkeypatch, processed):
+    """Concurrent readers should only ever see the heatmap of one complete configuration."""
+    monkeypatch.setenv('TRAFFIC_LOAD_MODE', 'lazy')
+    import app as app_module
+
+    monkeypatch.setattr(app_module, 'index_profiles', IndexProfiles())
+    app_module.use_data(processed, processed)
+    client = app_module.app.test_client()
+    urban = {'profiles': {'urban': {'flow_scale': 200}}, 'default': 'urban'}
+    expected = [tuple(map(str, client.get('/api/heatmap').get_json()['values']))]
+    client.post('/api/index-profiles', json=urban)
+    expected.append(tuple(map(str, client.get('/api/heatmap').get_json()['values'])))
+    assert expected[0] != expected[1]
+
+    seen, errors = set(), []
+
+    def read():
+        reader = app_module.app.test_client()
+        for _ in range(30):
+            response = reader.get('/api/heatmap')
+            if response.status_code != 200:
+                errors.append(response.status_code)
+            seen.add(tuple(map(str, response.get_json()['values'])))
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for i in range(20):
+        client.post('/api/index-profiles', json={'default': 'default' if i % 2 else 'urban'})
+    for thread in readers:
+        thread.join()
+    assert not errors
+    assert seen <= set(expected)
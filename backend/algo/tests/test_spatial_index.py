@@ -0,0 +1,118 @@
+"""Property tests for Spatial Index module."""
+import pytest
+import pandas as pd
+import numpy as np
+from hypothesis import given, strategies as st, settings
+
+import sys
+sys.path.insert(0, '.')
+from src.spatial_index import DetectorIndex
+from src.feature_engineering import FeatureEngineer
+
+
+def make_detectors(n, seed):
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({
+        'detid': np.arange(1, n + 1),
+        'lat': rng.uniform(45.0, 45.1, n),
+        'lon': rng.uniform(7.6, 7.7, n),
+        'bearing': rng.uniform(0, 360, n)
+    })
+
+
+# Feature: traffic-ml-analysis, Property 8: Spatial Query Correctness
+
+@given(
+    n=st.integers(min_value=1, max_value=60),
+    k=st.integers(min_value=1, max_value=10),
+    seed=st.integers(min_value=0, max_value=1000)
+)
+@settings(max_examples=100)
+def test_nearest_matches_brute_force(n, k, seed):
+    """Property 8: Grid nearest-neighbor query should match a full scan."""
+    detectors = make_detectors(n, seed)
+    index = DetectorIndex(detectors, cell_size=0.01)
+    lat, lon = 45.05, 7.65
+
+    positions, distances = index.nearest(lat, lon, k)
+    expected = np.sort(index._distances(lat, lon, np.arange(n)))[:k]
+
+    assert len(positions) == min(k, n)
+    assert np.allclose(distances, expected)
+
+
+@given(
+    n=st.integers(min_value=1, max_value=60),
+    seed=st.integers(min_value=0, max_value=1000)
+)
+@settings(max_examples=100)
+def test_bbox_matches_brute_force(n, seed):
+    """Property 8: Bounding box query should return exactly the detectors inside it."""
+    detectors = make_detectors(n, seed)
+    index = DetectorIndex(detectors, cell_size=0.01)
+
+    result = set(index.detids[index.query_bbox(45.02, 7.62, 45.06, 7.68)])
+    inside = detectors[detectors['lat'].between(45.02, 45.06) & detectors['lon'].between(7.62, 7.68)]
+    assert result == set(inside['detid'])
+
+
+def test_neighbor_pairs_split_by_bearing():
+    """Test neighbors ahead of the travel direction are downstream."""
+    detectors = pd.DataFrame({
+        'detid': [1, 2, 3],
+        'lat': [45.070, 45.071, 45.069],
+        'lon': [7.68, 7.68, 7.68],
+        'bearing': [0.0, 0.0, 0.0]
+    })
+    pairs = DetectorIndex(detectors).neighbor_pairs(radius_m=500)
+    sides = pairs[pairs['detid'] == 1].set_index('neighbor_detid')['side']
+    assert sides[2] == 'downstream'
+    assert sides[3] == 'upstream'
+
+
+def test_engineer_features_adds_neighbor_features():
+    """Test neighbor features use neighbor flow and fall back to own mean."""
+    detectors = pd.DataFrame({
+        'detid': [1, 2, 3],
+        'lat': [45.070, 45.071, 45.300],
+        'lon': [7.68, 7.68, 7.68],
+        'bearing': [0.0, 0.0, 0.0]
+    })
+    df = pd.DataFrame({
+        'day': ['2016-09-26'] * 3,
+        'interval': [0, 0, 0],
+        'detid': [1, 2, 3],
+        'flow': [100.0, 200.0, 300.0],
+        'occ': [5.0] * 3,
+        'speed': [50.0] * 3
+    })
+    result = FeatureEngineer().engineer_features(df, DetectorIndex(detectors)).set_index('detid')
+
+    assert result.loc[1, 'downstream_mean_flow'] == 200.0
+    assert result.loc[2, 'upstream_mean_flow'] == 100.0
+    assert result.loc[3, 'upstream_mean_flow'] == 300.0
+    assert result.loc[3, 'lat'] == 45.300
+
+
+def test_neighbor_features_without_bearing():
+    """Test detectors without a bearing get one undirected neighbor feature."""
+    detectors = pd.DataFrame({
+        'detid': [1, 2, 3],
+        'lat': [45.070, 45.071, 45.069],
+        'lon': [7.68, 7.68, 7.68]
+    })
+    index = DetectorIndex(detectors)
+    assert index.neighbor_sides == ['neighbor']
+    assert set(index.neighbor_pairs(radius_m=500)['side']) == {'neighbor'}
+
+    df = pd.DataFrame({
+        'day': ['2016-09-26'] * 3,
+        'interval': [0, 0, 0],
+        'detid': [1, 2, 3],
+        'flow': [100.0, 200.0, 300.0],
+        'occ': [5.0] * 3,
+        'speed': [50.0] * 3
+    })
+    result = FeatureEngineer().engineer_features(df, index).set_index('detid')
+    assert 'upstream_mean_flow' not in result.columns and 'downstream_mean_flow' not in result.columns
+    assert result.loc[1, 'neighbor_mean_flow'] == 250.0